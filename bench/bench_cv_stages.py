@@ -0,0 +1,190 @@
+"""
+Benchmark: every per-frame CV stage on synthetic scenes, with regression check
+
+Times the capture-free stages on SceneGenerator frames while scaling the
+number of floating names (and cached positions / overlay detections with
+it):
+
+    find_floating_names          frame -> detections (+ recall vs ground truth)
+    PositionCache.is_recently_checked   one lookup against a full cache
+    detect_class_by_color        nameplate crop
+    get_health_pixels            nameplate crop
+    is_player_dead               frame
+    OverlayWindow.render         overlay image with the detections
+
+--size renders the scenes at the base layout and downscales them, like a
+client running at a lower resolution (components scaled by ScreenGeometry).
+
+--save stores the medians as the baseline; a normal run compares against it
+and exits with status 1 when a stage got slower than --tolerance (and by
+more than MIN_REGRESSION_MS).
+Timings are machine-specific - keep the baseline from the box you compare on.
+
+Usage (from the repo root):
+    python bench/bench_cv_stages.py [--names 0 10 25 50] [--frames 5] [--min-time 0.2]
+    python bench/bench_cv_stages.py --size 1280x720            # compare a 720p client with the baseline
+    python bench/bench_cv_stages.py --save
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import time
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT, get_bench_logger
+from scene import SceneGenerator, match_boxes
+
+from mob_hunter import (Config, DeathDetector, FloatingNameDetector, NameplateReader, OverlayWindow,
+                        PositionCache, ScreenGeometry)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'bench', 'baselines', 'cv_stages_baseline.json')
+MIN_REGRESSION_MS = 0.05  # Microsecond stages jitter by more than --tolerance; ignore slowdowns below this
+
+
+def time_call(fn, args_list, min_time):
+    """Median ms per call, cycling through args_list for at least min_time seconds"""
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(samples) < len(args_list):
+        args = args_list[len(samples) % len(args_list)]
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def bench_scenario(names, frames_per_scenario, min_time, logger, geometry):
+    """{stage: ms} (+ detection recall) for scenes with this many floating names"""
+    scene = SceneGenerator(seed=names)
+    pets = names // 5
+    classes = ['General', 'Champion', 'Giant', 'Unique', None]
+    scenes = [scene.generate(names=names, pets=pets, nameplate=classes[i % len(classes)],
+                             mob_health=(i % 3) / 2, player_health=1.0)
+              for i in range(frames_per_scenario)]
+    if not geometry.is_base():
+        scenes = [(cv2.resize(frame, (geometry.width, geometry.height), interpolation=cv2.INTER_AREA),
+                   {**truth, 'mob_names': [geometry.region(box) for box in truth['mob_names']],
+                    'pet_names': [geometry.region(box) for box in truth['pet_names']]})
+                  for frame, truth in scenes]
+    frames = [frame for frame, _ in scenes]
+    x, y, w, h = geometry.nameplate_region
+    nameplates = [frame[y:y+h, x:x+w] for frame in frames]
+
+    detector = FloatingNameDetector(logger, geometry=geometry)
+    reader = NameplateReader(logger, None, geometry=geometry)
+    death_detector = DeathDetector(logger, geometry=geometry)
+    results = {}
+
+    try:
+        results['find_floating_names'] = time_call(detector.find_floating_names, [(f,) for f in frames], min_time)
+        detections = [detector.find_floating_names(frame) for frame in frames]
+        expected = sum(len(truth['mob_names']) + len(truth['pet_names']) for _, truth in scenes)
+        found = sum(match_boxes([d['region'] for d in dets], truth['mob_names'] + truth['pet_names'])
+                    for dets, (_, truth) in zip(detections, scenes))
+        recall = found / expected if expected else 1.0
+
+        # Cache holds one entry per name seen recently; lookups are mostly misses (new positions)
+        cache = PositionCache(logger, geometry)
+        rng = random.Random(names)
+        filled = {(rng.randint(0, geometry.width), rng.randint(0, geometry.height)): time.time()
+                  for _ in range(names)}
+        lookups = [((rng.randint(0, geometry.width), rng.randint(0, geometry.height)),) for _ in range(64)]
+
+        def cache_lookup(position):
+            cache.cache = dict(filled)
+            cache.is_recently_checked(position)
+
+        results['is_recently_checked'] = time_call(cache_lookup, lookups, min_time)
+
+        results['detect_class_by_color'] = time_call(reader.detect_class_by_color, [(n,) for n in nameplates], min_time)
+        results['get_health_pixels'] = time_call(reader.get_health_pixels, [(n,) for n in nameplates], min_time)
+        results['is_player_dead'] = time_call(death_detector.is_player_dead, [(f,) for f in frames], min_time)
+
+        overlay = OverlayWindow(logger, geometry)
+        overlay.stats = {'Status': 'RUNNING', 'Cycle': 1, 'Detected': names, 'Kills': 0}
+
+        def render(dets):
+            overlay.detections = dets
+            overlay.render()
+
+        results['overlay_render'] = time_call(render, [(dets,) for dets in detections], min_time)
+    finally:
+        reader.shutdown()
+
+    return results, recall
+
+
+def compare(baseline, results, tolerance):
+    """Print baseline vs now per stage and scenario, returns the regressions"""
+    regressions = []
+    print(f"\n{'stage':>22} | {'names':>5} | {'baseline ms':>11} | {'now ms':>8} | {'change':>7}")
+    print("-" * 66)
+    for names, stages in results.items():
+        for stage, ms in stages.items():
+            before = baseline.get('results', {}).get(names, {}).get(stage)
+            if before is None:
+                continue
+            change = ms / max(before, 1e-6) - 1
+            marker = ""
+            if change > tolerance and ms - before > MIN_REGRESSION_MS:
+                marker = "  <- slower"
+                regressions.append((stage, names, before, ms))
+            print(f"{stage:>22} | {names:>5} | {before:>11.3f} | {ms:>8.3f} | {change * 100:>+6.0f}%{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CV stage benchmarks on synthetic scenes")
+    parser.add_argument('--names', type=int, nargs='+', default=[0, 10, 25, 50], help="Floating names per scene")
+    parser.add_argument('--frames', type=int, default=5, help="Scenes per name count")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds of timing per stage")
+    parser.add_argument('--size', default=f"{Config.SCREEN_WIDTH}x{Config.SCREEN_HEIGHT}",
+                        help="Client resolution WxH (scenes downscaled from the base layout)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    logger = get_bench_logger()
+    logger.setLevel(logging.CRITICAL)  # Death detection logs at warning level on dead-player scenes
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    geometry = ScreenGeometry(width, height)
+
+    results = {}
+    print(f"Client size {width}x{height}")
+    print(f"{'names':>5} | " + " | ".join(f"{s:>12}" for s in ['detect', 'cache', 'class_color', 'health',
+                                                                'player_dead', 'overlay']) + " | recall")
+    print("-" * 104)
+    for names in args.names:
+        stages, recall = bench_scenario(names, args.frames, args.min_time, logger, geometry)
+        results[str(names)] = {stage: round(ms, 4) for stage, ms in stages.items()}
+        print(f"{names:>5} | " + " | ".join(f"{ms:>9.3f} ms" for ms in stages.values()) + f" | {recall * 100:.0f}%")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'machine': platform.platform(), 'processor': platform.processor(), 'size': args.size,
+                       'results': results}, f, indent=1, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} - run with --save first")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('size', args.size) != args.size:
+        print(f"\nBaseline was recorded at {baseline['size']} - the comparison shows the resolution change")
+    regressions = compare(baseline, results, args.tolerance)
+    print(f"\n{len(regressions)} regressions (> {args.tolerance * 100:.0f}% slower than {baseline.get('machine', '?')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
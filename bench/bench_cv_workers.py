@@ -0,0 +1,84 @@
+"""
+Benchmark: CV thread pool scaling on replayed session screenshots
+
+Runs find_floating_names (three threshold passes in parallel) and the
+combined "death check + detection on the same frame" stage with 1/2/4
+workers and checks every worker count produces identical detections.
+
+Usage:
+    python bench/bench_cv_workers.py [--frames 40] [--repeat 3] [--workers 1 2 4]
+"""
+
+import argparse
+import time
+
+from common import load_replay_frames, get_bench_logger
+
+from mob_hunter import CVWorkerPool, FloatingNameDetector, DeathDetector
+
+
+def run_detection(detector, frames, repeat):
+    """Return (ms per frame, detections of last repeat)"""
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [detector.find_floating_names(frame) for frame in frames]
+    elapsed = time.perf_counter() - start
+    return elapsed / (len(frames) * repeat) * 1000, results
+
+
+def run_detection_with_death_check(pool, detector, death_detector, frames, repeat):
+    """Death check on the pool, detection on this thread (same split as run_cycle)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            death_future = pool.submit(death_detector.is_player_dead, frame)
+            detector.find_floating_names(frame)
+            death_future.result()
+    elapsed = time.perf_counter() - start
+    return elapsed / (len(frames) * repeat) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CV worker pool benchmark")
+    parser.add_argument('--frames', type=int, default=40, help="Number of replay frames")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes over the frame set")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    frames = load_replay_frames(args.frames)
+    if not frames:
+        print("No replay screenshots found under logs/session_*/screenshots")
+        return
+
+    logger = get_bench_logger()
+    death_detector = DeathDetector(logger)
+
+    print(f"Frames: {len(frames)} x {args.repeat} passes ({frames[0].shape[1]}x{frames[0].shape[0]})")
+    print(f"{'workers':>8} | {'detect ms':>10} | {'speedup':>8} | {'detect+death ms':>16}")
+    print("-" * 52)
+
+    baseline_ms = None
+    baseline_results = None
+    for workers in args.workers:
+        pool = CVWorkerPool(logger, workers=workers)
+        detector = FloatingNameDetector(logger, pool)
+
+        # Warm-up (thread start, OpenCV lazy init)
+        detector.find_floating_names(frames[0])
+
+        detect_ms, results = run_detection(detector, frames, args.repeat)
+        combined_ms = run_detection_with_death_check(pool, detector, death_detector, frames, args.repeat)
+        pool.shutdown()
+
+        if baseline_ms is None:
+            baseline_ms = detect_ms
+            baseline_results = results
+        elif results != baseline_results:
+            print(f"!! detections with {workers} workers differ from {args.workers[0]} workers")
+
+        print(f"{workers:>8} | {detect_ms:>10.2f} | {baseline_ms / detect_ms:>7.2f}x | {combined_ms:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
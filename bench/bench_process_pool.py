@@ -0,0 +1,90 @@
+"""
+Benchmark: detection throughput with the shared-memory process pool
+
+Replays session screenshots through DetectionProcessPool with increasing
+worker counts, keeping every ring slot busy (pipelined submits), and
+compares against in-process find_floating_names.
+
+Usage:
+    python bench/bench_process_pool.py [--frames 40] [--repeat 3] [--workers 1 2 4]
+"""
+
+import argparse
+import time
+from collections import deque
+
+from common import load_replay_frames, get_bench_logger
+
+from mob_hunter import DetectionProcessPool, FloatingNameDetector
+
+
+def run_in_process(frames, repeat, logger):
+    """Baseline: detection on this process (frames/sec)"""
+    detector = FloatingNameDetector(logger)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            detector.find_floating_names(frame)
+    elapsed = time.perf_counter() - start
+    return len(frames) * repeat / elapsed
+
+
+def run_pool(frames, repeat, workers, slots, logger):
+    """Pipelined submits through the ring (frames/sec) + detections for checking"""
+    pool = DetectionProcessPool(logger, workers=workers, slots=slots)
+    try:
+        # Warm-up: start every worker process
+        for future in [pool.submit(frames[0]) for _ in range(workers)]:
+            future.result()
+
+        in_flight = deque()
+        results = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for frame in frames:
+                if len(in_flight) >= slots:
+                    results.append(pool.unpack(in_flight.popleft().result()))
+                in_flight.append(pool.submit(frame))
+        while in_flight:
+            results.append(pool.unpack(in_flight.popleft().result()))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    return len(frames) * repeat / elapsed, results[:len(frames)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process-pool detection benchmark")
+    parser.add_argument('--frames', type=int, default=40, help="Number of replay frames")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes over the frame set")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--slots', type=int, default=None, help="Ring slots (default: 2 x workers)")
+    args = parser.parse_args()
+
+    frames = load_replay_frames(args.frames)
+    if not frames:
+        print("No replay screenshots found under logs/session_*/screenshots")
+        return
+
+    logger = get_bench_logger()
+    print(f"Frames: {len(frames)} x {args.repeat} passes ({frames[0].shape[1]}x{frames[0].shape[0]})")
+
+    baseline_fps = run_in_process(frames, args.repeat, logger)
+    expected = [FloatingNameDetector(logger).find_floating_names(frame) for frame in frames]
+
+    print(f"{'mode':>12} | {'frames/s':>9} | {'scaling':>8}")
+    print("-" * 36)
+    print(f"{'in-process':>12} | {baseline_fps:>9.1f} | {1.0:>7.2f}x")
+
+    for workers in args.workers:
+        slots = args.slots or workers * 2
+        fps, results = run_pool(frames, args.repeat, workers, slots, logger)
+        if any(got != want for got, want in zip(results, expected)):
+            print(f"!! pool detections with {workers} workers differ from in-process")
+        print(f"{f'{workers} procs':>12} | {fps:>9.1f} | {fps / baseline_fps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Calibration: derive UI regions and HSV ranges from labeled screenshots
+
+Searches, on labeled full-screen frames:
+    CLASS_COLOR_RANGES / CLASS_COLOR_MIN_PIXELS   hue window, saturation/value floor and
+                                                  pixel count per class (greedy, in class
+                                                  priority order, as detect_class_by_color
+                                                  checks them)
+    MOB_HEALTH_BAR_REGION                         where health colors show up in nameplates
+                                                  of targeted mobs
+    MOB_HEALTH_HSV_RANGES / RED_PIXEL_THRESHOLD   alive vs dead mobs (needs dead labels)
+    PLAYER_HEALTH_BAR_REGION                      where red shows up top-left while alive
+    PLAYER_HEALTH_HSV_RANGES / MIN_HEALTH_RED_PIXELS   alive vs dead player (needs dead labels)
+
+and writes the result as a profile the bot loads at startup
+(Config.CALIBRATION_PATH). Settings without enough labels keep their
+current value (a class needs MIN_CLASS_SAMPLES labels to get a new color
+range). The search runs on the training sessions only; the accuracy of the
+current settings and of the profile is printed on those and on held-out
+sessions (--holdout) - the held-out column is the one to trust.
+
+Labels: "screenshot,class[,mob_alive[,player_alive]]" lines - class is the
+mob class or None, alive columns are 1/0 (empty = unknown).
+bench/labels/nameplate_classes.csv (class only) works as is.
+--synthetic N calibrates on N SceneGenerator frames instead (sanity check).
+
+Usage (from the repo root):
+    python bench/calibrate.py [--labels bench/labels/nameplate_classes.csv] [--output calibration.json]
+    python bench/calibrate.py --holdout 0             # fit on every session (in-sample score only)
+    python bench/calibrate.py --synthetic 200 --dry-run
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT, get_bench_logger
+from scene import SceneGenerator
+
+from mob_hunter import CALIBRATION_KEYS, ColorMask, Config, DeathDetector, NameplateReader
+
+HUE_WINDOW_WIDTHS = [6, 10, 16, 24, 36]  # Hue window sizes tried (OpenCV hue is 0-179)
+HUE_WINDOW_STEP = 2
+SATURATION_FLOORS = [60, 100, 150]  # Minimum saturation = value tried
+PLAYER_HEALTH_SEARCH = (0, 0, Config.SCREEN_WIDTH // 4, Config.SCREEN_HEIGHT // 6)  # (x, y, w, h)
+BAR_MIN_ASPECT = 5  # Health bars are wide and flat (rules out world background blobs)
+BAR_MIN_FILL = 0.5  # Fraction of the bounding box a bar component covers
+BAR_PADDING = 2  # Pixels added around a found bar (tolerates a 1-2 px UI shift)
+REGION_FREQUENCY = 0.05  # Pixel is part of a bar if colored this often relative to the busiest pixel (bars drain)
+MIN_CLASS_SAMPLES = 10  # Labeled frames a class needs for a fitted color range (fewer keep the current one)
+
+
+class Sample:
+    """One labeled frame (alive flags None = unknown)"""
+
+    def __init__(self, name, frame, mob_class, mob_alive=None, player_alive=None):
+        self.name = name
+        self.frame = frame
+        self.mob_class = mob_class
+        self.mob_alive = mob_alive
+        self.player_alive = player_alive
+
+    @property
+    def session(self):
+        """Session directory of a screenshot (synthetic frames are their own session)"""
+        return os.path.dirname(os.path.dirname(self.name)) or self.name
+
+    def nameplate(self, region=None):
+        x, y, w, h = Config.NAMEPLATE_REGION
+        plate = self.frame[y:y+h, x:x+w]
+        if region is None:
+            return plate
+        rx, ry, rw, rh = region
+        return plate[ry:ry+rh, rx:rx+rw]
+
+
+def parse_flag(value):
+    value = value.strip()
+    return None if value == '' else value not in ('0', 'False', 'false')
+
+
+def load_labeled_frames(labels_path):
+    """[Sample] for every readable labeled screenshot"""
+    samples = []
+    with open(labels_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split(',')
+            frame = cv2.imread(os.path.join(REPO_ROOT, fields[0]), cv2.IMREAD_COLOR)
+            if frame is None or frame.shape[:2] != (Config.SCREEN_HEIGHT, Config.SCREEN_WIDTH):
+                continue
+            mob_class = None if fields[1] == 'None' else fields[1]
+            mob_alive = parse_flag(fields[2]) if len(fields) > 2 else None
+            player_alive = parse_flag(fields[3]) if len(fields) > 3 else None
+            samples.append(Sample(fields[0], frame, mob_class, mob_alive, player_alive))
+    return samples
+
+
+def synthetic_frames(count, seed):
+    """[Sample] drawn by SceneGenerator, labels from its ground truth"""
+    scene = SceneGenerator(seed=seed)
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        mob_class = rng.choice(['General', 'Champion', 'Giant', 'Unique', None])
+        mob_health = rng.choice([0.0, rng.uniform(0.05, 1.0)]) if mob_class else 1.0
+        player_health = rng.choice([0.0, rng.uniform(0.1, 1.0), 1.0])
+        frame, truth = scene.generate(names=rng.randint(0, 20), nameplate=mob_class,
+                                      mob_health=mob_health, player_health=player_health)
+        samples.append(Sample(f"synthetic_{i:04d}", frame, mob_class,
+                              truth['mob_alive'] if mob_class else None, not truth['player_dead']))
+    return samples
+
+
+def split_sessions(samples, holdout, seed):
+    """(train, held out) - whole sessions are held out, so no frame of a held-out session is fitted on"""
+    sessions = sorted({sample.session for sample in samples})
+    count = int(round(len(sessions) * holdout))
+    if holdout > 0 and len(sessions) > 1:
+        count = min(max(count, 1), len(sessions) - 1)
+    held_out = set(random.Random(seed).sample(sessions, count))
+    return ([s for s in samples if s.session not in held_out], [s for s in samples if s.session in held_out])
+
+
+def hue_histograms(crops):
+    """{floor: int32[samples, 180]} hue histograms of pixels with saturation and value >= floor"""
+    hists = {floor: np.zeros((len(crops), 180), dtype=np.int32) for floor in SATURATION_FLOORS}
+    for i, crop in enumerate(crops):
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        hue, saturation, value = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+        for floor in SATURATION_FLOORS:
+            hists[floor][i] = np.bincount(hue[(saturation >= floor) & (value >= floor)], minlength=180)[:180]
+    return hists
+
+
+def hue_windows():
+    """[(start, width)] of every hue window tried (windows may wrap past 179)"""
+    return [(start, width) for width in HUE_WINDOW_WIDTHS for start in range(0, 180, HUE_WINDOW_STEP)]
+
+
+def window_counts(hist, windows):
+    """int[samples, windows] pixel counts inside each hue window"""
+    doubled = np.concatenate([hist, hist], axis=1)  # Wrapped windows read past 179
+    cumulative = np.concatenate([np.zeros((len(hist), 1), dtype=np.int64), np.cumsum(doubled, axis=1)], axis=1)
+    starts = np.array([start for start, _ in windows])
+    ends = starts + np.array([width for _, width in windows])
+    return cumulative[:, ends] - cumulative[:, starts]
+
+
+def window_ranges(start, width, floor):
+    """HSV ranges of a hue window (two ranges when it wraps past 179)"""
+    end = start + width - 1
+    if end <= 179:
+        return [((start, floor, floor), (end, 255, 255))]
+    return [((start, floor, floor), (179, 255, 255)), ((0, floor, floor), (end - 180, 255, 255))]
+
+
+def best_threshold(counts, positive):
+    """
+    (threshold, gain, margin) maximizing true minus false positives of count > threshold
+    The threshold sits halfway between the chosen count and the next lower one;
+    margin is that gap relative to the chosen count (ties go to the clearer cut).
+    """
+    order = np.argsort(-counts, kind='stable')
+    sorted_counts = counts[order]
+    gains = np.cumsum(np.where(positive[order], 1, -1))
+    # Only cut between different counts
+    valid = np.append(sorted_counts[1:] < sorted_counts[:-1], True) & (sorted_counts > 0)
+    if not valid.any():
+        return None, 0, 0.0
+    lower = np.append(sorted_counts[1:], 0)
+    margins = (sorted_counts - lower) / (sorted_counts + 1.0)
+    candidates = np.flatnonzero(valid)
+    best = candidates[np.lexsort((margins[candidates], gains[candidates]))[-1]]
+    return int((sorted_counts[best] + lower[best]) // 2), int(gains[best]), float(margins[best])
+
+
+def search_color(hists, positive):
+    """(ranges, threshold, gain) of the hue window + floor that best separates positive samples"""
+    windows = hue_windows()
+    best, best_key = (None, None, 0), (0, 0.0, 0)
+    for floor, hist in hists.items():
+        counts = window_counts(hist, windows)
+        for w, (start, width) in enumerate(windows):
+            threshold, gain, margin = best_threshold(counts[:, w], positive)
+            # Ties: clearer cut, then the wider window (less sensitive to lighting)
+            key = (gain, round(margin, 2), width)
+            if threshold is not None and gain > 0 and key > best_key:
+                best, best_key = (window_ranges(start, width, floor), threshold, gain), key
+    return best
+
+
+class ColorMaskCounter:
+    """ColorMask pixel counts per sample nameplate (or sub-region)"""
+
+    def __init__(self, ranges, region=None):
+        self.mask = ColorMask(ranges)
+        self.region = region
+
+    def counts(self, samples):
+        return np.array([self.mask.count(cv2.cvtColor(sample.nameplate(self.region), cv2.COLOR_BGR2HSV))
+                         for sample in samples])
+
+
+def calibrate_classes(samples):
+    """CLASS_COLOR_RANGES, CLASS_COLOR_MIN_PIXELS - greedy in class priority order"""
+    hists = hue_histograms([sample.nameplate() for sample in samples])
+    labels = np.array([str(sample.mob_class) for sample in samples])
+    unclaimed = np.ones(len(samples), dtype=bool)  # Not yet predicted as a higher-priority class
+    ranges, min_pixels = {}, {}
+
+    for mob_class in sorted(Config.CLASS_PRIORITIES, key=Config.CLASS_PRIORITIES.get):
+        labeled = int((labels == mob_class).sum())
+        class_ranges = None
+        if labeled >= MIN_CLASS_SAMPLES:
+            subset = {floor: hist[unclaimed] for floor, hist in hists.items()}
+            class_ranges, threshold, gain = search_color(subset, labels[unclaimed] == mob_class)
+        if class_ranges is None:
+            # Too few labels (or no color separates it) - keep what the bot uses now
+            reason = f"{labeled} labeled samples" if labeled < MIN_CLASS_SAMPLES else "no color separates it"
+            if mob_class not in Config.CLASS_COLOR_RANGES:
+                print(f"  {mob_class}: {reason} - not color-checked (as now)")
+                continue
+            class_ranges = Config.CLASS_COLOR_RANGES[mob_class]
+            threshold = Config.CLASS_COLOR_MIN_PIXELS[mob_class]
+            print(f"  {mob_class}: {reason} - current range kept: {class_ranges} > {threshold} px")
+        else:
+            print(f"  {mob_class}: {class_ranges} > {threshold} px (net +{gain} correct on {labeled} labeled)")
+        ranges[mob_class] = class_ranges
+        min_pixels[mob_class] = threshold
+        unclaimed &= ColorMaskCounter(class_ranges).counts(samples) <= threshold
+    return ranges, min_pixels
+
+
+def bar_region(crops, ranges):
+    """(x, y, w, h) of the largest bar-shaped area colored in most crops, or None"""
+    color_mask = ColorMask(ranges)
+    frequency = np.zeros(crops[0].shape[:2], dtype=np.float32)
+    for crop in crops:
+        frequency += color_mask.mask(cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)) > 0
+    if frequency.max() == 0:
+        return None
+    bar = (frequency >= frequency.max() * REGION_FREQUENCY).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(bar)
+    bars = [(area, (int(x), int(y), int(w), int(h))) for x, y, w, h, area in stats[1:count]
+            if w >= h * BAR_MIN_ASPECT and area >= w * h * BAR_MIN_FILL]
+    if not bars:
+        return None
+    x, y, w, h = max(bars)[1]
+    x, y = max(0, x - BAR_PADDING), max(0, y - BAR_PADDING)
+    w = min(frequency.shape[1] - x, w + 2 * BAR_PADDING)
+    h = min(frequency.shape[0] - y, h + 2 * BAR_PADDING)
+    return (x, y, w, h)
+
+
+def calibrate_health(samples, crop, alive, ranges_key, threshold_key):
+    """(ranges, threshold) separating alive from dead samples, or None without both labels"""
+    positive = np.array([alive(sample) for sample in samples])
+    if positive.all() or not positive.any():
+        return None
+    hists = hue_histograms([crop(sample) for sample in samples])
+    ranges, threshold, gain = search_color(hists, positive)
+    if ranges is None:
+        return None
+    print(f"  {ranges_key}: {ranges}, {threshold_key} = {threshold} (net +{gain} correct)")
+    return ranges, threshold
+
+
+def accuracy(samples, label, predict):
+    """Correct predictions / labeled samples (label None = not labeled)"""
+    labeled = [sample for sample in samples if label(sample) is not None]
+    if not labeled:
+        return None
+    return sum(predict(sample) == label(sample) for sample in labeled) / len(labeled)
+
+
+def evaluate(samples, logger):
+    """{check: accuracy} with the current Config (components rebuilt from it)"""
+    reader = NameplateReader(logger, None)
+    death_detector = DeathDetector(logger)
+    px, py, pw, ph = Config.PLAYER_HEALTH_BAR_REGION
+    try:
+        return {
+            'class (color heuristic)': accuracy(samples, lambda s: str(s.mob_class),
+                                                lambda s: str(reader.detect_class_by_color(s.nameplate()))),
+            'mob alive': accuracy(samples, lambda s: s.mob_alive,
+                                  lambda s: reader.get_health_pixels(s.nameplate()) > Config.RED_PIXEL_THRESHOLD),
+            'player alive': accuracy(samples, lambda s: s.player_alive,
+                                     lambda s: death_detector.count_health_red_pixels(
+                                         s.frame[py:py+ph, px:px+pw]) >= Config.MIN_HEALTH_RED_PIXELS),
+        }
+    finally:
+        reader.shutdown()
+
+
+def calibrate(samples):
+    """{Config key: value} found on the samples"""
+    profile = {}
+
+    print("\nClass colors:")
+    ranges, min_pixels = calibrate_classes(samples)
+    if ranges:
+        profile['CLASS_COLOR_RANGES'] = ranges
+        profile['CLASS_COLOR_MIN_PIXELS'] = min_pixels
+
+    print("\nMob health bar:")
+    targeted = [s for s in samples if s.mob_class is not None and s.mob_alive is not False]
+    region = bar_region([s.nameplate() for s in targeted], Config.MOB_HEALTH_HSV_RANGES) if targeted else None
+    if region:
+        profile['MOB_HEALTH_BAR_REGION'] = region
+        print(f"  MOB_HEALTH_BAR_REGION: {region} (from {len(targeted)} targeted mobs)")
+    region = profile.get('MOB_HEALTH_BAR_REGION', Config.MOB_HEALTH_BAR_REGION)
+    mob_labeled = [s for s in samples if s.mob_alive is not None]
+    found = calibrate_health(mob_labeled, lambda s: s.nameplate(region), lambda s: s.mob_alive,
+                             'MOB_HEALTH_HSV_RANGES', 'RED_PIXEL_THRESHOLD') if mob_labeled else None
+    if found:
+        profile['MOB_HEALTH_HSV_RANGES'], profile['RED_PIXEL_THRESHOLD'] = found
+
+    print("\nPlayer health bar:")
+    sx, sy, sw, sh = PLAYER_HEALTH_SEARCH
+    alive = [s for s in samples if s.player_alive]
+    region = bar_region([s.frame[sy:sy+sh, sx:sx+sw] for s in alive], Config.PLAYER_HEALTH_HSV_RANGES) if alive else None
+    if region:
+        profile['PLAYER_HEALTH_BAR_REGION'] = (sx + region[0], sy + region[1], region[2], region[3])
+        print(f"  PLAYER_HEALTH_BAR_REGION: {profile['PLAYER_HEALTH_BAR_REGION']} (from {len(alive)} frames)")
+    px, py, pw, ph = profile.get('PLAYER_HEALTH_BAR_REGION', Config.PLAYER_HEALTH_BAR_REGION)
+    player_labeled = [s for s in samples if s.player_alive is not None]
+    found = calibrate_health(player_labeled, lambda s: s.frame[py:py+ph, px:px+pw], lambda s: s.player_alive,
+                             'PLAYER_HEALTH_HSV_RANGES', 'MIN_HEALTH_RED_PIXELS') if player_labeled else None
+    if found:
+        # Alive means count >= MIN_HEALTH_RED_PIXELS, the search finds count > threshold
+        profile['PLAYER_HEALTH_HSV_RANGES'], profile['MIN_HEALTH_RED_PIXELS'] = found[0], found[1] + 1
+
+    if not any(s.player_alive is not None or s.mob_alive is not None for s in samples):
+        print("  (no alive/dead labels - health colors and thresholds unchanged)")
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive ROIs and HSV ranges from labeled screenshots")
+    parser.add_argument('--labels', default=os.path.join(REPO_ROOT, 'bench', 'labels', 'nameplate_classes.csv'))
+    parser.add_argument('--synthetic', type=int, default=0, help="Calibrate on N synthetic frames instead")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic scene / held-out session seed")
+    parser.add_argument('--holdout', type=float, default=0.3,
+                        help="Fraction of sessions held out for the accuracy check (0 = fit on all)")
+    parser.add_argument('--output', default=os.path.join(REPO_ROOT, Config.CALIBRATION_PATH))
+    parser.add_argument('--dry-run', action='store_true', help="Print the profile without writing it")
+    args = parser.parse_args()
+
+    samples = synthetic_frames(args.synthetic, args.seed) if args.synthetic else load_labeled_frames(args.labels)
+    if not samples:
+        print(f"No labeled {Config.SCREEN_WIDTH}x{Config.SCREEN_HEIGHT} screenshots found ({args.labels})")
+        return 1
+    print(f"Samples: {len(samples)} ({', '.join(f'{label}: {count}' for label, count in Counter(str(s.mob_class) for s in samples).items())})")
+
+    train, held_out = split_sessions(samples, args.holdout, args.seed)
+    print(f"Fitting on {len(train)} frames, {len(held_out)} frames from "
+          f"{len({s.session for s in held_out})} held-out sessions for the accuracy check")
+
+    logger = get_bench_logger()
+    start = time.perf_counter()
+    profile = calibrate(train)
+    print(f"\nSearch took {time.perf_counter() - start:.1f}s")
+
+    splits = [('fitted (in-sample)', train)] + ([('held out', held_out)] if held_out else [])
+    before = {name: evaluate(split, logger) for name, split in splits}
+    current = {key: getattr(Config, key) for key in CALIBRATION_KEYS}
+    for key, value in profile.items():
+        setattr(Config, key, value)
+    after = {name: evaluate(split, logger) for name, split in splits}
+    for key, value in current.items():
+        setattr(Config, key, value)
+
+    print(f"\n{'check':>24} | {'frames':>18} | {'current':>8} | {'profile':>8}")
+    print("-" * 69)
+    for name, _ in splits:
+        for check, score in before[name].items():
+            if score is not None:
+                print(f"{check:>24} | {name:>18} | {score * 100:>7.1f}% | {after[name][check] * 100:>7.1f}%")
+
+    if args.dry_run:
+        print()
+        for key, value in profile.items():
+            print(f"{key} = {json.dumps(value)}")
+        return 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'samples': len(train),
+                   'source': f"synthetic:{args.synthetic}" if args.synthetic else os.path.relpath(args.labels, REPO_ROOT),
+                   'config': profile}, f, indent=1)
+    print(f"\nProfile written to {args.output} (loaded by the bot at startup)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+"""
+Shared helpers for the benchmark scripts
+
+Frames are replayed from the screenshots saved under logs/session_*/screenshots
+so every benchmark runs on real 1920x1080 game frames.
+"""
+
+import glob
+import logging
+import os
+import sys
+
+import cv2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def find_replay_paths(limit=None, pattern="logs/session_*/screenshots/*.*"):
+    """Sorted saved session screenshot paths (optionally limited)"""
+    paths = sorted(path for path in glob.glob(os.path.join(REPO_ROOT, pattern))
+                   if path.endswith(('.png', '.jpg', '.webp')))
+    if limit:
+        paths = paths[:limit]
+    return paths
+
+
+def load_replay_frames(limit=None, pattern="logs/session_*/screenshots/*.*"):
+    """Load saved session screenshots as BGR frames (sorted, optionally limited)"""
+    frames = []
+    for path in find_replay_paths(limit, pattern):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def get_bench_logger():
+    """Quiet logger for components under benchmark"""
+    logger = logging.getLogger('MobHunterBench')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.WARNING)
+    return logger
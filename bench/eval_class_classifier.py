@@ -0,0 +1,126 @@
+"""
+Evaluation: nameplate class classifier on labeled session screenshots
+
+Crops NAMEPLATE_REGION from every screenshot listed in the labels file and
+compares the template classifier (ClassIconClassifier) with the old color
+heuristic (detect_class_by_color): accuracy, confusion and time per
+nameplate (target: under 1 ms).
+
+The class templates were cropped from some of the labeled screenshots, so
+accuracy is reported over all samples (in-sample) and over the sessions
+the templates were not cropped from (held out - the number to go by).
+
+Labels: bench/labels/nameplate_classes.csv - "screenshot,label" lines with
+the mob class or None (pets, players, no nameplate).
+
+Usage (from the repo root):
+    python bench/eval_class_classifier.py [--labels bench/labels/nameplate_classes.csv] [--repeat 20]
+                                          [--template-sessions session_... ...]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+
+import cv2
+
+from common import REPO_ROOT, get_bench_logger
+
+from mob_hunter import Config, ClassIconClassifier, NameplateReader
+
+# Sessions the shipped templates/classes images were cropped from
+TEMPLATE_SESSIONS = ('session_20251130_195230', 'session_20251130_204535')
+
+
+def session_of(path):
+    """Session directory name of a logs/<session>/screenshots/<file> path"""
+    return os.path.basename(os.path.dirname(os.path.dirname(path)))
+
+
+def load_labeled_nameplates(labels_path):
+    """[(path, label, nameplate crop)] for every readable labeled screenshot"""
+    x, y, w, h = Config.NAMEPLATE_REGION
+    samples = []
+    with open(labels_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path, label = line.rsplit(',', 1)
+            frame = cv2.imread(os.path.join(REPO_ROOT, path), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            samples.append((path, label, frame[y:y+h, x:x+w].copy()))
+    return samples
+
+
+def evaluate(name, classify, samples, repeat, template_sessions):
+    """Print accuracy (all / held out), confusion and ms per nameplate for one classifier"""
+    predictions = [str(classify(nameplate)) for _, _, nameplate in samples]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, _, nameplate in samples:
+            classify(nameplate)
+    ms = (time.perf_counter() - start) / (len(samples) * repeat) * 1000
+
+    correct = sum(prediction == label for prediction, (_, label, _) in zip(predictions, samples))
+    held_out = [prediction == label for prediction, (path, label, _) in zip(predictions, samples)
+                if session_of(path) not in template_sessions]
+    confusion = Counter((label, prediction) for prediction, (_, label, _) in zip(predictions, samples))
+
+    print(f"\n{name}")
+    print(f"  Accuracy (all, in-sample): {correct}/{len(samples)} ({correct / len(samples) * 100:.1f}%)")
+    if held_out:
+        print(f"  Accuracy (held out):       {sum(held_out)}/{len(held_out)} ({sum(held_out) / len(held_out) * 100:.1f}%)")
+    else:
+        print("  Accuracy (held out):       no samples outside the template sessions")
+    print(f"  Time: {ms:.3f} ms per nameplate")
+    print(f"  {'label':>10} -> {'predicted':<10} count")
+    for (label, prediction), count in sorted(confusion.items()):
+        marker = "" if label == prediction else "  <- wrong"
+        print(f"  {label:>10} -> {prediction:<10} {count:>5}{marker}")
+
+    wrong = [path for prediction, (path, label, _) in zip(predictions, samples) if prediction != label]
+    for path in wrong[:10]:
+        print(f"    wrong: {path}")
+    return ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nameplate class classifier evaluation")
+    parser.add_argument('--labels', default=os.path.join(REPO_ROOT, 'bench', 'labels', 'nameplate_classes.csv'))
+    parser.add_argument('--repeat', type=int, default=20, help="Timing passes over the sample set")
+    parser.add_argument('--template-sessions', nargs='*', default=list(TEMPLATE_SESSIONS),
+                        help="Sessions the class templates were cropped from (excluded from the held-out score)")
+    args = parser.parse_args()
+
+    samples = load_labeled_nameplates(args.labels)
+    if not samples:
+        print(f"No labeled screenshots found ({args.labels})")
+        return
+
+    logger = get_bench_logger()
+    classifier = ClassIconClassifier(logger)
+    if not classifier.is_available():
+        print(f"No class templates in {Config.CLASS_TEMPLATE_DIR} (run from the repo root)")
+        return
+
+    reader = NameplateReader(logger, None)
+    print(f"Samples: {len(samples)} ({', '.join(f'{label}: {count}' for label, count in Counter(label for _, label, _ in samples).items())})")
+    print(f"Templates: {', '.join(classifier.templates)}")
+    held_out = sum(session_of(path) not in args.template_sessions for path, _, _ in samples)
+    print(f"Held out: {held_out} samples outside {', '.join(args.template_sessions) or 'no sessions'}")
+
+    evaluate("Color heuristic (detect_class_by_color)", reader.detect_class_by_color, samples, args.repeat,
+             args.template_sessions)
+    ms = evaluate("Template classifier (ClassIconClassifier)",
+                  lambda nameplate: classifier.classify(nameplate)[0], samples, args.repeat,
+                  args.template_sessions)
+
+    print(f"\nTemplate classifier budget (< 1 ms): {'OK' if ms < 1.0 else 'OVER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Replay: recorded session frames through the CV stages, diffed against a baseline
+
+Feeds every saved screenshot (logs/session_*/screenshots) through
+FloatingNameDetector, FloatingNameClassifier, NameplateReader and
+DeathDetector - no clicks or key presses: the components share an
+InputController that is cancelled up front, so any input attempt raises.
+
+Per frame it records the detection set, pet probabilities, the nameplate
+read (class / alive / name) and the death check, plus per-stage timings.
+--save writes that as the baseline; a normal run diffs against it and
+exits with status 1 when any result changed, so CV performance work can be
+checked for speed and correctness on the same frames.
+
+Usage (from the repo root):
+    python bench/replay_session.py [--sessions "logs/session_*"] [--limit N] [--repeat 3]
+    python bench/replay_session.py --save                       # record the baseline
+    python bench/replay_session.py --baseline other.json        # diff against another baseline
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT, find_replay_paths, get_bench_logger
+
+from mob_hunter import (DeathDetector, FloatingNameClassifier, FloatingNameDetector,
+                        InputController, NameplateReader)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'bench', 'baselines', 'replay_baseline.json')
+STAGES = ['detect', 'pet_classifier', 'nameplate', 'death_check']
+PET_PROBABILITY_TOLERANCE = 0.05
+
+
+class ReplayPipeline:
+    """The bot's per-frame CV stages, without capture or input"""
+
+    def __init__(self, logger):
+        self.input = InputController()
+        self.input.cancel("replay - no input allowed")
+        self.detector = FloatingNameDetector(logger)
+        self.pet_classifier = FloatingNameClassifier(logger)
+        self.nameplate_reader = NameplateReader(logger, None, input_controller=self.input)
+        self.death_detector = DeathDetector(logger, self.input)
+
+    def run(self, frame):
+        """(result, {stage: seconds}) for one frame"""
+        timings = {}
+
+        start = time.perf_counter()
+        detections = self.detector.find_floating_names(frame)
+        timings['detect'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pet_probabilities = [self.pet_classifier.pet_probability(frame, det) for det in detections]
+        timings['pet_classifier'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        info = self.nameplate_reader.read_nameplate(frame)
+        timings['nameplate'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dead = self.death_detector.is_player_dead(frame)
+        timings['death_check'] = time.perf_counter() - start
+
+        nameplate = None
+        if info is not None:
+            nameplate = {'class': info.get('class'), 'is_alive': info.get('is_alive'), 'name': info.get('name')}
+        order = sorted(range(len(detections)), key=lambda i: tuple(detections[i]['region']))
+        result = {
+            'detections': [[int(v) for v in detections[i]['region']] for i in order],
+            'pet_probabilities': [round(float(pet_probabilities[i]), 3) for i in order],
+            'nameplate': nameplate,
+            'dead': bool(dead)
+        }
+        return result, timings
+
+    def shutdown(self):
+        self.nameplate_reader.shutdown()
+
+
+def replay(paths, repeat, logger):
+    """{frame path: result} and {stage: [ms per frame]} over all frames"""
+    pipeline = ReplayPipeline(logger)
+    results = {}
+    stage_ms = {stage: [] for stage in STAGES}
+    try:
+        for path in paths:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            key = os.path.relpath(path, REPO_ROOT).replace(os.sep, '/')
+            for _ in range(repeat):
+                result, timings = pipeline.run(frame)
+                for stage, seconds in timings.items():
+                    stage_ms[stage].append(seconds * 1000)
+            results[key] = result
+    finally:
+        pipeline.shutdown()
+    return results, stage_ms
+
+
+def summarize_timings(stage_ms):
+    """{stage: {'median': ms, 'p95': ms}}"""
+    return {stage: {'median': round(float(np.median(ms)), 3), 'p95': round(float(np.percentile(ms, 95)), 3)}
+            for stage, ms in stage_ms.items() if ms}
+
+
+def nameplate_changed(old, new):
+    """Class/alive must match; names only count when both runs had OCR"""
+    if old is None or new is None:
+        return old is not new
+    if old['class'] != new['class'] or old['is_alive'] != new['is_alive']:
+        return True
+    return old['name'] is not None and new['name'] is not None and old['name'] != new['name']
+
+
+def diff_frame(old, new):
+    """Human-readable differences between two results of the same frame"""
+    changes = []
+    old_regions = {tuple(region) for region in old['detections']}
+    new_regions = {tuple(region) for region in new['detections']}
+    if old_regions != new_regions:
+        changes.append(f"detections -{sorted(old_regions - new_regions)} +{sorted(new_regions - old_regions)}")
+    elif any(abs(a - b) > PET_PROBABILITY_TOLERANCE for a, b in zip(old['pet_probabilities'], new['pet_probabilities'])):
+        changes.append(f"pet probabilities {old['pet_probabilities']} -> {new['pet_probabilities']}")
+    if nameplate_changed(old['nameplate'], new['nameplate']):
+        changes.append(f"nameplate {old['nameplate']} -> {new['nameplate']}")
+    if old['dead'] != new['dead']:
+        changes.append(f"dead {old['dead']} -> {new['dead']}")
+    return changes
+
+
+def compare(baseline, results, timings, max_examples):
+    """Print correctness + timing differences, returns the number of changed frames"""
+    old_frames = baseline['frames']
+    common_keys = sorted(set(old_frames) & set(results))
+    missing = sorted(set(old_frames) - set(results))
+    new = sorted(set(results) - set(old_frames))
+
+    changed = {}
+    for key in common_keys:
+        changes = diff_frame(old_frames[key], results[key])
+        if changes:
+            changed[key] = changes
+
+    print(f"\nCorrectness: {len(common_keys) - len(changed)}/{len(common_keys)} frames unchanged"
+          f" ({len(missing)} baseline frames missing, {len(new)} new frames)")
+    for key in list(changed)[:max_examples]:
+        print(f"  {key}")
+        for change in changed[key]:
+            print(f"      {change}")
+    if len(changed) > max_examples:
+        print(f"  ... {len(changed) - max_examples} more")
+
+    print(f"\n{'stage':>14} | {'baseline ms':>11} | {'now ms':>8} | {'speedup':>7}")
+    print("-" * 52)
+    for stage in STAGES:
+        if stage not in timings:
+            continue
+        now = timings[stage]['median']
+        before = baseline.get('timings', {}).get(stage, {}).get('median')
+        if before is None:
+            print(f"{stage:>14} | {'-':>11} | {now:>8.3f} |")
+        else:
+            print(f"{stage:>14} | {before:>11.3f} | {now:>8.3f} | {before / max(now, 1e-6):>6.2f}x")
+    print("(timings are machine-specific - compare runs from the same box)")
+    return len(changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the CV stages")
+    parser.add_argument('--sessions', default="logs/session_*", help="Session directory glob (relative to the repo root)")
+    parser.add_argument('--limit', type=int, default=None, help="Max frames")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes per frame (timing)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--examples', type=int, default=10, help="Changed frames to print")
+    args = parser.parse_args()
+
+    paths = find_replay_paths(args.limit, f"{args.sessions}/screenshots/*.*")
+    if not paths:
+        print(f"No screenshots found under {args.sessions}/screenshots")
+        return 0
+
+    logger = get_bench_logger()
+    results, stage_ms = replay(paths, args.repeat, logger)
+    timings = summarize_timings(stage_ms)
+    print(f"Replayed {len(results)} frames x {args.repeat} passes")
+    for stage, summary in timings.items():
+        print(f"  {stage:>14}: {summary['median']:.3f} ms median, {summary['p95']:.3f} ms p95")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'timings': timings, 'frames': results}, f, indent=1, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} - run with --save first")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    return 1 if compare(baseline, results, timings, args.examples) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
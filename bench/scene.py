@@ -0,0 +1,128 @@
+"""
+Synthetic game scenes for the CV benchmarks
+
+Draws a 1920x1080 frame the CV stages respond to like a real one: textured
+world background, floating names (white = mob, yellow = pet), the target
+nameplate (health bar + class color) and the player health bar - with the
+ground truth, so the number of names/mobs can be scaled freely.
+
+    scene = SceneGenerator(seed=1)
+    frame, truth = scene.generate(names=25, pets=5, nameplate='Giant', mob_health=0.6)
+"""
+
+import random
+import string
+
+import cv2
+import numpy as np
+
+from common import REPO_ROOT  # noqa: F401 - puts the repo root on sys.path
+
+from mob_hunter import Config
+
+# BGR colors chosen inside the HSV ranges the bot checks
+MOB_NAME_COLOR = (235, 235, 235)
+PET_NAME_COLOR = (40, 220, 240)
+MOB_HEALTH_COLOR = (0, 165, 255)  # Orange (H~19)
+PLAYER_HEALTH_COLOR = (30, 30, 210)  # Red
+CLASS_COLORS = {
+    'Giant': (0, 215, 255),  # Gold
+    'Champion': (200, 40, 170),  # Purple
+    'Unique': (20, 20, 220),  # Red
+    'General': (150, 150, 150),  # No color - the color heuristic can't see it
+}
+
+
+class SceneGenerator:
+    """Random scenes with ground truth (same seed = same scenes)"""
+
+    def __init__(self, width=Config.SCREEN_WIDTH, height=Config.SCREEN_HEIGHT, seed=0):
+        self.width = width
+        self.height = height
+        self.random = random.Random(seed)
+        rng = np.random.default_rng(seed)
+
+        # Dusky terrain: blurred noise, well below the name thresholds
+        noise = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+        noise = cv2.GaussianBlur(noise, (0, 0), 3)
+        self.background = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+        self.background = (self.background.astype(np.float32) * 0.45 + 30).astype(np.uint8)
+
+    def random_name(self):
+        length = self.random.randint(5, 14)
+        return self.random.choice(string.ascii_uppercase) + ''.join(
+            self.random.choice(string.ascii_lowercase + ' ') for _ in range(length - 1)).strip()
+
+    def place_names(self, frame, count, color, taken):
+        """Draw count names at free positions, returns their (x, y, w, h) boxes"""
+        boxes = []
+        for _ in range(count):
+            name = self.random_name()
+            scale = self.random.uniform(0.45, 0.6)
+            (w, h), baseline = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX, scale, 1)
+            for _ in range(50):
+                x = self.random.randint(Config.IGNORE_LEFT + 10, self.width - Config.IGNORE_RIGHT - w - 10)
+                y = self.random.randint(Config.IGNORE_TOP + h + 10, self.height - Config.IGNORE_BOTTOM - 10)
+                box = (x, y - h, w, h + baseline)
+                if not any(abs(box[0] - t[0]) < max(box[2], t[2]) + 10 and abs(box[1] - t[1]) < 30 for t in taken):
+                    break
+            cv2.putText(frame, name, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, color, 1, cv2.LINE_AA)
+            taken.append(box)
+            boxes.append(box)
+        return boxes
+
+    def draw_nameplate(self, frame, mob_class, mob_health):
+        """Target nameplate: dark panel, name, health bar, class color row"""
+        x, y, w, h = Config.NAMEPLATE_REGION
+        plate = frame[y:y+h, x:x+w]
+        cv2.rectangle(plate, (180, 0), (420, 75), (45, 38, 32), -1)
+        cv2.putText(plate, self.random_name(), (230, 18), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (230, 200, 120), 1, cv2.LINE_AA)
+        bar_end = 80 + int(440 * max(0.0, min(1.0, mob_health)))
+        if bar_end > 80:
+            cv2.rectangle(plate, (80, 30), (bar_end, 44), MOB_HEALTH_COLOR, -1)
+        if mob_class is not None:
+            cv2.putText(plate, "Lv 7", (190, 68), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (220, 220, 220), 1, cv2.LINE_AA)
+            cv2.rectangle(plate, (265, 52), (285, 70), CLASS_COLORS[mob_class], -1)
+
+    def draw_player_health(self, frame, player_health):
+        x, y, w, h = Config.PLAYER_HEALTH_BAR_REGION
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (20, 20, 20), -1)
+        bar_end = x + int(w * max(0.0, min(1.0, player_health)))
+        if bar_end > x:
+            cv2.rectangle(frame, (x, y), (bar_end, y + h), PLAYER_HEALTH_COLOR, -1)
+
+    def generate(self, names=10, pets=0, nameplate='General', mob_health=1.0, player_health=1.0):
+        """
+        (frame, truth) - nameplate: class name, None (pet nameplate) or
+        False (nothing targeted)
+        """
+        frame = self.background.copy()
+        taken = []
+        mob_boxes = self.place_names(frame, names, MOB_NAME_COLOR, taken)
+        pet_boxes = self.place_names(frame, pets, PET_NAME_COLOR, taken)
+        if nameplate is not False:
+            self.draw_nameplate(frame, nameplate, mob_health)
+        self.draw_player_health(frame, player_health)
+
+        truth = {
+            'mob_names': mob_boxes,
+            'pet_names': pet_boxes,
+            'nameplate': nameplate,
+            'mob_alive': nameplate is not False and mob_health > 0,
+            'player_dead': player_health <= 0,
+        }
+        return frame, truth
+
+
+def match_boxes(found, expected, min_iou=0.3):
+    """Number of expected boxes overlapped (IoU >= min_iou) by a found box"""
+    matched = 0
+    for ex, ey, ew, eh in expected:
+        for fx, fy, fw, fh in found:
+            ix = max(0, min(ex + ew, fx + fw) - max(ex, fx))
+            iy = max(0, min(ey + eh, fy + fh) - max(ey, fy))
+            inter = ix * iy
+            if inter and inter / (ew * eh + fw * fh - inter) >= min_iou:
+                matched += 1
+                break
+    return matched
@@ -0,0 +1,163 @@
+"""
+Training: floating-name pet pre-classifier from the self-labelled dataset
+
+Loads every chunk DatasetRecorder wrote under DATASET_DIR (floating-name
+crops labeled by the click outcome), fits the logistic model used by
+FloatingNameClassifier and reports precision/recall of the drop decision
+(pet probability >= PET_DROP_PROBABILITY) on a held-out split, next to the
+built-in weights. Timeouts carry no label and are left out; mob and dead
+samples are "not a pet".
+
+Features are recomputed from the stored crops, so chunks recorded before a
+feature change are still usable.
+
+Names the live filter would have dropped are only in the data when the bot
+clicked them anyway (PET_EXPLORE_RATE); their outcomes give the live
+filter's false-drop rate.
+
+Usage (from the repo root):
+    python bench/train_pet_classifier.py [--dataset datasets] [--output models/pet_classifier.npz] [--dry-run]
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from common import REPO_ROOT, get_bench_logger
+
+from mob_hunter import Config, FloatingNameClassifier
+
+
+def load_dataset(dataset_dir, classifier):
+    """(features, is_pet, session, explored per sample) from every chunk with a usable label"""
+    features, labels, sessions, explored = [], [], [], []
+    for path in sorted(glob.glob(os.path.join(dataset_dir, '*', 'chunk_*.npz'))):
+        try:
+            chunk = np.load(path)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        session = os.path.basename(os.path.dirname(path))
+        # Chunks from before exploration have no flags - nothing in them was explored
+        chunk_explored = chunk['explored'] if 'explored' in chunk.files else np.zeros(len(chunk['outcomes']), bool)
+        for crop, (h, w), outcome, was_explored in zip(chunk['crops'], chunk['sizes'], chunk['outcomes'],
+                                                       chunk_explored):
+            if outcome == 'timeout':
+                continue
+            features.append(classifier.extract_features(crop[:h, :w]))
+            labels.append(outcome == 'pet')
+            sessions.append(session)
+            explored.append(bool(was_explored))
+    if not features:
+        return None, None, None, None
+    return np.stack(features), np.array(labels), np.array(sessions), np.array(explored)
+
+
+def split_by_session(sessions, holdout):
+    """Train/test masks - whole sessions are held out so frames don't leak across the split"""
+    names = sorted(set(sessions))
+    if len(names) < 2:
+        # Single session: hold out its last samples instead
+        test = np.zeros(len(sessions), dtype=bool)
+        test[int(len(sessions) * (1 - holdout)):] = True
+        return ~test, test
+    test_names = names[-max(1, int(round(len(names) * holdout))):]
+    test = np.isin(sessions, test_names)
+    return ~test, test
+
+
+def train_logistic(X, y, epochs=2000, learning_rate=0.5, l2=1e-3):
+    """Batch gradient descent on the logistic loss (pets are the positive class)"""
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale < 1e-6] = 1.0
+    Xn = (X - mean) / scale
+
+    # Balance classes - pets are usually the minority
+    positive = max(y.mean(), 1e-6)
+    sample_weight = np.where(y, 0.5 / positive, 0.5 / max(1 - positive, 1e-6))
+
+    weights = np.zeros(X.shape[1])
+    bias = 0.0
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(Xn @ weights + bias)))
+        error = (p - y) * sample_weight
+        weights -= learning_rate * (Xn.T @ error / len(y) + l2 * weights)
+        bias -= learning_rate * error.mean()
+    return weights.astype(np.float32), float(bias), mean.astype(np.float32), scale.astype(np.float32)
+
+
+def report(name, classifier, X, y):
+    """Precision/recall of the drop decision + accuracy at 0.5"""
+    probabilities = np.array([classifier.predict(features) for features in X])
+    dropped = probabilities >= Config.PET_DROP_PROBABILITY
+    true_drops = np.count_nonzero(dropped & y)
+    precision = true_drops / max(np.count_nonzero(dropped), 1)
+    recall = true_drops / max(np.count_nonzero(y), 1)
+    accuracy = np.mean((probabilities >= 0.5) == y)
+    lost_mobs = np.count_nonzero(dropped & ~y)
+    print(f"  {name:>10} | {accuracy * 100:>7.1f}% | {precision * 100:>8.1f}% | {recall * 100:>7.1f}% | {lost_mobs:>9}")
+    return precision, lost_mobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the floating-name pet pre-classifier")
+    parser.add_argument('--dataset', default=os.path.join(REPO_ROOT, Config.DATASET_DIR))
+    parser.add_argument('--output', default=os.path.join(REPO_ROOT, Config.PET_MODEL_PATH))
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of sessions held out for testing")
+    parser.add_argument('--dry-run', action='store_true', help="Evaluate only, don't write the model")
+    args = parser.parse_args()
+
+    logger = get_bench_logger()
+    builtin = FloatingNameClassifier(logger)
+    builtin.weights = FloatingNameClassifier.DEFAULT_WEIGHTS
+    builtin.bias = FloatingNameClassifier.DEFAULT_BIAS
+    builtin.mean = np.zeros(len(FloatingNameClassifier.FEATURES), dtype=np.float32)
+    builtin.scale = np.ones(len(FloatingNameClassifier.FEATURES), dtype=np.float32)
+
+    X, y, sessions, explored = load_dataset(args.dataset, builtin)
+    if X is None:
+        print(f"No labeled samples under {args.dataset} (run the bot with DATASET_ENABLED)")
+        return
+    train, test = split_by_session(sessions, args.holdout)
+    print(f"Samples: {len(y)} ({np.count_nonzero(y)} pets) from {len(set(sessions))} sessions")
+    print(f"Train: {np.count_nonzero(train)}  Test: {np.count_nonzero(test)}")
+    if explored.any():
+        false_drops = np.count_nonzero(explored & ~y)
+        print(f"Explored (live filter would drop): {np.count_nonzero(explored)}, "
+              f"{false_drops} were mobs ({false_drops / np.count_nonzero(explored) * 100:.1f}% false drops)")
+    if np.count_nonzero(y[train]) == 0 or np.count_nonzero(~y[train]) == 0:
+        print("Training split needs both pets and mobs - record more sessions")
+        return
+
+    trained = FloatingNameClassifier(logger)
+    trained.weights, trained.bias, trained.mean, trained.scale = train_logistic(X[train], y[train])
+
+    print(f"\nTest split (drop at p >= {Config.PET_DROP_PROBABILITY}):")
+    print(f"  {'model':>10} | {'accuracy':>8} | {'drop prec':>9} | {'recall':>7} | {'lost mobs':>9}")
+    print("  " + "-" * 56)
+    report("built-in", builtin, X[test], y[test])
+    _, lost_mobs = report("trained", trained, X[test], y[test])
+
+    for name, weight in zip(FloatingNameClassifier.FEATURES, trained.weights):
+        print(f"    {name:>16}: {weight:+.3f}")
+
+    if args.dry_run:
+        return
+    if lost_mobs:
+        print(f"\n!! Trained model would drop {lost_mobs} real mobs on the test split - check before using it")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    np.savez(args.output,
+             features=np.array(FloatingNameClassifier.FEATURES),
+             weights=trained.weights,
+             bias=np.float32(trained.bias),
+             mean=trained.mean,
+             scale=trained.scale)
+    print(f"\nModel written to {args.output} (loaded at startup from Config.PET_MODEL_PATH)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,21 +11,51 @@ import cv2
 import numpy as np
 import time
 import logging
+import logging.handlers
+import json
 import os
+import glob
 import random
 from datetime import datetime
 from mss import mss
-import pyautogui
 import threading
 import traceback
 import ctypes
-import win32gui
-import win32con
-import win32api
-from pynput import keyboard
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from multiprocessing import shared_memory
+import queue
+import heapq
+import difflib
+from collections import OrderedDict
+from collections import deque
+
+# Input and window APIs - the bot needs them, but the CV stages must stay
+# importable without them (session replay and benchmarks on Linux)
+try:
+    import pyautogui
+except Exception:  # Not installed, or no display to attach to
+    pyautogui = None
+try:
+    import win32gui
+    import win32con
+    import win32api
+except ImportError:
+    win32gui = win32con = win32api = None
+try:
+    from pynput import keyboard
+except Exception:  # Not installed, or no input backend
+    keyboard = None
+
+# Optional: mob name OCR (needs the Tesseract binary as well)
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
 
 # Disable PyAutoGUI fail-safe
-pyautogui.FAILSAFE = False
+if pyautogui is not None:
+    pyautogui.FAILSAFE = False
 
 # Global keyboard state flags (thread-safe)
 _capslock_toggled = False
@@ -79,10 +109,15 @@ def start_keyboard_listener():
 
 class Config:
     # Screen settings
-    SCREEN_WIDTH = 1920
+    SCREEN_WIDTH = 1920  # Game client resolution (captured size)
     SCREEN_HEIGHT = 1080
     SCREEN_REGION = {'top': 0, 'left': 0, 'width': SCREEN_WIDTH, 'height': SCREEN_HEIGHT}
+    # Layout all pixel settings below are written for - ScreenGeometry scales them to the captured size
+    BASE_WIDTH = 1920
+    BASE_HEIGHT = 1080
     NAMEPLATE_REGION = (660, 10, 600, 100)  # (x, y, w, h) - top-middle
+    CALIBRATION_PATH = 'calibration.json'  # ROI/color profile from bench/calibrate.py (loaded at startup if present)
+    PROFILE_PATH = 'profile.json'  # Settings overrides {"config": {KEY: value}} - loaded at startup, reloaded when saved
     
     # Detection boundaries (ignore UI only)
     IGNORE_TOP = 120
@@ -97,21 +132,58 @@ class Config:
     MAX_NAME_HEIGHT = 35
     MIN_ASPECT_RATIO = 1.5
     MAX_ASPECT_RATIO = 20
+    NAME_THRESHOLDS = [200, 180, 160]  # Grayscale thresholds for different text brightness
+    NAME_MERGE_DISTANCE = 20  # Detections closer than this (x and y) are the same name
+    CLICK_OFFSET_Y = 25  # Click this far below a floating name (the mob's body)
+
+    # Floating-name pet pre-classifier (skip clicks on likely pets)
+    PET_FILTER_ENABLED = True
+    PET_MODEL_PATH = 'models/pet_classifier.npz'  # Trained weights (built-in weights if missing)
+    PET_DROP_PROBABILITY = 0.9  # Don't click names at or above this pet probability
+    PET_EXPLORE_RATE = 0.05  # Share of would-be-dropped names clicked anyway - labels the filter's false drops
+
+    # Self-labelling dataset (floating-name crops + click outcomes, train with bench/train_pet_classifier.py)
+    DATASET_ENABLED = True
+    DATASET_DIR = 'datasets'  # One folder of .npz chunks per session
+    DATASET_CHUNK_SIZE = 200  # Samples per chunk file
+    DATASET_MAX_BYTES = 200 * 1024 * 1024  # Disk budget for all sessions (oldest chunks deleted first)
+
+    # Parallel CV settings (OpenCV releases the GIL, so CV stages can overlap)
+    CV_WORKERS = 3  # Thread pool size for CV stages (0 or 1 = inline) - tune with bench/bench_cv_workers.py
+
+    # Process-pool detection (shared-memory frames, for multi-window / high FPS)
+    DETECTION_PROCESSES = 0  # Worker processes for detection (0 = detect in-process)
+    DETECTION_RING_SLOTS = 4  # Shared-memory frame slots (max frames in flight)
     
     # Combat settings
+    MOB_HEALTH_BAR_REGION = (80, 30, 440, 15)  # (x, y, w, h) within NAMEPLATE_REGION - mob health bar only
+    # Mob health colors: yellow/orange bar, red at low health (hue wraps at 180)
+    MOB_HEALTH_HSV_RANGES = [((15, 150, 150), (35, 255, 255)), ((0, 150, 100), (10, 255, 255)),
+                             ((170, 150, 100), (180, 255, 255))]
     RED_PIXEL_THRESHOLD = 50   # Pixels needed to consider mob "alive"
     HEALTH_CHANGE_THRESHOLD = 50  # Minimum health decrease to confirm hitting mob (anti-stuck)
     MAX_TARGETS_PER_CYCLE = 3  # Max verifications per cycle
     CYCLE_DELAY = 0.4          # Seconds between cycles
     NAMEPLATE_TIMEOUT = 1.0    # Nameplate wait time
-    CLICK_DELAY = 0.25         # Delay after clicking
-    HEALTH_CHECK_INTERVAL = 1.0  # Check health every 1 second during combat
+    CLICK_DELAY = 0.25         # Max wait for the nameplate to change after clicking (read anyway after)
+    NAMEPLATE_POLL_INTERVAL = 0.05  # Seconds between nameplate captures while verifying
+    NAMEPLATE_CHANGE_THRESHOLD = 8  # Mean abs difference of the name strip = nameplate switched to the clicked target
     
     # Cache settings
     POSITION_CACHE_DURATION = 2.5
     POSITION_PROXIMITY = 35
+
+    # Target scoring (expected kills per second of each candidate, best verified first)
+    TARGET_MIN_SCORE = 0.05  # Stop verifying when the best candidate is below this (kills/s)
+    TARGET_TRAVEL_SPEED = 400  # Screen px per second the character covers walking to a target
+    TARGET_AREA_GRID = (8, 6)  # Columns x rows for the per-area click success rates
+    TARGET_AREA_PRIOR = (1, 2)  # (successes, clicks) every area starts with (50%)
+    TARGET_AREA_HALF_LIFE = 60  # Seconds for an area's click history to fade halfway back to the prior (the view moves)
+    TARGET_AREA_MIN_RATE = 0.1  # Success rate floor - no area drops below TARGET_MIN_SCORE for good (exploration)
+    TARGET_NEW_TRACK_FACTOR = 0.8  # Success odds of a name seen this cycle only (may be a flicker)
+    TARGET_CLASS_BONUS = 0.25  # Extra kill value per class priority step above General
     
-    # Priority system (only used for tie-breaking at same distance)
+    # Priority system (class value in target scoring)
     # Valid classifications: General, Champion, Giant, Unique
     # No classification = Pet (filtered out)
     CLASS_PRIORITIES = {
@@ -121,21 +193,85 @@ class Config:
         'General': 4,   # No special color but has classification
     }
     
-    # Combat rotation
-    SKILL_KEYS = ['1', '2', '3', '4']
-    SKILL_ANIMATION_TIME = 0.6  # Time for skill animation
+    # Class icon classifier (template match of icon + class text inside the nameplate)
+    CLASS_TEMPLATE_DIR = 'templates/classes'  # <Class>.png crops, e.g. General.png - eval with bench/eval_class_classifier.py
+    CLASS_ICON_SEARCH = (255, 39, 80, 40)  # (x, y, w, h) within NAMEPLATE_REGION - small window around the class row
+    CLASS_MATCH_THRESHOLD = 0.7  # Normalized correlation needed to accept a class template
+    CLASS_ROW_TEMPLATE = 'level_row.png'  # "Lv" start of the class row - only mobs have it (pets/players don't)
+    CLASS_ROW_SEARCH = (178, 42, 40, 36)  # (x, y, w, h) within NAMEPLATE_REGION
+    # Color heuristic fallback (no templates): class -> HSV ranges [((h, s, v) lower, (h, s, v) upper), ...]
+    CLASS_COLOR_RANGES = {
+        'Unique': [((0, 100, 100), (10, 255, 255)), ((170, 100, 100), (180, 255, 255))],  # Red
+        'Champion': [((130, 100, 100), (160, 255, 255))],  # Purple
+        'Giant': [((20, 100, 100), (30, 255, 255))],  # Yellow/gold
+    }
+    CLASS_COLOR_MIN_PIXELS = {'Unique': 100, 'Champion': 50, 'Giant': 50}  # More nameplate pixels than this = class
+
+    # Mob name recognition (OCR of the nameplate name strip, cached by perceptual hash)
+    NAME_OCR_ENABLED = True  # Needs pytesseract + Tesseract installed (names are 'Mob' otherwise)
+    TESSERACT_CMD = None  # Path to tesseract.exe if it is not on PATH
+    NAME_STRIP_REGION = (220, 4, 170, 18)  # (x, y, w, h) within NAMEPLATE_REGION - mob name box
+    NAME_TEXT_THRESHOLD = 110  # Brightest-channel value that counts as name text
+    NAME_HASH_SCALE = 4  # Text mask downscale for the name hash (170x18 strip -> 168 bits)
+    NAME_HASH_MAX_DISTANCE = 4  # Hash bits that may differ for a cache hit (same name <= 1, different names >= 9)
+    NAME_CACHE_SIZE = 256  # Cached name strips (least recently used dropped)
+    MOB_NAME_ALLOWLIST = []  # Only attack these mobs (empty = all), e.g. ['Tomb Soldier']
+    MOB_NAME_DENYLIST = []  # Never attack these mobs, e.g. ['Tomb Archer']
+    MOB_NAME_MATCH_RATIO = 0.8  # Fuzzy match ratio for list entries (tolerates OCR slips)
 
-    # Buffer rotation settings
+    # Combat rotation
+    SKILL_KEYS = ['1', '2', '3', '4']  # Skill bar order (slot 0, 1, ...)
+    SKILL_ANIMATION_TIME = 0.6  # Time for skill animation (cast time of skills missing from SKILLS)
+    # Cooldown-aware skill scheduling: key -> (cooldown_s, cast_time_s, value)
+    # The highest-value ready skill is cast next; mob health is checked after every cast.
+    # Defaults reproduce the fixed 1-2-3-4 rotation - set real cooldowns from the skill tooltips.
+    SKILLS = {
+        '1': (4.0, 0.6, 4),
+        '2': (4.0, 0.6, 3),
+        '3': (4.0, 0.6, 2),
+        '4': (4.0, 0.6, 1),
+    }
+    COMBAT_ROTATION_TIME = 4.0  # Seconds of casting before judging whether the mob took damage
+    SKILL_MAX_WAIT = 0.5  # Longest wait for a cooldown before re-checking mob health
+    # Optional skill-bar readiness check (cooldown overlay darkens the icon)
+    SKILL_BAR_CHECK_ENABLED = False
+    SKILL_BAR_REGION = (735, 1030, 450, 40)  # (x, y, w, h) - skill bar slots for SKILL_KEYS
+    SKILL_SLOT_WIDTH = 45  # Pixels per skill bar slot
+    SKILL_READY_BRIGHTNESS = 90  # Mean HSV value of a slot icon below this = on cooldown
+
+    # Buffer settings (only expiring buffs are refreshed)
     BUFFER_ENABLED = True
-    BUFFER_INTERVAL = 120  # Seconds (2 minutes)
-    BUFFER_SEQUENCE = [
-        ('F2', 0),      # (key, delay_after_in_seconds)
-        ('1', 0),
-        ('2', 1.0),
-        ('3', 1.0),
-        ('4', 1.0),
-        ('F1', 0),
-    ]
+    BUFFER_BAR_KEY = 'F2'  # Switch to the buff skill bar
+    BUFFER_RETURN_KEY = 'F1'  # Switch back to the attack skill bar
+    BUFFS = {
+        '1': (120, 0.1),  # key on the buff bar -> (duration_seconds, cast_time_seconds)
+        '2': (120, 1.0),
+        '3': (120, 1.0),
+        '4': (120, 1.0),
+    }
+    BUFF_REFRESH_MARGIN = 20  # In idle windows (after a kill) refresh buffs expiring within this many seconds
+    BUFF_FORCE_MARGIN = 3  # Outside idle windows refresh only buffs this close to expiring
+
+    # Buff icon detection (verify buff state from the buff bar instead of trusting timers)
+    BUFF_ICON_CHECK_ENABLED = True  # Needs templates in BUFF_TEMPLATE_DIR (skipped otherwise)
+    BUFF_TEMPLATE_DIR = 'templates/buffs'  # <buff key>.png icons cropped from a screenshot, e.g. 2.png
+    BUFF_BAR_REGION = (1500, 10, 400, 80)  # (x, y, w, h) - active buff icons (top-right)
+    BUFF_TEMPLATE_SCALES = [0.9, 1.0, 1.1]  # Template bank scales (UI scaling tolerance)
+    BUFF_MATCH_THRESHOLD = 0.75  # Normalized correlation for an icon to count as present
+    BUFF_CHECK_INTERVAL = 2.0  # Seconds between buff bar reads
+    BUFF_UNKNOWN_REMAINING = 10  # Assumed seconds left for a visible buff we have no timer for
+    BUFF_RETRY_DELAY = 15  # Seconds before recasting a buff whose icon did not show up after casting
+
+    # Action executor (key sequences as (key, hold_seconds, delay_after) steps)
+    # Higher priority preempts lower (e.g. retreat interrupts combat or buffering)
+    ACTION_PRIORITIES = {
+        'buffer': 0,
+        'recovery': 1,
+        'combat': 1,
+        'potion': 1,  # Runs between casts / recovery moves without aborting them
+        'retreat': 2,
+        'revive': 3,
+    }
 
     # Overlay settings
     SHOW_OVERLAY = True
@@ -144,12 +280,63 @@ class Config:
     # Death detection settings
     DEATH_CHECK_ENABLED = True  # Set to False to disable death detection
     PLAYER_HEALTH_BAR_REGION = (67, 36, 88, 8)  # (x, y, w, h) - Player health bar in top-left nameplate
-    DEATH_REVIVE_DELAY = 2.0  # Seconds to wait before reviving
+    PLAYER_HEALTH_HSV_RANGES = [((0, 100, 100), (10, 255, 255)), ((170, 100, 100), (180, 255, 255))]  # Red
+    DEATH_REVIVE_DELAY = 2.0  # Seconds to wait for the death popup to stabilize before reviving
+    REVIVE_SEQUENCE = [  # Runs after the DEATH_REVIVE_DELAY wait
+        ('f4', 0, 0.5),                 # Open revive menu
+        ('0', 0, 5.0),                  # Resurrect at specified point, wait for respawn
+    ]
     DEATH_COOLDOWN = 10.0  # Seconds cooldown after revive (prevents repeated detection)
     MIN_HEALTH_RED_PIXELS = 50  # Minimum red pixels to consider player alive
 
+    # Death watchdog (fast background loop on the player HP ROI only)
+    DEATH_WATCHDOG_ENABLED = True  # Interrupt combat/buffer/recovery as soon as the player dies
+    DEATH_WATCHDOG_HZ = 20  # Player HP samples per second (88x8 ROI - nearly free)
+    DEATH_WATCHDOG_CONFIRM_SAMPLES = 2  # Consecutive empty-bar samples before signalling death
+
+    # Player HP tracking (fraction history, loss rate, time-to-death)
+    HP_HISTORY_SIZE = 200  # Samples kept in the HP ring buffer (10s at 20 Hz)
+    HP_RATE_WINDOW = 1.5  # Seconds of history used to estimate HP loss rate
+    HP_LOW_FRACTION = 0.35  # Alert subscribers below this HP fraction
+    HP_TTD_THRESHOLD = 3.0  # Alert subscribers when estimated time-to-death drops below this (s)
+    HP_ALERT_COOLDOWN = 1.0  # Minimum seconds between low-health alerts
+    HP_RESPONSE_ENABLED = True  # Combat/buffer react to low-health alerts
+    HP_POTION_KEY = None  # HP potion hotkey - set to the key of the potion slot (e.g. '8', or "HP_POTION_KEY": "8" in the profile) to drink on low HP; None = no potion
+    HP_POTION_COOLDOWN = 1.0  # Seconds between potion presses
+    HP_RETREAT_TTD = 1.5  # Retreat from combat if time-to-death drops below this (s)
+    HP_RETREAT_SEQUENCE = []  # Retreat keys as (key, hold_seconds), e.g. [('down', 1.5)] - empty = no retreat
+    HP_BUFFER_DEFER = 5.0  # Seconds to postpone a due buffer sequence after a low-health alert
+
+    # Multi-client settings (one process driving several game windows)
+    MULTI_INSTANCE_ENABLED = False  # Drive every window in INSTANCE_WINDOWS from this process
+    INSTANCE_WINDOWS = []  # Game window titles, e.g. ['SRO_Client_1', 'SRO_Client_2']
+    FOCUS_SWITCH_DELAY = 0.05  # Seconds to let a window take focus before sending input
+
+    # Vision-guided stuck recovery (scan headings with the detector before walking)
+    VISION_RECOVERY_ENABLED = True
+    RECOVERY_SCAN_HEADINGS = 6  # Headings sampled per scan (evenly spaced over a full turn)
+    RECOVERY_FULL_TURN_TIME = 3.0  # Seconds of holding left/right for a 360° turn
+    RECOVERY_SETTLE_TIME = 0.15  # Wait after turning before capturing a heading
+    RECOVERY_DISTANCE_SCALE = 400  # Candidate weight halves at this distance (px) from center
+    RECOVERY_GOOD_SCORE = 2.0  # Stop scanning once a heading scores this high
+    RECOVERY_NEAR_DISTANCE = 250  # Best candidates this close = no need to walk, just turn
+    RECOVERY_CURRENT_HEADING_WEIGHT = 0.3  # Discount for the view we just got stuck in
+
+    # Motion detection (is the character actually moving while movement keys are held?)
+    MOTION_CHECK_ENABLED = True
+    MOTION_REGION = (480, 270, 960, 540)  # (x, y, w, h) - central world view, no UI
+    MOTION_DOWNSCALE = 4  # Downscale factor before phase correlation
+    MOTION_SAMPLE_INTERVAL = 0.1  # Seconds between motion samples while a move key is held
+    MOTION_MIN_SHIFT = 1.0  # Global shift (downscaled px) that counts as movement (sub-pixel peaks are noise)
+    MOTION_MIN_DIFF = 3.0  # Mean abs frame difference (0-255) that counts as movement
+    MOTION_STUCK_TIME = 1.0  # No motion for this long with 'up' held = blocked by terrain
+    APPROACH_STUCK_TIME = 2.5  # No motion and no damage for this long after engaging = can't reach the mob
+
     # Debug & Logging
     DEBUG_MODE = True  # Enable debug logging
+    LOG_BATCH_SIZE = 50  # Log lines buffered before a file write (errors flush immediately)
+    LOG_FLUSH_INTERVAL = 2.0  # Max seconds a buffered line waits for its file write
+    CYCLE_RECORDS_ENABLED = True  # One JSON line per cycle in cycles.jsonl (timings, targets, outcome)
 
     # Screenshot settings (selective capture for debugging)
     SAVE_DEATH_SCREENSHOTS = True       # Capture screenshot when death detected
@@ -157,23 +344,479 @@ class Config:
     SAVE_PERIODIC_SCREENSHOTS = True    # Random screenshots for analysis
     MAX_PERIODIC_SCREENSHOTS = 10       # Maximum random screenshots per session
     SCREENSHOT_PROBABILITY = 0.15       # 15% chance per cycle (ensures ~10 screenshots in typical 60-70 cycle session)
+    SCREENSHOT_FORMAT = 'png'           # 'png' (lossless - replay benches use these), 'jpg' or 'webp'
+    SCREENSHOT_QUALITY = 90             # JPEG/WebP quality (0-100)
+    SCREENSHOT_PNG_COMPRESSION = 3      # PNG compression level (0-9, higher = smaller but slower)
+    SCREENSHOT_QUEUE_SIZE = 8           # Frames waiting for the writer thread (more are dropped)
+    SCREENSHOT_MAX_BYTES = 200 * 1024 * 1024  # Disk budget per session (screenshots over it are skipped)
+    SCREENSHOT_REGIONS = {}             # event type -> (x, y, w, h) crop, e.g. {'CYCLE': (480, 270, 960, 540)}
+
+    # Black box recorder (recent frames + cycle records in memory, saved on death/error/stuck)
+    BLACKBOX_ENABLED = True
+    BLACKBOX_SECONDS = 30               # History kept in memory
+    BLACKBOX_FPS = 4                    # Frames sampled per second on the recorder's own thread (fights included)
+    BLACKBOX_SCALE = 0.25               # Frame downscale (1920x1080 -> 480x270)
+    BLACKBOX_MAX_FRAMES = 120           # Memory cap (~47 MB at 480x270)
+    BLACKBOX_MAX_DUMPS = 20             # Dumps per session
+    BLACKBOX_RESERVED_DUMPS = 5         # Share of the dumps (and bytes) kept for death and error dumps
+    BLACKBOX_MAX_BYTES = 300 * 1024 * 1024  # Disk budget per session (dumps over it are skipped)
+
+
+# ============================================================================
+# CALIBRATION PROFILE
+# ============================================================================
+
+# Config keys a calibration profile may set (everything tied to the client's UI layout and colors)
+CALIBRATION_KEYS = ('NAMEPLATE_REGION', 'MOB_HEALTH_BAR_REGION', 'PLAYER_HEALTH_BAR_REGION',
+                    'CLASS_COLOR_RANGES', 'CLASS_COLOR_MIN_PIXELS', 'MOB_HEALTH_HSV_RANGES',
+                    'PLAYER_HEALTH_HSV_RANGES', 'RED_PIXEL_THRESHOLD', 'MIN_HEALTH_RED_PIXELS')
+
+
+def _as_tuples(value):
+    """JSON lists -> tuples (regions and HSV bounds), dicts kept"""
+    if isinstance(value, list):
+        return tuple(_as_tuples(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _as_tuples(item) for key, item in value.items()}
+    return value
+
+
+def load_calibration(logger, path=None):
+    """
+    Apply a calibration profile (written by bench/calibrate.py) to Config
+    Must run before the components are built - they precompute their masks.
+    Returns the keys that were set.
+    """
+    path = path or Config.CALIBRATION_PATH
+    if not path or not os.path.exists(path):
+        return []
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            profile = json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not load calibration profile {path}: {e}")
+        return []
+
+    applied = []
+    for key, value in profile.get('config', {}).items():
+        if key not in CALIBRATION_KEYS:
+            logger.warning(f"Calibration profile {path}: unknown key {key} ignored")
+            continue
+        setattr(Config, key, _as_tuples(value))
+        applied.append(key)
+
+    logger.info(f"📐 Calibration profile loaded from {path} ({len(applied)} settings)")
+    return applied
+
+
+class ColorMask:
+    """
+    Union of HSV ranges, with the bound arrays built once
+
+    The color heuristics run several times per cycle on the same ranges,
+    so the lower/upper arrays are made when the component is built instead
+    of on every call.
+    """
+
+    def __init__(self, ranges):
+        self.bounds = [(np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+                       for lower, upper in ranges]
+
+    def mask(self, hsv):
+        """Binary mask of the pixels inside any range"""
+        mask = cv2.inRange(hsv, *self.bounds[0])
+        for lower, upper in self.bounds[1:]:
+            cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper), dst=mask)
+        return mask
+
+    def count(self, hsv):
+        """Number of pixels inside any range"""
+        return cv2.countNonZero(self.mask(hsv))
+
+
+# ============================================================================
+# SETTINGS PROFILE (HOT RELOAD)
+# ============================================================================
+
+# Config as written in this file - profile values must have the same shape
+CONFIG_DEFAULTS = {key: value for key, value in vars(Config).items() if key.isupper()}
+
+# Read only while the bot starts up - changing them in a running profile needs a restart
+RESTART_KEYS = frozenset((
+    'SCREEN_WIDTH', 'SCREEN_HEIGHT', 'SCREEN_REGION', 'BASE_WIDTH', 'BASE_HEIGHT', 'CALIBRATION_PATH',
+    'PROFILE_PATH', 'PET_MODEL_PATH', 'DATASET_ENABLED', 'DATASET_DIR', 'CV_WORKERS', 'DETECTION_PROCESSES',
+    'DETECTION_RING_SLOTS', 'TARGET_AREA_GRID', 'TARGET_AREA_PRIOR', 'CLASS_TEMPLATE_DIR', 'CLASS_ROW_TEMPLATE',
+    'NAME_OCR_ENABLED', 'TESSERACT_CMD', 'BUFF_ICON_CHECK_ENABLED', 'SHOW_OVERLAY', 'DEATH_WATCHDOG_ENABLED',
+    'DEATH_WATCHDOG_HZ', 'HP_HISTORY_SIZE', 'HP_RESPONSE_ENABLED', 'MULTI_INSTANCE_ENABLED', 'INSTANCE_WINDOWS',
+    'DEBUG_MODE', 'LOG_BATCH_SIZE', 'CYCLE_RECORDS_ENABLED', 'SCREENSHOT_FORMAT', 'SCREENSHOT_QUALITY',
+    'SCREENSHOT_PNG_COMPRESSION', 'SCREENSHOT_QUEUE_SIZE', 'BLACKBOX_ENABLED', 'BLACKBOX_MAX_FRAMES',
+))
+
+# Inputs of what the components precompute - a reload rebuilds only what depends on a changed key
+GEOMETRY_KEYS = frozenset((
+    'NAMEPLATE_REGION', 'PLAYER_HEALTH_BAR_REGION', 'MOTION_REGION', 'SKILL_BAR_REGION', 'SKILL_SLOT_WIDTH',
+    'BUFF_BAR_REGION', 'SCREENSHOT_REGIONS', 'MOB_HEALTH_BAR_REGION', 'NAME_STRIP_REGION', 'CLASS_ICON_SEARCH',
+    'CLASS_ROW_SEARCH', 'IGNORE_TOP', 'IGNORE_BOTTOM', 'IGNORE_LEFT', 'IGNORE_RIGHT', 'MIN_NAME_WIDTH',
+    'MAX_NAME_WIDTH', 'MIN_NAME_HEIGHT', 'MAX_NAME_HEIGHT', 'NAME_MERGE_DISTANCE', 'CLICK_OFFSET_Y',
+    'POSITION_PROXIMITY', 'TARGET_TRAVEL_SPEED', 'RECOVERY_DISTANCE_SCALE', 'RECOVERY_NEAR_DISTANCE',
+    'RED_PIXEL_THRESHOLD', 'HEALTH_CHANGE_THRESHOLD', 'MIN_HEALTH_RED_PIXELS', 'CLASS_COLOR_MIN_PIXELS',
+))
+NAMEPLATE_MASK_KEYS = frozenset(('CLASS_COLOR_RANGES', 'CLASS_COLOR_MIN_PIXELS', 'CLASS_PRIORITIES',
+                                 'MOB_HEALTH_HSV_RANGES'))
+PLAYER_MASK_KEYS = frozenset(('PLAYER_HEALTH_HSV_RANGES',))
+BUFF_TEMPLATE_KEYS = frozenset(('BUFFS', 'BUFF_TEMPLATE_DIR', 'BUFF_TEMPLATE_SCALES'))
+
+# Divisors, counts and lists the bot indexes into - zero (or empty) would stop the bot mid-session
+POSITIVE_KEYS = frozenset((
+    'BASE_WIDTH', 'BASE_HEIGHT', 'MAX_ASPECT_RATIO', 'MAX_TARGETS_PER_CYCLE', 'TARGET_TRAVEL_SPEED',
+    'NAME_HASH_SCALE', 'DEATH_WATCHDOG_HZ', 'OVERLAY_UPDATE_FPS', 'MOTION_DOWNSCALE', 'RECOVERY_SCAN_HEADINGS',
+    'RECOVERY_DISTANCE_SCALE', 'TARGET_AREA_HALF_LIFE', 'BLACKBOX_FPS', 'BLACKBOX_SCALE', 'SKILL_KEYS',
+    'NAME_THRESHOLDS',
+))
+
+# Shape of settings whose default can't show it (None, empty, or ints where any number works)
+SETTING_SHAPES = {
+    'HP_POTION_KEY': '',  # Hotkey or None
+    'TESSERACT_CMD': '',  # Path or None
+    'HP_RETREAT_SEQUENCE': [('', 0.0)],  # (key, hold_seconds)
+    'MOB_NAME_ALLOWLIST': [''],
+    'MOB_NAME_DENYLIST': [''],
+    'INSTANCE_WINDOWS': [''],
+    'SCREENSHOT_REGIONS': {'': (0, 0, 0, 0)},  # event type -> (x, y, w, h)
+    'BUFFS': {'': (0.0, 0.0)},  # key -> (duration_seconds, cast_time_seconds)
+}
+
+# Lists of names and keys - items can't be None
+STRING_LIST_KEYS = frozenset(('SKILL_KEYS', 'MOB_NAME_ALLOWLIST', 'MOB_NAME_DENYLIST', 'INSTANCE_WINDOWS'))
+
+
+def _conform(value, default, name):
+    """
+    Profile (JSON) value in the shape of the Config default
+    Lists become tuples where Config has tuples; numbers keep their int/float
+    kind and can't be negative. None is accepted where Config allows a path or key to be unset.
+    """
+    if value is None and (default is None or isinstance(default, str)):
+        return None
+    if default is None:
+        return _as_tuples(value)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}: expected true/false, got {value!r}")
+        return value
+    if isinstance(default, (int, float)):
+        if (isinstance(value, bool) or not isinstance(value, (int, float)) or
+                (isinstance(default, int) and not isinstance(value, int))):
+            raise ValueError(f"{name}: expected {type(default).__name__}, got {value!r}")
+        if value < 0:
+            raise ValueError(f"{name}: must not be negative, got {value}")
+        return float(value) if isinstance(default, float) else value
+    if isinstance(default, str):
+        if not isinstance(value, str):
+            raise ValueError(f"{name}: expected a string, got {value!r}")
+        return value
+    if isinstance(default, tuple):
+        if not isinstance(value, list) or len(value) != len(default):
+            raise ValueError(f"{name}: expected a list of {len(default)}, got {value!r}")
+        return tuple(_conform(item, item_default, f"{name}[{i}]")
+                     for i, (item, item_default) in enumerate(zip(value, default)))
+    if isinstance(default, list):
+        if not isinstance(value, list):
+            raise ValueError(f"{name}: expected a list, got {value!r}")
+        if not default:
+            return [_as_tuples(item) for item in value]
+        return [_conform(item, default[0], f"{name}[{i}]") for i, item in enumerate(value)]
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            raise ValueError(f"{name}: expected an object, got {value!r}")
+        if not default:
+            return _as_tuples(value)
+        sample = next(iter(default.values()))
+        return {key: _conform(item, default.get(key, sample), f"{name}.{key}") for key, item in value.items()}
+    return value
+
+
+def validate_setting(key, value):
+    """Profile value -> Config value (ValueError if the key is unknown or the value can't work)"""
+    if key not in CONFIG_DEFAULTS:
+        raise ValueError(f"unknown setting {key}")
+    value = _conform(value, SETTING_SHAPES.get(key, CONFIG_DEFAULTS[key]), key)
+
+    if key in POSITIVE_KEYS and (not value if isinstance(value, list) else value <= 0):
+        raise ValueError(f"{key}: must be above zero (or not empty), got {value}")
+    if key in STRING_LIST_KEYS and not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{key}: expected a list of strings, got {value!r}")
+    if key.endswith('_HSV_RANGES') or key == 'CLASS_COLOR_RANGES':
+        ranges = [r for class_ranges in value.values() for r in class_ranges] if isinstance(value, dict) else value
+        for lower, upper in ranges:
+            if not (all(low <= high <= 255 for low, high in zip(lower, upper)) and upper[0] <= 180):
+                raise ValueError(f"{key}: bad HSV range {lower}-{upper} (lower <= upper, hue 0-180, S/V 0-255)")
+    regions = value.values() if key == 'SCREENSHOT_REGIONS' else [value] if (
+        key.endswith(('_REGION', '_SEARCH')) and isinstance(value, tuple)) else []
+    for region in regions:
+        if not (region[2] and region[3]):
+            raise ValueError(f"{key}: region {region} has no width or height")
+    return value
+
+
+class SettingsProfile:
+    """
+    Config overrides from a JSON profile, reloaded while the bot runs
+
+    The profile ({"config": {KEY: value}}) is applied over Config at
+    startup. poll() - called between cycles - reloads it when the file was
+    saved, so thresholds, timings, skills and HSV ranges can be tuned
+    without a restart (session state, position cache and buff timers are
+    kept). The whole file is validated first and a bad value rejects it, so
+    a half-edited profile never reaches the running bot. A key removed from
+    the profile goes back to the value it had before. Callers rebuild what
+    depends on the returned keys (see GEOMETRY_KEYS etc.) and can put the
+    returned previous values back if that fails.
+    """
+
+    def __init__(self, logger, path=None):
+        self.logger = logger
+        self.path = path or Config.PROFILE_PATH
+        self.signature = None  # (mtime, size) of the last load
+        self.previous = {}  # key -> Config value before the profile set it
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """Reload if the profile was saved since the last load - returns {changed key: previous value}"""
+        signature = self.file_signature()
+        if signature is None or signature == self.signature:
+            return {}
+        return self.load()
+
+    def load(self, startup=False):
+        """Validate and apply the profile, returns {key: value before} for the keys whose value changed"""
+        self.signature = self.file_signature()
+        if not self.path or self.signature is None:
+            return {}
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                settings = json.load(f).get('config', {})
+            values = {key: validate_setting(key, value) for key, value in settings.items()}
+            # Every color-checked class needs a pixel threshold and a priority
+            ranges = values.get('CLASS_COLOR_RANGES', Config.CLASS_COLOR_RANGES)
+            for key in ('CLASS_COLOR_MIN_PIXELS', 'CLASS_PRIORITIES'):
+                missing = set(ranges) - set(values.get(key, getattr(Config, key)))
+                if missing:
+                    raise ValueError(f"CLASS_COLOR_RANGES: {', '.join(sorted(missing))} missing from {key}")
+        except Exception as e:
+            self.logger.warning(f"⚠️  Settings profile {self.path} rejected, settings unchanged: {e}")
+            return {}
+
+        if not startup:
+            pending = sorted(key for key in RESTART_KEYS & set(values) if values[key] != getattr(Config, key))
+            if pending:
+                self.logger.warning(f"⚠️  Settings profile: {', '.join(pending)} only apply after a restart")
+            values = {key: value for key, value in values.items() if key not in RESTART_KEYS}
+            # Keys dropped from the profile go back to what they were
+            for key in set(self.previous) - set(values) - RESTART_KEYS:
+                values[key] = self.previous.pop(key)
+
+        changed = {}
+        for key, value in values.items():
+            if key in settings:
+                self.previous.setdefault(key, getattr(Config, key))
+            if getattr(Config, key) != value:
+                changed[key] = getattr(Config, key)
+                setattr(Config, key, value)
+
+        if startup:
+            self.logger.info(f"📝 Settings profile loaded from {self.path} ({len(values)} settings)")
+        return changed
+
+
+def load_settings(logger):
+    """
+    Calibration profile, then settings profile, into Config
+    Runs once per process before anything reads Config (logging, capture
+    region, mode). Returns the SettingsProfile to poll() for hot reloads.
+    """
+    load_calibration(logger)
+    profile = SettingsProfile(logger)
+    profile.load(startup=True)
+    # SCREEN_REGION was built from the defaults when Config was defined - follow an overridden resolution
+    Config.SCREEN_REGION = {**Config.SCREEN_REGION, 'width': Config.SCREEN_WIDTH, 'height': Config.SCREEN_HEIGHT}
+    return profile
+
+
+# ============================================================================
+# SCREEN GEOMETRY
+# ============================================================================
+
+class ScreenGeometry:
+    """
+    Config pixel settings scaled to the captured size
+
+    ROIs, size filters, distances and pixel-count thresholds in Config are
+    written for the BASE_WIDTH x BASE_HEIGHT layout. One instance per
+    capture size computes the scaled values once (update() again after a
+    settings reload), and the components read them from here - a 1280x720 client then runs every CV stage on 44% of
+    the pixels. Regions and lengths scale per axis, distances by the mean
+    of both axes, pixel counts by the area. At the base size every value
+    equals Config.
+    """
+
+    def __init__(self, width=None, height=None):
+        self.width = width or Config.SCREEN_WIDTH
+        self.height = height or Config.SCREEN_HEIGHT
+        self.scale_x = self.width / Config.BASE_WIDTH
+        self.scale_y = self.height / Config.BASE_HEIGHT
+        self.scale = (self.scale_x + self.scale_y) / 2
+        self.center = (self.width // 2, self.height // 2)
+        # Joins the letters of a name - gaps stay 1-2 px when downscaled, so never narrower than at the base
+        self.name_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, self.x(3)), 1))
+        self.update()
+
+    def update(self):
+        """Scale the Config values (again after a settings reload - components read them from here)"""
+        # Screen ROIs
+        self.nameplate_region = self.region(Config.NAMEPLATE_REGION)
+        self.player_health_bar_region = self.region(Config.PLAYER_HEALTH_BAR_REGION)
+        self.motion_region = self.region(Config.MOTION_REGION)
+        self.skill_bar_region = self.region(Config.SKILL_BAR_REGION)
+        self.skill_slot_width = self.x(Config.SKILL_SLOT_WIDTH)
+        self.buff_bar_region = self.region(Config.BUFF_BAR_REGION)
+        self.screenshot_regions = {event: self.region(region) for event, region in Config.SCREENSHOT_REGIONS.items()}
+
+        # Regions within the nameplate crop
+        self.mob_health_bar_region = self.region(Config.MOB_HEALTH_BAR_REGION)
+        self.name_strip_region = self.region(Config.NAME_STRIP_REGION)
+        self.class_icon_search = self.region(Config.CLASS_ICON_SEARCH)
+        self.class_row_search = self.region(Config.CLASS_ROW_SEARCH)
+
+        # Floating name filters
+        self.ignore_top = self.y(Config.IGNORE_TOP)
+        self.ignore_bottom = self.y(Config.IGNORE_BOTTOM)
+        self.ignore_left = self.x(Config.IGNORE_LEFT)
+        self.ignore_right = self.x(Config.IGNORE_RIGHT)
+        self.min_name_width = self.x(Config.MIN_NAME_WIDTH)
+        self.max_name_width = self.x(Config.MAX_NAME_WIDTH)
+        self.min_name_height = self.y(Config.MIN_NAME_HEIGHT)
+        self.max_name_height = self.y(Config.MAX_NAME_HEIGHT)
+        self.name_merge_distance = self.length(Config.NAME_MERGE_DISTANCE)
+        self.click_offset_y = self.y(Config.CLICK_OFFSET_Y)
+
+        # Distances and speeds (screen px)
+        self.position_proximity = self.length(Config.POSITION_PROXIMITY)
+        self.travel_speed = self.length(Config.TARGET_TRAVEL_SPEED)
+        self.recovery_distance_scale = self.length(Config.RECOVERY_DISTANCE_SCALE)
+        self.recovery_near_distance = self.length(Config.RECOVERY_NEAR_DISTANCE)
+
+        # Pixel-count thresholds
+        self.red_pixel_threshold = self.pixels(Config.RED_PIXEL_THRESHOLD)
+        self.health_change_threshold = self.pixels(Config.HEALTH_CHANGE_THRESHOLD)
+        self.min_health_red_pixels = self.pixels(Config.MIN_HEALTH_RED_PIXELS)
+        self.class_color_min_pixels = {mob_class: self.pixels(count)
+                                       for mob_class, count in Config.CLASS_COLOR_MIN_PIXELS.items()}
+
+    def x(self, value):
+        return int(round(value * self.scale_x))
+
+    def y(self, value):
+        return int(round(value * self.scale_y))
+
+    def length(self, value):
+        return int(round(value * self.scale))
+
+    def pixels(self, count):
+        return int(round(count * self.scale_x * self.scale_y))
+
+    def region(self, region):
+        """(x, y, w, h) scaled per axis"""
+        x, y, w, h = region
+        return (self.x(x), self.y(y), self.x(w), self.y(h))
+
+    def is_base(self):
+        """True at the BASE_WIDTH x BASE_HEIGHT layout (nothing scaled)"""
+        return self.scale_x == 1.0 and self.scale_y == 1.0
 
 
 # ============================================================================
 # LOGGING
 # ============================================================================
 
-def setup_logger():
-    """Setup logging system"""
+class BatchingHandler(logging.handlers.MemoryHandler):
+    """Buffer records and write them in batches (size, age or an error triggers a flush)"""
+
+    def __init__(self, target):
+        super().__init__(Config.LOG_BATCH_SIZE, flushLevel=logging.ERROR, target=target)
+        self.last_flush = time.time()
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or time.time() - self.last_flush >= Config.LOG_FLUSH_INTERVAL
+
+    def flush(self):
+        super().flush()
+        self.last_flush = time.time()
+
+    def flush_deadline(self):
+        """Time the oldest buffered record is due for writing (None when empty)"""
+        return self.last_flush + Config.LOG_FLUSH_INTERVAL if self.buffer else None
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that also writes out batches while no records arrive"""
+
+    def dequeue(self, block):
+        # shouldFlush() only runs on a new record - wake up for the oldest
+        # buffered line's deadline so a quiet bot still reaches bot.log
+        batching = [handler for handler in self.handlers if isinstance(handler, BatchingHandler)]
+        while True:
+            deadlines = [handler.flush_deadline() for handler in batching]
+            deadlines = [deadline for deadline in deadlines if deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            try:
+                return self.queue.get(block, timeout)
+            except queue.Empty:
+                now = time.time()
+                for handler in batching:
+                    deadline = handler.flush_deadline()
+                    if deadline is not None and deadline <= now:
+                        handler.flush()
+
+
+_log_listeners = {}  # logger name -> QueueListener writing its handlers
+
+
+def setup_logger(instance_name=None):
+    """
+    Setup logging system
+
+    instance_name: set in multi-client mode - each game window gets its own
+    session directory and logger (prefixed with the instance name)
+
+    Logging calls only put records on a queue; a QueueListener thread does
+    all the I/O - console lines right away, bot.log in batches (at most
+    LOG_FLUSH_INTERVAL late, even when nothing else is logged). Per-cycle
+    JSON records go through '<logger>.records' to cycles.jsonl the same way.
+    Call stop_logger() to flush at shutdown.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_dir = f"logs/session_{timestamp}"
+    logger_name = 'MobHunter'
+    if instance_name:
+        log_dir = f"{log_dir}_{instance_name}"
+        logger_name = f"MobHunter.{instance_name}"
     os.makedirs(log_dir, exist_ok=True)
     os.makedirs(f"{log_dir}/screenshots", exist_ok=True)
     
-    logger = logging.getLogger('MobHunter')
-    logger.setLevel(logging.DEBUG)
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logging.DEBUG if Config.DEBUG_MODE else logging.INFO)
+    logger.propagate = False  # Instance loggers must not repeat lines through 'MobHunter'
     
-    # File handler
+    # File handler (batched writes)
     fh = logging.FileHandler(f'{log_dir}/bot.log', encoding='utf-8')
     fh.setLevel(logging.DEBUG)
     
@@ -181,19 +824,266 @@ def setup_logger():
     ch = logging.StreamHandler()
     ch.setLevel(logging.INFO)
     
+    prefix = f"[{instance_name}] " if instance_name else ""
     formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)-8s | %(message)s',
+        f'%(asctime)s | %(levelname)-8s | {prefix}%(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     fh.setFormatter(formatter)
     ch.setFormatter(formatter)
-    
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    handlers = [BatchingHandler(fh), ch]
+
+    # Structured per-cycle records (message is already a JSON line)
+    records_logger = logging.getLogger(f"{logger_name}.records")
+    records_logger.setLevel(logging.INFO)
+    records_logger.propagate = False
+    records_logger.disabled = not Config.CYCLE_RECORDS_ENABLED
+    if Config.CYCLE_RECORDS_ENABLED:
+        jh = logging.FileHandler(f'{log_dir}/cycles.jsonl', encoding='utf-8')
+        jh.setFormatter(logging.Formatter('%(message)s'))
+        jh.addFilter(lambda record: record.name == records_logger.name)
+        for handler in (fh, ch):
+            handler.addFilter(lambda record: record.name != records_logger.name)
+        handlers.append(BatchingHandler(jh))
+
+    # Callers only enqueue - the listener thread does the writes
+    stop_logger(logger)
+    log_queue = queue.SimpleQueue()
+    for queued_logger in (logger, records_logger):
+        queued_logger.handlers.clear()
+        queued_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _log_listeners[logger_name] = listener
     
     return logger, log_dir
 
 
+def stop_logger(logger):
+    """Stop the logger's listener thread, writing out everything still queued or batched"""
+    listener = _log_listeners.pop(logger.name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        target = getattr(handler, 'target', None)
+        handler.close()  # Batching handlers write out what they hold
+        if target is not None:
+            target.close()
+
+
+# ============================================================================
+# SCREENSHOT WRITER
+# ============================================================================
+
+class ScreenshotWriter:
+    """
+    Encode and write screenshots on a background thread
+
+    save() only queues the frame (no copy - captured frames are never
+    modified). When the queue is full the frame is dropped instead of
+    stalling the bot, and once SCREENSHOT_MAX_BYTES have been written in
+    this session further screenshots are skipped.
+    """
+
+    EXTENSIONS = {'png': '.png', 'jpg': '.jpg', 'webp': '.webp'}
+
+    def __init__(self, logger, directory):
+        self.logger = logger
+        self.directory = directory
+        self.extension = self.EXTENSIONS.get(Config.SCREENSHOT_FORMAT, '.png')
+        if self.extension == '.png':
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, Config.SCREENSHOT_PNG_COMPRESSION]
+        elif self.extension == '.jpg':
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, Config.SCREENSHOT_QUALITY]
+        else:
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, Config.SCREENSHOT_QUALITY]
+        self.queue = queue.Queue(maxsize=Config.SCREENSHOT_QUEUE_SIZE)
+        self.saved = 0
+        self.dropped = 0  # Queue full (back-pressure)
+        self.over_budget = 0
+        self.bytes_written = 0
+        self.thread = threading.Thread(target=self.run, name='screenshot-writer', daemon=True)
+        self.thread.start()
+
+    def save(self, image, name, region=None):
+        """Queue image (optionally only region x, y, w, h) as <name>.<ext> - False if dropped"""
+        if region is not None:
+            x, y, w, h = region
+            image = image[y:y+h, x:x+w]
+        try:
+            self.queue.put_nowait((image, name))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            self.logger.warning(f"Screenshot dropped (writer busy): {name}")
+            return False
+
+    def run(self):
+        """Writer thread: check the budget, encode, write"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            image, name = item
+            try:
+                if self.bytes_written >= Config.SCREENSHOT_MAX_BYTES:
+                    # Budget used up - don't spend an encode on a screenshot that can't be written
+                    self.over_budget += 1
+                    self.logger.warning(f"Screenshot skipped (session budget reached): {name}")
+                    continue
+                ok, encoded = cv2.imencode(self.extension, image, self.params)
+                if not ok:
+                    raise ValueError(f"{self.extension} encoding failed")
+                if self.bytes_written + len(encoded) > Config.SCREENSHOT_MAX_BYTES:
+                    self.over_budget += 1
+                    self.logger.warning(f"Screenshot skipped (session budget reached): {name}")
+                    continue
+                filename = name + self.extension
+                with open(os.path.join(self.directory, filename), 'wb') as f:
+                    f.write(encoded.tobytes())
+                self.bytes_written += len(encoded)
+                self.saved += 1
+                self.logger.info(f"📸 Screenshot saved: {filename} ({len(encoded) // 1024} KB)")
+            except Exception as e:
+                self.logger.error(f"Failed to save screenshot: {e}")
+
+    def stop(self):
+        """Write out queued screenshots and stop the thread"""
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+
+
+# ============================================================================
+# BLACK BOX RECORDER
+# ============================================================================
+
+class BlackBoxRecorder:
+    """
+    Keep the last BLACKBOX_SECONDS of downscaled frames and cycle records
+
+    Frames are sampled at BLACKBOX_FPS on a thread of its own, so the
+    seconds of a fight (one cycle can take many) are in the history too;
+    frames the bot captured anyway count as samples. Nothing is written
+    while hunting; dump() on death, error or stuck saves the history before
+    the event as one compressed .npz (frames, timestamps, cycle records as
+    JSON lines) under <log_dir>/blackbox/, written on a background thread.
+    Dumps stop at BLACKBOX_MAX_DUMPS or BLACKBOX_MAX_BYTES; stuck dumps
+    (low_priority) leave the BLACKBOX_RESERVED_DUMPS share of both to
+    deaths and errors.
+    """
+
+    def __init__(self, logger, directory, screen_capture=None):
+        self.logger = logger
+        self.directory = directory
+        self.screen_capture = screen_capture  # Sampler source (None = only frames passed to add_frame)
+        self.frames = deque(maxlen=Config.BLACKBOX_MAX_FRAMES)  # (timestamp, frame)
+        self.records = deque()  # (timestamp, JSON line)
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blackbox')
+        self.dumps = 0
+        self.bytes_written = 0  # Updated by the writer thread
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start sampling frames (BLACKBOX_FPS)"""
+        if self.screen_capture is None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='blackbox-sampler', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """Sampler loop - skips a sample when the bot just added a frame"""
+        while self.running:
+            interval = 1.0 / Config.BLACKBOX_FPS
+            with self.lock:
+                last = self.frames[-1][0] if self.frames else 0
+            wait = last + interval - time.time()
+            if wait <= 0:
+                try:
+                    self.add_frame(self.screen_capture.capture())
+                except Exception as e:
+                    self.logger.error(f"Black box sampler error: {e}")
+                wait = interval
+            time.sleep(min(wait, interval))
+
+    def add_frame(self, frame):
+        """Remember a downscaled copy of a captured frame"""
+        small = cv2.resize(frame, None, fx=Config.BLACKBOX_SCALE, fy=Config.BLACKBOX_SCALE,
+                           interpolation=cv2.INTER_AREA)
+        now = time.time()
+        with self.lock:
+            self.frames.append((now, small))
+            while self.frames and now - self.frames[0][0] > Config.BLACKBOX_SECONDS:
+                self.frames.popleft()
+
+    def add_record(self, record_line):
+        """Remember a cycle record (JSON line)"""
+        now = time.time()
+        with self.lock:
+            self.records.append((now, record_line))
+            while self.records and now - self.records[0][0] > Config.BLACKBOX_SECONDS:
+                self.records.popleft()
+
+    def has_room(self, low_priority=False):
+        """Dumps and bytes left in the session budget (low priority = outside the reserved share)"""
+        max_dumps = Config.BLACKBOX_MAX_DUMPS
+        if self.dumps >= max_dumps:
+            return False
+        max_bytes = Config.BLACKBOX_MAX_BYTES
+        if low_priority:
+            share = max(0, max_dumps - Config.BLACKBOX_RESERVED_DUMPS) / max_dumps
+            max_dumps -= Config.BLACKBOX_RESERVED_DUMPS
+            max_bytes *= share
+        return self.dumps < max_dumps and self.bytes_written < max_bytes
+
+    def dump(self, event, current_record=None, low_priority=False):
+        """
+        Save the current history for an event (death/error/stuck) in the background
+        current_record: JSON line of the cycle still running (not in the history yet)
+        low_priority: stuck dumps - the reserved share stays free for deaths and errors
+        """
+        if not self.has_room(low_priority):
+            self.logger.debug(f"Black box budget used up - no dump for {event}")
+            return False
+        with self.lock:
+            frames = list(self.frames)
+            records = list(self.records)
+        if current_record is not None:
+            records.append((time.time(), current_record))
+        if not frames:
+            return False
+        self.dumps += 1
+        filename = f"{self.dumps:03d}_{datetime.now().strftime('%H%M%S')}_{event}.npz"
+        self.writer.submit(self.write, os.path.join(self.directory, filename), frames, records)
+        self.logger.info(f"🗃️  Black box: {len(frames)} frames + {len(records)} cycle records -> {filename}")
+        return True
+
+    def write(self, path, frames, records):
+        """Writer thread: one compressed .npz per dump"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez_compressed(
+                path,
+                frames=np.stack([frame for _, frame in frames]),
+                timestamps=np.array([timestamp for timestamp, _ in frames]),
+                records=np.array([line for _, line in records]),
+                record_timestamps=np.array([timestamp for timestamp, _ in records])
+            )
+            self.bytes_written += os.path.getsize(path)
+        except Exception as e:
+            self.logger.error(f"Failed to save black box dump: {e}")
+
+    def stop(self):
+        """Stop sampling and finish pending dumps"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.writer.shutdown(wait=True)
+
+
 # ============================================================================
 # SCREEN CAPTURE
 # ============================================================================
@@ -201,15 +1091,395 @@ def setup_logger():
 class ScreenCapture:
     """Fast screen capture using mss"""
 
-    def __init__(self):
-        self.sct = mss()
+    def __init__(self, region=None):
+        # Capture region (game window client area in multi-client mode)
+        self.region = region or Config.SCREEN_REGION
+        # mss handles are not thread-safe - one per thread
+        self._local = threading.local()
+
+    @property
+    def sct(self):
+        """mss instance for the calling thread"""
+        if not hasattr(self._local, 'sct'):
+            self._local.sct = mss()
+        return self._local.sct
 
     def capture(self):
         """Capture and return BGR image"""
-        screenshot = self.sct.grab(Config.SCREEN_REGION)
+        screenshot = self.sct.grab(self.region)
         img = np.array(screenshot)
         return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
+    def capture_region(self, x, y, w, h):
+        """Capture only a sub-region (x, y, w, h in capture coordinates) as BGR"""
+        region = {
+            'top': self.region['top'] + y,
+            'left': self.region['left'] + x,
+            'width': w,
+            'height': h
+        }
+        img = np.array(self.sct.grab(region))
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+
+
+# ============================================================================
+# INPUT CONTROL
+# ============================================================================
+
+class FocusScheduler:
+    """
+    Time-slice mouse/keyboard focus between game instances
+
+    Only one instance may send input at a time. The owner's window is
+    brought to the foreground before its input goes out; other instances
+    keep capturing and detecting in parallel and wait here only for input.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.lock = threading.RLock()
+        self.current_hwnd = None
+        self.focus_switches = 0
+
+    @contextmanager
+    def acquire(self, hwnd):
+        """Hold input focus for hwnd for the duration of the block"""
+        with self.lock:
+            if hwnd and hwnd != self.current_hwnd:
+                try:
+                    win32gui.SetForegroundWindow(hwnd)
+                except Exception as e:
+                    self.logger.debug(f"Focus switch failed: {e}")
+                self.current_hwnd = hwnd
+                self.focus_switches += 1
+                time.sleep(Config.FOCUS_SWITCH_DELAY)
+            yield
+
+
+class ActionCancelled(Exception):
+    """Raised inside an action (combat, buffer, recovery) when it is interrupted"""
+
+
+class InputController:
+    """
+    Mouse/keyboard output for one game instance
+
+    Positions are in capture coordinates (relative to the instance's
+    capture region) and are translated to screen coordinates here.
+    With a FocusScheduler every input first takes the shared focus.
+
+    Actions wait with sleep() instead of time.sleep(), so cancel() (e.g. from
+    the death watchdog) interrupts them within one wait and raises
+    ActionCancelled in the acting thread. Held keys are always released.
+    """
+
+    def __init__(self, region=None, hwnd=None, focus_scheduler=None):
+        region = region or Config.SCREEN_REGION
+        self.offset_x = region['left']
+        self.offset_y = region['top']
+        self.hwnd = hwnd
+        self.focus_scheduler = focus_scheduler
+        self.cancel_event = threading.Event()
+        self.cancel_reason = None
+
+    def cancel(self, reason):
+        """Interrupt the current action (thread-safe)"""
+        self.cancel_reason = reason
+        self.cancel_event.set()
+
+    def clear_cancel(self):
+        """Allow actions again (called once the interrupt has been handled)"""
+        self.cancel_event.clear()
+        self.cancel_reason = None
+
+    def check_cancelled(self):
+        """Raise ActionCancelled if an interrupt is pending"""
+        if self.cancel_event.is_set():
+            raise ActionCancelled(self.cancel_reason)
+
+    def sleep(self, seconds):
+        """Interruptible wait"""
+        if self.cancel_event.wait(seconds):
+            raise ActionCancelled(self.cancel_reason)
+
+    @contextmanager
+    def focus(self):
+        """Keep input focus across several inputs (held keys, drags)"""
+        if self.focus_scheduler is None:
+            yield
+        else:
+            with self.focus_scheduler.acquire(self.hwnd):
+                yield
+
+    def click(self, x, y):
+        """Left click at capture coordinates"""
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.click(x + self.offset_x, y + self.offset_y)
+
+    def move(self, x, y):
+        """Move the mouse to capture coordinates (no click)"""
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.moveTo(x + self.offset_x, y + self.offset_y)
+
+    def press(self, key):
+        """Press and release a key"""
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.press(key)
+
+    def hold(self, key, duration):
+        """Hold a key down for duration seconds"""
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.keyDown(key)
+            try:
+                self.sleep(duration)
+            finally:
+                pyautogui.keyUp(key)
+
+    def hold_while(self, key, duration, check, interval):
+        """
+        Hold a key for up to duration seconds, calling check() every interval
+        Releases early and returns False as soon as check() returns False
+        """
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.keyDown(key)
+            try:
+                end_time = time.time() + duration
+                while time.time() < end_time:
+                    self.sleep(min(interval, max(0.0, end_time - time.time())))
+                    if not check():
+                        return False
+                return True
+            finally:
+                pyautogui.keyUp(key)
+
+    def drag(self, start, end, button='right', duration=0.5):
+        """Drag with a mouse button held (camera rotation uses the right button)"""
+        self.check_cancelled()
+        with self.focus():
+            pyautogui.moveTo(start[0] + self.offset_x, start[1] + self.offset_y)
+            pyautogui.mouseDown(button=button)
+            try:
+                pyautogui.moveTo(end[0] + self.offset_x, end[1] + self.offset_y, duration=duration)
+            finally:
+                pyautogui.mouseUp(button=button)
+
+
+# ============================================================================
+# ACTION EXECUTOR
+# ============================================================================
+
+class ActionPreempted(Exception):
+    """Raised out of an action that was interrupted by a higher-priority action"""
+
+
+class ActionExecutor:
+    """
+    Run key sequences declared as data, with priorities and per-action timing
+
+    A step is (key, hold, delay_after): press key - or hold it for hold
+    seconds when hold > 0 - then wait delay_after. key=None is a plain wait.
+    All waits go through the InputController, so the death watchdog's
+    cancel() interrupts any action.
+
+    preempt() (thread-safe, e.g. from a low-health alert) queues an action
+    and interrupts the running one if it has a lower ACTION_PRIORITIES
+    value; the interrupted action raises ActionPreempted once it has
+    unwound (held keys released) and the queued action runs right away on
+    the control thread. Actions queued while nothing is running are picked
+    up by run_due() from the main loop.
+
+    Time spent in every action is recorded, so time blocked in key
+    sequences shows up in the statistics.
+    """
+
+    def __init__(self, logger, input_controller):
+        self.logger = logger
+        self.input = input_controller
+        self.lock = threading.Lock()
+        self.pending = []  # Heap of (due_time, -priority, sequence, name, steps)
+        self.sequence = 0
+        self.current = None  # (name, priority) of the running action
+        self.preempt_reason = None  # Cancel reason of a pending preemption
+        self.timings = {}  # name -> {'runs', 'total', 'max', 'interrupted'}
+
+    def priority(self, name):
+        """Priority of an action name (unknown names = lowest)"""
+        return Config.ACTION_PRIORITIES.get(name, 0)
+
+    def schedule(self, name, steps, delay=0.0):
+        """Queue an action to run delay seconds from now (thread-safe)"""
+        with self.lock:
+            heapq.heappush(self.pending, (time.time() + delay, -self.priority(name), self.sequence, name, steps))
+            self.sequence += 1
+
+    def preempt(self, name, steps):
+        """
+        Queue an action to run now, interrupting the running action if it
+        has lower priority (thread-safe)
+        Returns False if an action with this name is already queued
+        """
+        priority = self.priority(name)
+        with self.lock:
+            if any(entry[3] == name for entry in self.pending):
+                return False
+            heapq.heappush(self.pending, (time.time(), -priority, self.sequence, name, steps))
+            self.sequence += 1
+
+            if self.current and self.current[1] < priority and self.preempt_reason is None:
+                self.preempt_reason = f"preempted by {name}"
+                self.input.cancel(self.preempt_reason)
+        return True
+
+    def clear(self):
+        """Drop all queued actions (e.g. after death)"""
+        with self.lock:
+            self.pending = []
+
+    def run_due(self):
+        """Run every queued action whose time has come (highest priority first)"""
+        while True:
+            with self.lock:
+                if not self.pending or self.pending[0][0] > time.time():
+                    return
+                _, _, _, name, steps = heapq.heappop(self.pending)
+            self.execute(name, steps)
+
+    @contextmanager
+    def running(self, name):
+        """
+        Mark a block of code as action name (priority + timing)
+        If a higher-priority action took over, it runs once the block has
+        unwound and ActionPreempted is raised out of the block; death (or
+        any other cancel) still raises ActionCancelled
+        """
+        priority = self.priority(name)
+        with self.lock:
+            # A higher-priority action queued between actions goes first
+            waiting = (self.pending and self.pending[0][0] <= time.time() and
+                       -self.pending[0][1] > priority)
+            if not waiting:
+                self.current = (name, priority)
+        if waiting:
+            self.logger.info(f"⏭️  {name} deferred to a queued higher-priority action")
+            self.run_due()
+            raise ActionPreempted(f"{name} deferred")
+
+        start = time.time()
+        preempted_by = None
+        try:
+            yield
+        except ActionCancelled:
+            with self.lock:
+                if self.preempt_reason is not None and self.input.cancel_reason == self.preempt_reason:
+                    preempted_by = self.preempt_reason
+            if preempted_by is None:
+                self.record(name, time.time() - start, interrupted=True)
+                raise
+        finally:
+            with self.lock:
+                self.current = None
+                self.preempt_reason = None
+
+        if preempted_by is None:
+            self.record(name, time.time() - start, interrupted=False)
+            return
+
+        self.record(name, time.time() - start, interrupted=True)
+        self.input.clear_cancel()
+        self.logger.info(f"⏭️  {name} {preempted_by}")
+        self.run_due()
+        raise ActionPreempted(preempted_by)
+
+    def run_steps(self, steps):
+        """Execute (key, hold, delay_after) steps"""
+        for i, (key, hold, delay_after) in enumerate(steps, 1):
+            if key is not None:
+                if Config.DEBUG_MODE:
+                    self.logger.debug(f"      [{i}/{len(steps)}] {key}" + (f" (hold {hold}s)" if hold > 0 else ""))
+                if hold > 0:
+                    self.input.hold(key, hold)
+                else:
+                    self.input.press(key)
+            if delay_after > 0:
+                self.input.sleep(delay_after)
+
+    def execute(self, name, steps):
+        """
+        Run a declared action
+        Returns False if it was preempted (the preempting action has run by then)
+        """
+        try:
+            with self.running(name):
+                self.run_steps(steps)
+            return True
+        except ActionPreempted:
+            return False
+
+    def record(self, name, elapsed, interrupted):
+        """Accumulate time spent in an action"""
+        stats = self.timings.setdefault(name, {'runs': 0, 'total': 0.0, 'max': 0.0, 'interrupted': 0})
+        stats['runs'] += 1
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+        if interrupted:
+            stats['interrupted'] += 1
+        if Config.DEBUG_MODE:
+            self.logger.debug(f"⏱️  {name}: {elapsed:.2f}s{' (interrupted)' if interrupted else ''}")
+
+
+# ============================================================================
+# CV WORKER POOL
+# ============================================================================
+
+class CVWorkerPool:
+    """
+    Thread pool for OpenCV stages
+
+    cv2 releases the GIL inside threshold/morphology/contour/cvtColor calls,
+    so independent stages (threshold passes, death check vs detection,
+    nameplate class vs health) overlap on a plain thread pool.
+    With CV_WORKERS <= 1 everything runs inline on the calling thread.
+    """
+
+    def __init__(self, logger, workers=None):
+        self.logger = logger
+        self.workers = Config.CV_WORKERS if workers is None else workers
+        self.executor = None
+
+        if self.workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cv')
+            self.logger.debug(f"CV worker pool started ({self.workers} threads)")
+
+    def submit(self, fn, *args, **kwargs):
+        """Dispatch fn to the pool and return a Future (resolved inline if pool disabled)"""
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn, items):
+        """Run fn over items on the pool, returns results in input order"""
+        if self.executor is None:
+            return [fn(item) for item in items]
+
+        return list(self.executor.map(fn, items))
+
+    def shutdown(self):
+        """Stop worker threads"""
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
 
 # ============================================================================
 # FLOATING NAME DETECTOR
@@ -218,54 +1488,38 @@ class ScreenCapture:
 class FloatingNameDetector:
     """Detect floating names using color and shape analysis"""
     
-    def __init__(self, logger):
+    def __init__(self, logger, worker_pool=None, geometry=None):
         self.logger = logger
+        self.worker_pool = worker_pool  # Optional CVWorkerPool for parallel threshold passes
+        self.geometry = geometry or ScreenGeometry()
         self.last_detections = []
+        self.kernel = self.geometry.name_kernel
     
     def find_floating_names(self, screenshot):
         """
         Detect white text regions (floating names)
         Returns list of {region: (x,y,w,h), center: (x,y)}
         """
-        height, width = screenshot.shape[:2]
-        
         # Convert to grayscale
         gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
         
         # Multiple thresholds to catch different text brightness
+        # Each pass is independent, so they can run on the CV pool concurrently
+        if self.worker_pool:
+            candidate_sets = self.worker_pool.map(
+                lambda threshold_value: self.find_candidates(gray, threshold_value),
+                Config.NAME_THRESHOLDS
+            )
+        else:
+            candidate_sets = [self.find_candidates(gray, t) for t in Config.NAME_THRESHOLDS]
+        
+        # Merge in threshold order so results match a sequential run
         detections = []
+        merge_distance = self.geometry.name_merge_distance
+        center_screen_x, center_screen_y = self.geometry.center
         
-        for threshold_value in [200, 180, 160]:
-            _, binary = cv2.threshold(gray, threshold_value, 255, cv2.THRESH_BINARY)
-            
-            # Morphological operations to connect text
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 1))
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-            
-            # Find contours
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, 
-                                          cv2.CHAIN_APPROX_SIMPLE)
-            
-            for cnt in contours:
-                x, y, w, h = cv2.boundingRect(cnt)
-                
-                # Size filter
-                if w < Config.MIN_NAME_WIDTH or w > Config.MAX_NAME_WIDTH:
-                    continue
-                if h < Config.MIN_NAME_HEIGHT or h > Config.MAX_NAME_HEIGHT:
-                    continue
-                
-                # Aspect ratio filter
-                aspect_ratio = w / h if h > 0 else 0
-                if aspect_ratio < Config.MIN_ASPECT_RATIO or aspect_ratio > Config.MAX_ASPECT_RATIO:
-                    continue
-                
-                # Position filter (ignore UI only)
-                if y < Config.IGNORE_TOP or y > height - Config.IGNORE_BOTTOM:
-                    continue
-                if x < Config.IGNORE_LEFT or x > width - Config.IGNORE_RIGHT:
-                    continue
-                
+        for candidates in candidate_sets:
+            for x, y, w, h in candidates:
                 # Calculate center
                 center_x = x + w // 2
                 center_y = y + h // 2
@@ -274,14 +1528,12 @@ class FloatingNameDetector:
                 is_duplicate = False
                 for existing in detections:
                     ex, ey = existing['center']
-                    if abs(ex - center_x) < 20 and abs(ey - center_y) < 20:
+                    if abs(ex - center_x) < merge_distance and abs(ey - center_y) < merge_distance:
                         is_duplicate = True
                         break
                 
                 if not is_duplicate:
                     # Calculate distance from screen center
-                    center_screen_x = Config.SCREEN_WIDTH // 2
-                    center_screen_y = Config.SCREEN_HEIGHT // 2
                     distance = np.sqrt(
                         (center_x - center_screen_x)**2 + 
                         (center_y - center_screen_y)**2
@@ -295,6 +1547,399 @@ class FloatingNameDetector:
         
         self.last_detections = detections
         return detections
+    
+    def find_candidates(self, gray, threshold_value):
+        """
+        Single threshold pass: threshold + morphology + contours + filters
+        Returns list of (x, y, w, h) boxes that look like name text
+        """
+        height, width = gray.shape[:2]
+        g = self.geometry
+        
+        _, binary = cv2.threshold(gray, threshold_value, 255, cv2.THRESH_BINARY)
+        
+        # Morphological operations to connect text
+        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel)
+        
+        # Find contours
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, 
+                                      cv2.CHAIN_APPROX_SIMPLE)
+        
+        candidates = []
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            
+            # Size filter
+            if w < g.min_name_width or w > g.max_name_width:
+                continue
+            if h < g.min_name_height or h > g.max_name_height:
+                continue
+            
+            # Aspect ratio filter
+            aspect_ratio = w / h if h > 0 else 0
+            if aspect_ratio < Config.MIN_ASPECT_RATIO or aspect_ratio > Config.MAX_ASPECT_RATIO:
+                continue
+            
+            # Position filter (ignore UI only)
+            if y < g.ignore_top or y > height - g.ignore_bottom:
+                continue
+            if x < g.ignore_left or x > width - g.ignore_right:
+                continue
+            
+            candidates.append((x, y, w, h))
+        
+        return candidates
+
+
+# ============================================================================
+# FLOATING NAME PRE-CLASSIFIER
+# ============================================================================
+
+class FloatingNameClassifier:
+    """
+    Estimate whether a floating name belongs to a pet before clicking it
+
+    Pet names float in yellow, mob and player names in white, so a few
+    color and shape features of the name's text pixels feed a logistic
+    model. Weights come from PET_MODEL_PATH when present (trained by
+    bench/train_pet_classifier.py on the DatasetRecorder samples); without
+    that file the built-in weights below score on name color alone.
+    """
+
+    FEATURES = ['yellow_fraction', 'white_fraction', 'mean_saturation', 'mean_hue',
+                'text_density', 'aspect_ratio', 'height']
+    # Built-in weights: yellow text -> pet, white text -> not a pet
+    DEFAULT_WEIGHTS = np.array([8.0, -2.0, 0.0, 0.0, 0.0, 0.0, 0.0], dtype=np.float32)
+    DEFAULT_BIAS = -4.0
+
+    def __init__(self, logger, geometry=None):
+        self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
+        self.weights = self.DEFAULT_WEIGHTS
+        self.bias = self.DEFAULT_BIAS
+        self.mean = np.zeros(len(self.FEATURES), dtype=np.float32)
+        self.scale = np.ones(len(self.FEATURES), dtype=np.float32)
+        self.model_source = 'built-in'
+        self.load_model(Config.PET_MODEL_PATH)
+
+    def load_model(self, path):
+        """Load weights, bias and feature normalization from an .npz file"""
+        if not os.path.exists(path):
+            return False
+        try:
+            model = np.load(path)
+            if list(model['features']) != self.FEATURES:
+                self.logger.warning(f"Pet model {path} was trained on different features - using built-in weights")
+                return False
+            self.weights = model['weights'].astype(np.float32)
+            self.bias = float(model['bias'])
+            self.mean = model['mean'].astype(np.float32)
+            self.scale = model['scale'].astype(np.float32)
+            self.model_source = path
+            self.logger.info(f"Pet classifier weights loaded from {path}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not load pet model {path}: {e}")
+            return False
+
+    def get_crop(self, screenshot, detection):
+        """Floating name crop from a detection region"""
+        x, y, w, h = detection['region']
+        return screenshot[y:y+h, x:x+w]
+
+    def extract_features(self, crop):
+        """Feature vector (FEATURES order) of a floating name crop"""
+        features = np.zeros(len(self.FEATURES), dtype=np.float32)
+        h, w = crop.shape[:2]
+        if h == 0 or w == 0:
+            return features
+
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        text = hsv[hsv[:, :, 2] >= 160]  # Bright pixels = name text
+        if len(text):
+            hue = text[:, 0]
+            saturation = text[:, 1]
+            features[0] = np.count_nonzero((hue >= 20) & (hue <= 35) & (saturation >= 100)) / len(text)
+            features[1] = np.count_nonzero(saturation < 60) / len(text)
+            features[2] = saturation.mean() / 255.0
+            features[3] = hue.mean() / 180.0
+        features[4] = len(text) / (h * w)
+        features[5] = (w / h) / Config.MAX_ASPECT_RATIO
+        features[6] = h / self.geometry.max_name_height  # Same feature at any resolution
+        return features
+
+    def predict(self, features):
+        """Pet probability for a feature vector"""
+        z = float(np.dot((features - self.mean) / self.scale, self.weights)) + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def pet_probability(self, screenshot, detection):
+        """Pet probability of a detected floating name"""
+        return self.predict(self.extract_features(self.get_crop(screenshot, detection)))
+
+
+class DatasetRecorder:
+    """
+    Save every verified floating name as a labeled training sample
+
+    Each click_and_read outcome labels the floating-name crop for free
+    (mob, dead, pet, timeout), stored with the pre-classifier's pet
+    probability; explored samples are names the filter would have dropped
+    (PET_EXPLORE_RATE), so false drops show up in the data. Samples are buffered and written as
+    compressed .npz chunks under DATASET_DIR/<session>/ on a background
+    thread (compression and disk I/O never stall the hunt loop); once all
+    chunks exceed DATASET_MAX_BYTES the oldest are deleted. Crops are stored
+    top-left aligned in a fixed MAX_NAME_HEIGHT x MAX_NAME_WIDTH canvas
+    with their real size alongside.
+    """
+
+    OUTCOMES = ('mob', 'dead', 'pet', 'timeout')
+
+    def __init__(self, logger, session_name):
+        self.logger = logger
+        self.session_dir = os.path.join(Config.DATASET_DIR, session_name)
+        self.crops = []
+        self.sizes = []
+        self.features = []
+        self.outcomes = []
+        self.classes = []
+        self.timestamps = []
+        self.pet_probabilities = []
+        self.explored = []
+        self.chunk_index = 0
+        self.samples_saved = 0  # Updated by the writer thread
+        self.chunks_deleted = 0
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dataset')
+
+    def record(self, crop, features, outcome, mob_class=None, pet_probability=0.0, explored=False):
+        """Buffer one sample; writes a chunk every DATASET_CHUNK_SIZE samples"""
+        h, w = crop.shape[:2]
+        h, w = min(h, Config.MAX_NAME_HEIGHT), min(w, Config.MAX_NAME_WIDTH)
+        canvas = np.zeros((Config.MAX_NAME_HEIGHT, Config.MAX_NAME_WIDTH, 3), dtype=np.uint8)
+        canvas[:h, :w] = crop[:h, :w]
+
+        self.crops.append(canvas)
+        self.sizes.append((h, w))
+        self.features.append(features)
+        self.outcomes.append(outcome)
+        self.classes.append(mob_class or '')
+        self.timestamps.append(time.time())
+        self.pet_probabilities.append(pet_probability)
+        self.explored.append(explored)
+
+        if len(self.crops) >= Config.DATASET_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Hand buffered samples to the writer thread as the next chunk file"""
+        if not self.crops:
+            return False
+        self.chunk_index += 1
+        path = os.path.join(self.session_dir, f"chunk_{self.chunk_index:04d}.npz")
+        samples = (self.crops, self.sizes, self.features, self.outcomes, self.classes, self.timestamps,
+                   self.pet_probabilities, self.explored)
+        self.crops, self.sizes, self.features = [], [], []
+        self.outcomes, self.classes, self.timestamps = [], [], []
+        self.pet_probabilities, self.explored = [], []
+        self.writer.submit(self.write, path, *samples)
+        return True
+
+    def write(self, path, crops, sizes, features, outcomes, classes, timestamps, pet_probabilities, explored):
+        """Writer thread: one compressed chunk, then the disk budget"""
+        try:
+            os.makedirs(self.session_dir, exist_ok=True)
+            np.savez_compressed(
+                path,
+                crops=np.stack(crops),
+                sizes=np.array(sizes, dtype=np.int16),
+                features=np.stack(features).astype(np.float32),
+                feature_names=np.array(FloatingNameClassifier.FEATURES),
+                outcomes=np.array(outcomes),
+                classes=np.array(classes),
+                timestamps=np.array(timestamps),
+                pet_probabilities=np.array(pet_probabilities, dtype=np.float32),
+                explored=np.array(explored, dtype=bool)
+            )
+            self.samples_saved += len(crops)
+            self.logger.debug(f"Dataset chunk saved: {path} ({len(crops)} samples)")
+            self.enforce_budget(path)
+        except Exception as e:
+            self.logger.error(f"Failed to save dataset chunk: {e}")
+
+    def enforce_budget(self, keep_path):
+        """Delete the oldest chunks (any session) until under DATASET_MAX_BYTES"""
+        chunks = sorted(glob.glob(os.path.join(Config.DATASET_DIR, '*', 'chunk_*.npz')), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in chunks)
+        for path in chunks:
+            if total <= Config.DATASET_MAX_BYTES:
+                break
+            if os.path.samefile(path, keep_path):
+                continue
+            total -= os.path.getsize(path)
+            os.remove(path)
+            self.chunks_deleted += 1
+
+    def stop(self):
+        """Write out buffered samples and finish pending chunks"""
+        self.flush()
+        self.writer.shutdown(wait=True)
+
+
+# ============================================================================
+# PROCESS-POOL DETECTION (SHARED-MEMORY FRAMES)
+# ============================================================================
+
+# Per-process state of a detection worker (set by _detection_worker_init)
+_worker_state = {}
+
+
+def _detection_worker_init(shm_name, slot_bytes):
+    """Attach the frame ring and build detectors once per worker process"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    logger = logging.getLogger('MobHunter.worker')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    # Spawned workers re-import the module, so Config is back to its defaults here
+    load_settings(logger)
+
+    _worker_state['shm'] = shm
+    _worker_state['slot_bytes'] = slot_bytes
+    _worker_state['logger'] = logger
+    _worker_state['detectors'] = {}  # (height, width) -> detector - windows may differ in size
+    _worker_state['settings_version'] = 0
+
+
+def _detection_worker_detector(shape):
+    """Floating-name detector for a frame size (built on first use)"""
+    detectors = _worker_state['detectors']
+    size = tuple(shape[:2])
+    if size not in detectors:
+        geometry = ScreenGeometry(size[1], size[0])
+        detectors[size] = FloatingNameDetector(_worker_state['logger'], geometry=geometry)
+    return detectors[size]
+
+
+def _detection_worker_settings(version, settings):
+    """Apply settings reloaded in the main process, rebuild only what depends on them"""
+    changed = [key for key, value in settings.items() if getattr(Config, key) != value]
+    for key in changed:
+        setattr(Config, key, settings[key])
+    if GEOMETRY_KEYS.intersection(changed):
+        for detector in _worker_state['detectors'].values():
+            detector.geometry.update()
+    _worker_state['settings_version'] = version
+
+
+def _detection_worker_run(slot, shape, settings_version=0, settings=None):
+    """
+    Run floating-name detection on one ring slot (no pixel pickling)
+    Returns detections as int32[N, 6] rows of x, y, w, h, cx, cy
+
+    The nameplate is not read here - this frame is from before the click,
+    NameplateReader reads it after the click on the main process.
+    """
+    if settings_version != _worker_state['settings_version']:
+        _detection_worker_settings(settings_version, settings)
+
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=_worker_state['shm'].buf,
+                       offset=slot * _worker_state['slot_bytes'])
+
+    detections = _detection_worker_detector(shape).find_floating_names(frame)
+    return np.array(
+        [det['region'] + det['center'] for det in detections],
+        dtype=np.int32
+    ).reshape(-1, 6)
+
+
+class DetectionProcessPool:
+    """
+    Floating-name detection in worker processes
+
+    Frames are copied into a ring of multiprocessing.shared_memory slots;
+    workers map the slot as a numpy array, run find_floating_names and
+    send back only a compact int32 detection array.
+    One pool can be shared by several MobHunter instances.
+    """
+
+    def __init__(self, logger, workers=None, slots=None):
+        self.logger = logger
+        self.workers = workers or Config.DETECTION_PROCESSES
+        self.slots = slots or Config.DETECTION_RING_SLOTS
+        self.slot_bytes = Config.SCREEN_WIDTH * Config.SCREEN_HEIGHT * 3
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.free_slots = queue.Queue()
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_detection_worker_init,
+            initargs=(self.shm.name, self.slot_bytes)
+        )
+        self.frames_processed = 0
+        # Settings reloaded since the workers started - sent along with the frames, applied once per version
+        self.settings = {}
+        self.settings_version = 0
+        self.logger.info(f"🧵 Detection process pool: {self.workers} workers, {self.slots} frame slots")
+
+    def submit(self, frame):
+        """
+        Copy frame into a free slot and queue it for detection
+        Blocks while all slots are in flight. Returns a Future of the compact result.
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} larger than slot ({self.slot_bytes} bytes)")
+
+        slot = self.free_slots.get()
+        slot_view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf,
+                               offset=slot * self.slot_bytes)
+        np.copyto(slot_view, frame)
+
+        try:
+            future = self.executor.submit(_detection_worker_run, slot, frame.shape,
+                                          self.settings_version, self.settings)
+        except Exception:
+            self.free_slots.put(slot)
+            raise
+        future.add_done_callback(lambda _: self.free_slots.put(slot))
+        return future
+
+    def update_settings(self, changed):
+        """Hand reloaded Config keys to the workers (with the next frames)"""
+        self.settings = {**self.settings, **{key: getattr(Config, key) for key in changed}}
+        self.settings_version += 1
+
+    def detect(self, frame):
+        """Synchronous detection - returns find_floating_names dicts"""
+        return self.unpack(self.submit(frame).result(), frame.shape)
+
+    def unpack(self, packed, shape=None):
+        """Convert a compact worker result back to find_floating_names dicts (shape = frame shape)"""
+        self.frames_processed += 1
+
+        height, width = shape[:2] if shape is not None else (Config.SCREEN_HEIGHT, Config.SCREEN_WIDTH)
+        center_screen_x = width // 2
+        center_screen_y = height // 2
+
+        detections = []
+        for x, y, w, h, cx, cy in packed.tolist():
+            detections.append({
+                'region': (x, y, w, h),
+                'center': (cx, cy),
+                'distance_from_center': np.sqrt((cx - center_screen_x)**2 + (cy - center_screen_y)**2)
+            })
+        return detections
+
+    def shutdown(self):
+        """Stop workers and release the shared-memory ring"""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self.shm.close()
+            self.shm.unlink()
 
 
 # ============================================================================
@@ -304,8 +1949,9 @@ class FloatingNameDetector:
 class PositionCache:
     """Remember recently checked positions"""
     
-    def __init__(self, logger):
+    def __init__(self, logger, geometry=None):
         self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
         self.cache = {}
         self.hit_count = 0
         self.miss_count = 0
@@ -326,7 +1972,7 @@ class PositionCache:
                 (position[0] - cached_pos[0])**2 + 
                 (position[1] - cached_pos[1])**2
             )
-            if distance < Config.POSITION_PROXIMITY:
+            if distance < self.geometry.position_proximity:
                 self.hit_count += 1
                 return True
         
@@ -335,6 +1981,20 @@ class PositionCache:
         self.miss_count += 1
         return False
     
+    def contains(self, position):
+        """Check proximity to a recently checked position without recording anything"""
+        current_time = time.time()
+        for cached_pos, ts in list(self.cache.items()):
+            if current_time - ts >= Config.POSITION_CACHE_DURATION:
+                continue
+            distance = np.sqrt(
+                (position[0] - cached_pos[0])**2 + 
+                (position[1] - cached_pos[1])**2
+            )
+            if distance < self.geometry.position_proximity:
+                return True
+        return False
+
     def get_stats(self):
         """Get cache statistics"""
         total = self.hit_count + self.miss_count
@@ -347,82 +2007,483 @@ class PositionCache:
         }
 
 
+# ============================================================================
+# TARGET SCORING
+# ============================================================================
+
+class TargetScorer:
+    """
+    Score verification candidates by expected kills per second
+
+    score = p(live mob) * class value / expected seconds spent on it
+
+    p(live mob) combines the pre-classifier's pet probability, the click
+    success rate of the screen area the name is in (learned during the
+    session) and how many cycles the name has been tracked. Area rates fade
+    back to the prior (TARGET_AREA_HALF_LIFE) - a screen area shows another
+    spot once the character moves - and never drop below
+    TARGET_AREA_MIN_RATE, so no area is written off for good. Time is the
+    verification click plus, on success, walking there and killing it.
+    Class value is the expected CLASS_PRIORITIES value of mobs verified in
+    that area.
+    """
+
+    def __init__(self, logger, geometry=None):
+        self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
+        self.width = self.geometry.width
+        self.height = self.geometry.height
+        columns, rows = Config.TARGET_AREA_GRID
+        self.prior = Config.TARGET_AREA_PRIOR
+        self.area_successes = np.full((rows, columns), float(self.prior[0]))
+        self.area_clicks = np.full((rows, columns), float(self.prior[1]))
+        self.area_class_value = np.ones((rows, columns))
+        self.last_decay = time.time()
+        self.tracks = []  # [(center, cycles seen)] from the previous cycle
+        self.verify_time = Config.CLICK_DELAY + Config.NAMEPLATE_TIMEOUT / 2  # Running averages (s)
+        self.kill_time = Config.COMBAT_ROTATION_TIME
+        self.skipped = 0  # Candidates left unverified (score below TARGET_MIN_SCORE)
+
+    def class_value(self, mob_class):
+        """Kill value of a class - General = 1, each priority step above adds TARGET_CLASS_BONUS"""
+        lowest = max(Config.CLASS_PRIORITIES.values())
+        priority = Config.CLASS_PRIORITIES.get(mob_class, lowest)
+        return 1.0 + (lowest - priority) * Config.TARGET_CLASS_BONUS
+
+    def get_area(self, position):
+        """(row, column) of the area grid cell containing a screen position"""
+        columns, rows = Config.TARGET_AREA_GRID
+        column = min(max(int(position[0] * columns / self.width), 0), columns - 1)
+        row = min(max(int(position[1] * rows / self.height), 0), rows - 1)
+        return row, column
+
+    def update_tracks(self, detections):
+        """Match this cycle's names to last cycle's (within POSITION_PROXIMITY) and age them"""
+        tracks = []
+        for det in detections:
+            center = det['center']
+            age = 1
+            for previous, previous_age in self.tracks:
+                if np.hypot(center[0] - previous[0], center[1] - previous[1]) < self.geometry.position_proximity:
+                    age = previous_age + 1
+                    break
+            det['track_age'] = age
+            tracks.append((center, age))
+        self.tracks = tracks
+
+    def decay(self, now=None):
+        """Fade every area's click history toward the prior (TARGET_AREA_HALF_LIFE)"""
+        if now is None:
+            now = time.time()
+        factor = 0.5 ** ((now - self.last_decay) / Config.TARGET_AREA_HALF_LIFE)
+        self.last_decay = now
+        successes, clicks = self.prior
+        self.area_successes = successes + (self.area_successes - successes) * factor
+        self.area_clicks = clicks + (self.area_clicks - clicks) * factor
+
+    def score(self, target):
+        """Expected kills per second of verifying (and attacking) a target"""
+        row, column = self.get_area(target['click_pos'])
+        area_rate = max(self.area_successes[row, column] / self.area_clicks[row, column], Config.TARGET_AREA_MIN_RATE)
+        age_factor = 1.0 if target['detection'].get('track_age', 1) > 1 else Config.TARGET_NEW_TRACK_FACTOR
+        # Explored likely-pets rank as unfiltered names - otherwise they'd never be worth the click
+        pet_probability = 0.0 if target.get('explore') else target['pet_probability']
+        p_mob = (1.0 - pet_probability) * area_rate * age_factor
+
+        travel_time = target['distance'] / self.geometry.travel_speed
+        expected_time = self.verify_time + p_mob * (travel_time + self.kill_time)
+        return p_mob * self.area_class_value[row, column] / expected_time
+
+    def rank(self, targets):
+        """Heap of (-score, order, target) - pop for the best remaining candidate"""
+        self.decay()
+        heap = []
+        for order, target in enumerate(targets):
+            target['score'] = self.score(target)
+            heap.append((-target['score'], order, target))
+        heapq.heapify(heap)
+        return heap
+
+    def record_click(self, position, success, mob_class=None, elapsed=None):
+        """
+        Update the area's success rate (and class value on success) after a verification click
+        success=None (e.g. a mob that was already dead) says nothing about the area - only the timing is kept.
+        """
+        row, column = self.get_area(position)
+        if success is not None:
+            self.area_clicks[row, column] += 1
+        if success:
+            self.area_successes[row, column] += 1
+            # Running mean of the class values verified in this area
+            n = self.area_successes[row, column]
+            self.area_class_value[row, column] += (self.class_value(mob_class) - self.area_class_value[row, column]) / n
+        if elapsed is not None:
+            self.verify_time += (elapsed - self.verify_time) * 0.2
+
+    def record_kill(self, elapsed):
+        """Update the running average time from engage to kill"""
+        self.kill_time += (elapsed - self.kill_time) * 0.2
+
+
 # ============================================================================
 # NAMEPLATE READER
 # ============================================================================
 
+class ClassIconClassifier:
+    """
+    Classify a nameplate by template matching its class row
+
+    The class row ("Lv N", class icon, class name) sits at a fixed place
+    inside the nameplate, so every template is matched only inside a small
+    search window (normalized cross-correlation, grayscale):
+    - class templates (icon + class name) in CLASS_ICON_SEARCH
+    - the "Lv" row start in CLASS_ROW_SEARCH - only mobs have a class row,
+      so without it the nameplate is a pet or player
+    A class row without a matching class template is a class we have no
+    template for yet and counts as 'General'. Templates are loaded once
+    from CLASS_TEMPLATE_DIR (<Class>.png per class + CLASS_ROW_TEMPLATE),
+    cropped at the base layout and resized to the capture size.
+    """
+
+    def __init__(self, logger, geometry=None):
+        self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
+        self.templates = self.load_templates()  # class name -> grayscale template
+        self.row_template = self.load_template(Config.CLASS_ROW_TEMPLATE)
+
+    def load_template(self, filename):
+        """Grayscale template from CLASS_TEMPLATE_DIR (None if missing)"""
+        path = os.path.join(Config.CLASS_TEMPLATE_DIR, filename)
+        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.exists(path) else None
+        if template is not None and not self.geometry.is_base():
+            template = cv2.resize(template, None, fx=self.geometry.scale_x, fy=self.geometry.scale_y,
+                                  interpolation=cv2.INTER_AREA)
+        return template
+
+    def load_templates(self):
+        """Load <Class>.png for every class in Config.CLASS_PRIORITIES"""
+        templates = {}
+        for mob_class in Config.CLASS_PRIORITIES:
+            template = self.load_template(f"{mob_class}.png")
+            if template is not None:
+                templates[mob_class] = template
+
+        if templates:
+            self.logger.info(f"Class templates: {', '.join(templates)}")
+        return templates
+
+    def is_available(self):
+        """True if the class row template and at least one class template are loaded"""
+        return bool(self.templates) and self.row_template is not None
+
+    def match(self, gray, region, template):
+        """Best normalized correlation of template inside region (x, y, w, h) of gray"""
+        x, y, w, h = region
+        window = gray[y:y+h, x:x+w]
+        if template.shape[0] > window.shape[0] or template.shape[1] > window.shape[1]:
+            return -1.0
+        _, score, _, _ = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+        return score
+
+    def classify(self, nameplate):
+        """
+        Class of a nameplate crop
+        Returns (class name or None for pets/players, best score)
+        """
+        gray = cv2.cvtColor(nameplate, cv2.COLOR_BGR2GRAY)
+
+        best_class, best_score = None, -1.0
+        for mob_class, template in self.templates.items():
+            score = self.match(gray, self.geometry.class_icon_search, template)
+            if score > best_score:
+                best_class, best_score = mob_class, score
+        if best_score >= Config.CLASS_MATCH_THRESHOLD:
+            return best_class, best_score
+
+        # No known class - is there a class row at all?
+        row_score = self.match(gray, self.geometry.class_row_search, self.row_template)
+        if row_score >= Config.CLASS_MATCH_THRESHOLD:
+            if Config.DEBUG_MODE:
+                self.logger.debug(f"    Class row without a matching class template (best {best_class} {best_score:.2f})")
+            return 'General', row_score
+        return None, max(best_score, row_score)
+
+
+class NameRecognizer:
+    """
+    Read the mob name from the nameplate name strip
+
+    OCR only runs when the strip has not been seen before: results are
+    cached by a perceptual hash of the strip (text mask downscaled by
+    NAME_HASH_SCALE, one bit per cell - the semi-transparent box
+    background does not leak in), and a cached strip within
+    NAME_HASH_MAX_DISTANCE bits counts as the same name. A repeat target
+    costs a hash and a dictionary scan instead of an OCR call.
+    """
+
+    def __init__(self, logger, geometry=None):
+        self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
+        self.cache = OrderedDict()  # phash() of the text mask -> name (LRU order)
+        self.ocr_calls = 0
+        self.cache_hits = 0
+        self.enabled = self.check_ocr()
+
+    def check_ocr(self):
+        """True if pytesseract and the Tesseract binary are usable"""
+        if not Config.NAME_OCR_ENABLED or pytesseract is None:
+            return False
+        try:
+            if Config.TESSERACT_CMD:
+                pytesseract.pytesseract.tesseract_cmd = Config.TESSERACT_CMD
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Name OCR disabled (Tesseract not available: {e})")
+            return False
+
+    def get_strip(self, nameplate):
+        """Name strip of a nameplate crop"""
+        x, y, w, h = self.geometry.name_strip_region
+        return nameplate[y:y+h, x:x+w]
+
+    def get_text_mask(self, strip):
+        """Name text pixels (names are light on a dark box, in several colors)"""
+        return np.max(strip, axis=2) > Config.NAME_TEXT_THRESHOLD
+
+    def phash(self, strip):
+        """Perceptual hash of a name strip as an int (bit per downscaled text mask cell)"""
+        scale = 1.0 / Config.NAME_HASH_SCALE
+        coverage = cv2.resize(self.get_text_mask(strip).astype(np.float32), None, fx=scale, fy=scale,
+                              interpolation=cv2.INTER_AREA)
+        return int.from_bytes(np.packbits(coverage > 0.25).tobytes(), 'big')
+
+    def lookup(self, strip_hash):
+        """Cached name for a hash (exact or within NAME_HASH_MAX_DISTANCE bits)"""
+        if strip_hash in self.cache:
+            self.cache.move_to_end(strip_hash)
+            return self.cache[strip_hash]
+        for cached_hash, name in self.cache.items():
+            if bin(cached_hash ^ strip_hash).count('1') <= Config.NAME_HASH_MAX_DISTANCE:
+                self.cache.move_to_end(cached_hash)  # Names that only ever match approximately stay cached too
+                return name
+        return None
+
+    def ocr(self, strip):
+        """Run Tesseract on a name strip (light text on a dark box)"""
+        image = np.where(self.get_text_mask(strip), 0, 255).astype(np.uint8)  # Black text on white
+        image = cv2.resize(image, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+        text = pytesseract.image_to_string(image, config='--psm 7')
+        return ' '.join(text.split()).strip(" .,'|")
+
+    def read(self, nameplate):
+        """Mob name of a nameplate crop (None if OCR is unavailable or fails)"""
+        if not self.enabled:
+            return None
+
+        try:
+            strip = self.get_strip(nameplate)
+            strip_hash = self.phash(strip)
+
+            name = self.lookup(strip_hash)
+            if name is not None:
+                self.cache_hits += 1
+                return name
+
+            name = self.ocr(strip)
+            self.ocr_calls += 1
+            if not name:
+                return None
+
+            self.cache[strip_hash] = name
+            if len(self.cache) > Config.NAME_CACHE_SIZE:
+                self.cache.popitem(last=False)
+            self.logger.debug(f"    OCR name: {name}")
+            return name
+
+        except Exception as e:
+            self.logger.debug(f"Name OCR error: {e}")
+            return None
+
+    def matches(self, name, entries):
+        """True if name fuzzily matches any entry (case-insensitive)"""
+        name = name.lower()
+        return any(difflib.SequenceMatcher(None, name, entry.lower()).ratio() >= Config.MOB_NAME_MATCH_RATIO
+                   for entry in entries)
+
+    def is_allowed(self, name):
+        """Apply MOB_NAME_ALLOWLIST / MOB_NAME_DENYLIST (unknown names are allowed)"""
+        if not name:
+            return True
+        if Config.MOB_NAME_DENYLIST and self.matches(name, Config.MOB_NAME_DENYLIST):
+            return False
+        if Config.MOB_NAME_ALLOWLIST and not self.matches(name, Config.MOB_NAME_ALLOWLIST):
+            return False
+        return True
+
+
 class NameplateReader:
     """Read mob info from nameplate with binary health detection"""
     
-    def __init__(self, logger, screen_capture):
+    def __init__(self, logger, screen_capture, worker_pool=None, input_controller=None, geometry=None):
         self.logger = logger
         self.screen_capture = screen_capture
+        self.input = input_controller or InputController()
+        self.worker_pool = worker_pool  # Optional CVWorkerPool (class + health checks in parallel)
+        self.geometry = geometry or ScreenGeometry()
+        self.class_classifier = ClassIconClassifier(logger, self.geometry)
+        self.name_recognizer = NameRecognizer(logger, self.geometry)
         self.click_count = 0
         self.verified_mobs = 0
         self.filtered_pets = 0
+        self.last_outcome = None  # 'mob', 'pet', 'timeout' or 'error' for the last click_and_read
+        self.build_masks()
+        # Nameplate polling runs here while the control thread moves on (see begin_verify)
+        self.poll_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nameplate')
+
+    def build_masks(self):
+        """Color heuristic masks from Config (again when NAMEPLATE_MASK_KEYS are reloaded)"""
+        # Checked in class priority order (Unique first)
+        self.class_masks = [(mob_class, ColorMask(Config.CLASS_COLOR_RANGES[mob_class]),
+                             self.geometry.class_color_min_pixels[mob_class])
+                            for mob_class in sorted(Config.CLASS_COLOR_RANGES, key=Config.CLASS_PRIORITIES.get)]
+        self.health_mask = ColorMask(Config.MOB_HEALTH_HSV_RANGES)
     
     def click_and_read(self, position, timeout=None):
         """Click and read nameplate with timeout"""
+        return self.finish_verify(self.begin_verify(position, timeout))
+
+    def begin_verify(self, position, timeout=None):
+        """
+        Click a target and read its nameplate in the background
+
+        Returns a Future for finish_verify() - the caller is free to do other
+        work (move the mouse to the next candidate) while the nameplate is
+        polled. Reads start as soon as the name strip differs from the one
+        shown before the click; CLICK_DELAY caps that wait (same name
+        re-selected, or nothing selected before).
+        """
         if timeout is None:
             timeout = Config.NAMEPLATE_TIMEOUT
-        
+
+        self.last_outcome = 'error'
         try:
+            x, y, w, h = self.geometry.nameplate_region
+            before = self.screen_capture.capture_region(x, y, w, h)
+
             # Click
-            self.logger.debug(f"    Clicking {position}")
-            pyautogui.click(position[0], position[1])
+            if Config.DEBUG_MODE:
+                self.logger.debug(f"    Clicking {position}")
+            self.input.click(position[0], position[1])
             self.click_count += 1
-            
-            time.sleep(Config.CLICK_DELAY)
-            
-            # Try to read nameplate
-            start_time = time.time()
-            attempts = 0
-            
-            while time.time() - start_time < timeout:
-                screenshot = self.screen_capture.capture()
-                info = self.read_nameplate(screenshot)
-                
+
+            return self.poll_executor.submit(self.poll_nameplate, before, time.time(), timeout)
+
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
+        except Exception as e:
+            self.logger.error(f"    Click error: {e}")
+            return None
+
+    def poll_nameplate(self, before, click_time, timeout):
+        """
+        Poll the nameplate region until a read succeeds -> (outcome, info, attempts)
+
+        A read with a class is a mob right away. A read without one may be a
+        nameplate still drawing in, so 'pet' needs the same result on two
+        consecutive reads or a read after CLICK_DELAY has passed.
+        """
+        x, y, w, h = self.geometry.nameplate_region
+        sx, sy, sw, sh = self.geometry.name_strip_region  # Opaque UI - the world behind the nameplate doesn't leak in
+        deadline = click_time + Config.CLICK_DELAY + timeout
+        attempts = 0
+        pet_info = None  # Previous read had a name but no class
+
+        while time.time() < deadline:
+            nameplate = self.screen_capture.capture_region(x, y, w, h)
+            strip_diff = cv2.absdiff(nameplate[sy:sy+sh, sx:sx+sw], before[sy:sy+sh, sx:sx+sw]).mean()
+            changed = strip_diff > Config.NAMEPLATE_CHANGE_THRESHOLD
+            settled = time.time() - click_time >= Config.CLICK_DELAY
+            if changed or settled:
+                info = self.read_nameplate_crop(nameplate)
                 attempts += 1
-                
-                if info is not None:
-                    if info.get('class'):
-                        # Has class = it's a mob
-                        self.verified_mobs += 1
-                        self.logger.debug(f"    ✓ Verified MOB in {attempts} attempts")
-                        return info
-                    else:
-                        # No class = it's a pet
-                        self.filtered_pets += 1
-                        self.logger.debug(f"    ✗ Filtered PET (no class)")
-                        return None
-                
-                time.sleep(0.1)
-            
-            self.logger.debug(f"    ✗ Nameplate timeout ({attempts} attempts)")
+                if info is not None and info.get('class'):
+                    return 'mob', info, attempts
+                if info is not None and (settled or pet_info is not None):
+                    return 'pet', info, attempts
+                pet_info = info
+
+            # Interrupt (death watchdog) ends the poll - finish_verify raises it
+            if self.input.cancel_event.wait(Config.NAMEPLATE_POLL_INTERVAL):
+                return 'error', None, attempts
+
+        if pet_info is not None:
+            return 'pet', pet_info, attempts
+        return 'timeout', None, attempts
+
+    def finish_verify(self, future):
+        """Wait for a begin_verify() result - info for a mob, None otherwise"""
+        if future is None:
             return None
-            
+        try:
+            outcome, info, attempts = future.result()
+            self.input.check_cancelled()
+            self.last_outcome = outcome
+
+            if outcome == 'mob':
+                # Has class = it's a mob
+                self.verified_mobs += 1
+                if Config.DEBUG_MODE:
+                    self.logger.debug(f"    ✓ Verified MOB in {attempts} attempts")
+                return info
+            if outcome == 'pet':
+                # No class = it's a pet
+                self.filtered_pets += 1
+                self.logger.debug(f"    ✗ Filtered PET (no class)")
+                return None
+
+            if Config.DEBUG_MODE:
+                self.logger.debug(f"    ✗ Nameplate timeout ({attempts} attempts)")
+            return None
+
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
         except Exception as e:
-            self.logger.error(f"    Click error: {e}")
+            self.logger.error(f"    Nameplate read error: {e}")
             return None
-    
+
+    def shutdown(self):
+        """Stop the nameplate polling thread"""
+        self.poll_executor.shutdown(wait=False)
+
     def read_nameplate(self, screenshot):
         """Read nameplate region"""
+        x, y, w, h = self.geometry.nameplate_region
+        return self.read_nameplate_crop(screenshot[y:y+h, x:x+w])
+
+    def read_nameplate_crop(self, nameplate):
+        """Read an already cropped nameplate"""
         try:
-            x, y, w, h = Config.NAMEPLATE_REGION
-            nameplate = screenshot[y:y+h, x:x+w]
+            # Start health check alongside class detection (both only read the nameplate)
+            alive_future = None
+            if self.worker_pool:
+                alive_future = self.worker_pool.submit(self.is_mob_alive, nameplate)
             
-            # Detect class by color patterns
-            mob_class = self.detect_class_by_color(nameplate)
+            # Detect class (icon templates, color patterns as fallback)
+            mob_class = self.detect_class(nameplate)
             
             # If no class detected, this is a pet
             if not mob_class:
                 return {'class': None, 'is_pet': True}
             
             # Check if mob is alive (binary)
-            is_alive = self.is_mob_alive(nameplate)
+            is_alive = alive_future.result() if alive_future else self.is_mob_alive(nameplate)
             
+            # Mob name (OCR, cached) - None when OCR is unavailable
+            name = self.name_recognizer.read(nameplate)
+
             return {
-                'name': 'Mob',
+                'name': name,
                 'class': mob_class,
                 'is_alive': is_alive,
                 'is_pet': False
@@ -432,6 +2493,18 @@ class NameplateReader:
             self.logger.debug(f"Nameplate read error: {e}")
             return None
     
+    def detect_class(self, nameplate):
+        """
+        Detect mob class - template classifier, or color patterns when no
+        templates are installed
+        Returns class name or None if no class (pet)
+        """
+        if not self.class_classifier.is_available():
+            return self.detect_class_by_color(nameplate)
+
+        mob_class, _ = self.class_classifier.classify(nameplate)
+        return mob_class
+
     def detect_class_by_color(self, nameplate):
         """
         Detect mob class by color patterns in nameplate
@@ -444,49 +2517,15 @@ class NameplateReader:
         # Convert to HSV
         hsv = cv2.cvtColor(nameplate, cv2.COLOR_BGR2HSV)
 
-        # Check for golden/yellow colors (Giant)
-        yellow_lower = np.array([20, 100, 100])
-        yellow_upper = np.array([30, 255, 255])
-        yellow_mask = cv2.inRange(hsv, yellow_lower, yellow_upper)
-        yellow_pixels = cv2.countNonZero(yellow_mask)
-
-        # Check for purple colors (Champion)
-        purple_lower = np.array([130, 100, 100])
-        purple_upper = np.array([160, 255, 255])
-        purple_mask = cv2.inRange(hsv, purple_lower, purple_upper)
-        purple_pixels = cv2.countNonZero(purple_mask)
-
-        # Check for red colors (Unique)
-        red_lower1 = np.array([0, 100, 100])
-        red_upper1 = np.array([10, 255, 255])
-        red_lower2 = np.array([170, 100, 100])
-        red_upper2 = np.array([180, 255, 255])
-        red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
-        red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
-        red_pixels = cv2.countNonZero(red_mask1) + cv2.countNonZero(red_mask2)
-
         # CLASSIFICATION LOGIC:
-        # If ANY classification color is detected = MOB
+        # If ANY classification color is detected = MOB (highest priority class wins)
         # If NO classification color detected = PET
+        # Ranges and pixel counts: CLASS_COLOR_RANGES / CLASS_COLOR_MIN_PIXELS (calibration profile)
+        for mob_class, color_mask, min_pixels in self.class_masks:
+            if color_mask.count(hsv) > min_pixels:
+                return mob_class
 
-        # Check for any classification indicator
-        has_yellow = yellow_pixels > 50
-        has_purple = purple_pixels > 50
-        has_red = red_pixels > 100
-
-        # If no classification colors detected = PET
-        if not has_yellow and not has_purple and not has_red:
-            return None  # No classification = PET
-
-        # Has classification = MOB, determine which type
-        if has_red:
-            return 'Unique'
-        elif has_purple:
-            return 'Champion'
-        elif has_yellow:
-            return 'Giant'
-        else:
-            return 'General'  # Has some color but below thresholds
+        return None  # No classification = PET
     
     def get_health_pixels(self, nameplate=None):
         """
@@ -497,48 +2536,19 @@ class NameplateReader:
             # If no nameplate provided, capture it
             if nameplate is None:
                 screenshot = self.screen_capture.capture()
-                x, y, w, h = Config.NAMEPLATE_REGION
+                x, y, w, h = self.geometry.nameplate_region
                 nameplate = screenshot[y:y+h, x:x+w]
 
-            # Extract ONLY the health bar sub-region within nameplate
-            # Nameplate is 600x100, health bar is approximately at:
-            # - Y offset: 30-45 pixels from top (actual health bar location)
-            # - X offset: 80-520 pixels (horizontal span of health bar)
+            # Extract ONLY the health bar sub-region within nameplate (MOB_HEALTH_BAR_REGION)
             # This isolates the health bar and excludes class icons, name text, borders
-            health_bar_y_start = 30
-            health_bar_y_end = 45
-            health_bar_x_start = 80
-            health_bar_x_end = 520
-
-            health_bar = nameplate[health_bar_y_start:health_bar_y_end,
-                                   health_bar_x_start:health_bar_x_end]
+            bx, by, bw, bh = self.geometry.mob_health_bar_region
+            health_bar = nameplate[by:by+bh, bx:bx+bw]
 
             # Convert to HSV
             hsv = cv2.cvtColor(health_bar, cv2.COLOR_BGR2HSV)
 
-            # MOB HEALTH BARS ARE YELLOW/ORANGE (not red!)
-            # Yellow/Orange range in HSV: H=15-35, S=150-255, V=150-255
-            yellow_lower = np.array([15, 150, 150])
-            yellow_upper = np.array([35, 255, 255])
-
-            # Also check for red (low health)
-            red_lower1 = np.array([0, 150, 100])
-            red_upper1 = np.array([10, 255, 255])
-            red_lower2 = np.array([170, 150, 100])
-            red_upper2 = np.array([180, 255, 255])
-
-            # Create masks for both yellow and red
-            yellow_mask = cv2.inRange(hsv, yellow_lower, yellow_upper)
-            red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
-            red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
-
-            # Combine all masks (yellow OR red)
-            combined_mask = cv2.bitwise_or(yellow_mask, red_mask1)
-            combined_mask = cv2.bitwise_or(combined_mask, red_mask2)
-
-            health_pixels = cv2.countNonZero(combined_mask)
-
-            return health_pixels
+            # MOB HEALTH BARS ARE YELLOW/ORANGE (not red!), red at low health
+            return self.health_mask.count(hsv)
 
         except Exception as e:
             self.logger.error(f"Health pixel count error: {e}")
@@ -553,9 +2563,10 @@ class NameplateReader:
         health_pixels = self.get_health_pixels(nameplate)
 
         # Binary decision: more than threshold = ALIVE
-        is_alive = health_pixels > Config.RED_PIXEL_THRESHOLD
+        is_alive = health_pixels > self.geometry.red_pixel_threshold
 
-        self.logger.debug(f"    Health check: {health_pixels} health pixels -> {'ALIVE' if is_alive else 'DEAD'}")
+        if Config.DEBUG_MODE:
+            self.logger.debug(f"    Health check: {health_pixels} health pixels -> {'ALIVE' if is_alive else 'DEAD'}")
 
         return is_alive
 
@@ -564,69 +2575,234 @@ class NameplateReader:
 # BUFFER SYSTEM
 # ============================================================================
 
+class BuffBarReader:
+    """
+    Find active buff icons in BUFF_BAR_REGION by template matching
+
+    Templates (one PNG per buff key) are loaded once and resized to every
+    BUFF_TEMPLATE_SCALES factor up front, so a read is one grayscale ROI
+    grab plus a normalized correlation per template in the bank.
+    """
+
+    def __init__(self, logger, screen_capture, geometry=None):
+        self.logger = logger
+        self.screen_capture = screen_capture
+        self.geometry = geometry or ScreenGeometry()
+        self.templates = self.load_templates()  # key -> [grayscale template per scale]
+        self.reads = 0
+
+    def load_templates(self):
+        """Load <key>.png for every buff in Config.BUFFS and build the scale bank"""
+        templates = {}
+        for key in Config.BUFFS:
+            path = os.path.join(Config.BUFF_TEMPLATE_DIR, f"{key}.png")
+            icon = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.exists(path) else None
+            if icon is None:
+                continue
+            bank = []
+            for scale in Config.BUFF_TEMPLATE_SCALES:
+                scale *= self.geometry.scale  # Icons are cropped at the base layout
+                scaled = cv2.resize(icon, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                if scaled.shape[0] >= 4 and scaled.shape[1] >= 4:
+                    bank.append(scaled)
+            templates[key] = bank
+
+        if templates:
+            self.logger.info(f"Buff icon templates: {', '.join(sorted(templates))}")
+        return templates
+
+    def is_available(self):
+        """True if at least one buff has a template"""
+        return bool(self.templates)
+
+    def match(self, roi_gray):
+        """
+        Best template score per buff key in a grayscale buff bar ROI
+        Returns {key: (score, (x, y))}
+        """
+        results = {}
+        for key, bank in self.templates.items():
+            best_score, best_loc = -1.0, None
+            for template in bank:
+                if template.shape[0] > roi_gray.shape[0] or template.shape[1] > roi_gray.shape[1]:
+                    continue
+                scores = cv2.matchTemplate(roi_gray, template, cv2.TM_CCOEFF_NORMED)
+                _, score, _, loc = cv2.minMaxLoc(scores)
+                if score > best_score:
+                    best_score, best_loc = score, loc
+            results[key] = (best_score, best_loc)
+        return results
+
+    def read(self):
+        """
+        Which buffs are visible on the buff bar
+        Returns {key: active} for buffs with templates, or None on failure
+        """
+        try:
+            roi = self.screen_capture.capture_region(*self.geometry.buff_bar_region)
+            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+            self.reads += 1
+            matches = self.match(gray)
+            if Config.DEBUG_MODE:
+                self.logger.debug("Buff bar: " + ", ".join(f"{key}={score:.2f}" for key, (score, _) in matches.items()))
+            return {key: score >= Config.BUFF_MATCH_THRESHOLD for key, (score, _) in matches.items()}
+
+        except Exception as e:
+            self.logger.debug(f"Buff bar read failed: {e}")
+            return None
+
+
 class BufferSystem:
-    """Handle buff rotation on timer"""
+    """
+    Keep buffs up with per-buff expiry times
 
-    def __init__(self, logger):
+    Every buff in Config.BUFFS has its own duration; only buffs that are
+    about to expire are recast. Refreshes prefer idle windows (right after
+    a kill, before the next verification) where anything expiring within
+    BUFF_REFRESH_MARGIN is recast together; elsewhere a buff is only
+    refreshed when it is BUFF_FORCE_MARGIN from dropping.
+
+    With a BuffBarReader the timers are corrected from the screen: a buff
+    whose icon is missing (failed cast, dispelled, expired early) is due
+    immediately, and casts are verified after the refresh.
+    """
+
+    def __init__(self, logger, input_controller=None, executor=None):
         self.logger = logger
+        self.input = input_controller or InputController()
+        self.executor = executor or ActionExecutor(logger, self.input)
         self.last_buffer_time = 0
         self.total_buffs = 0
+        self.buffs_cast = 0
+        self.buff_expiry = {}  # key -> time the buff runs out (missing = not active)
+        self.defer_until = 0  # Postponed by low-health alerts
+        self.buff_reader = None  # BuffBarReader (set by MobHunter)
+        self.last_buff_check = 0
+        self.failed_casts = 0
+        self.unconfirmed = set()  # Cast but icon not seen - retried after BUFF_RETRY_DELAY
+
+    def sync_with_screen(self, force=False):
+        """Correct buff timers from the buff bar (at most every BUFF_CHECK_INTERVAL)"""
+        if not (self.buff_reader and Config.BUFF_ICON_CHECK_ENABLED):
+            return None
+
+        now = time.time()
+        if not force and now - self.last_buff_check < Config.BUFF_CHECK_INTERVAL:
+            return None
+        self.last_buff_check = now
+
+        observed = self.buff_reader.read()
+        if observed is None:
+            return None
 
-    def should_run_buffer(self):
-        """Check if it's time to run buffer rotation"""
+        for key, active in observed.items():
+            expiry = self.buff_expiry.get(key, 0)
+            if active:
+                self.unconfirmed.discard(key)
+            if not active and expiry > now and key not in self.unconfirmed:
+                self.logger.info(f"🔍 Buff {key} not on the buff bar ({expiry - now:.0f}s left by timer) - due now")
+                self.buff_expiry[key] = 0
+            elif active and expiry <= now:
+                # Visible but untracked (cast by hand / before start) - refresh soon
+                self.buff_expiry[key] = now + Config.BUFF_UNKNOWN_REMAINING
+        return observed
+
+    def get_remaining(self, key):
+        """Approximate seconds left on a buff (0 = not active)"""
+        return max(0, self.buff_expiry.get(key, 0) - time.time())
+
+    def get_expiring(self, margin):
+        """Buff keys that run out within margin seconds (or are not active)"""
+        now = time.time()
+        return [key for key in Config.BUFFS if self.buff_expiry.get(key, 0) - now <= margin]
+
+    def should_run_buffer(self, idle=False):
+        """
+        Check if any buff needs a refresh
+        idle=True in idle windows (after a kill) - refresh early to avoid stopping mid-hunt
+        """
         if not Config.BUFFER_ENABLED:
             return False
 
-        current_time = time.time()
-        elapsed = current_time - self.last_buffer_time
+        # Don't stand still buffing while HP is draining
+        if time.time() < self.defer_until:
+            return False
+
+        self.sync_with_screen()
 
-        # Run if never run before OR if interval has passed
-        return self.last_buffer_time == 0 or elapsed >= Config.BUFFER_INTERVAL
+        margin = Config.BUFF_REFRESH_MARGIN if idle else Config.BUFF_FORCE_MARGIN
+        return bool(self.get_expiring(margin))
 
-    def run_buffer_sequence(self):
-        """Execute the buffer rotation"""
+    def run_buffer_sequence(self, idle=True):
+        """
+        Recast expiring buffs
+        Called right after should_run_buffer(idle) with the same idle flag
+        """
         try:
+            margin = Config.BUFF_REFRESH_MARGIN if idle else Config.BUFF_FORCE_MARGIN
+            keys = self.get_expiring(margin)
+            if not keys:
+                return True
+
             self.logger.info(f"\n{'='*60}")
-            self.logger.info("RUNNING BUFFER SEQUENCE")
+            self.logger.info(f"REFRESHING BUFFS: {' '.join(keys)}")
             self.logger.info(f"{'='*60}")
 
-            for i, (key, delay) in enumerate(Config.BUFFER_SEQUENCE, 1):
-                self.logger.info(f"  [{i}/{len(Config.BUFFER_SEQUENCE)}] Pressing: {key}")
-                pyautogui.press(key)
-
-                if delay > 0:
-                    self.logger.info(f"      Waiting {delay}s...")
-                    time.sleep(delay)
-                else:
-                    time.sleep(0.1)  # Small delay between instant presses
+            # Small delay after bar switches
+            steps = [(Config.BUFFER_BAR_KEY, 0, 0.1)]
+            steps += [(key, 0, Config.BUFFS[key][1]) for key in keys]
+            steps.append((Config.BUFFER_RETURN_KEY, 0, 0.1))
+            if not self.executor.execute('buffer', steps):
+                # Higher-priority action (retreat) took over - try again next cycle
+                return False
 
-            self.last_buffer_time = time.time()
+            now = time.time()
+            for key in keys:
+                self.buff_expiry[key] = now + Config.BUFFS[key][0]
+            self.last_buffer_time = now
             self.total_buffs += 1
+            self.buffs_cast += len(keys)
+
+            # Verify the casts went off (missing icons are retried after BUFF_RETRY_DELAY)
+            observed = self.buff_reader.read() if self.buff_reader and Config.BUFF_ICON_CHECK_ENABLED else None
+            if observed:
+                self.last_buff_check = now
+                failed = [key for key in keys if observed.get(key) is False]
+                for key in failed:
+                    self.buff_expiry[key] = now + Config.BUFF_RETRY_DELAY
+                    self.unconfirmed.add(key)
+                if failed:
+                    self.failed_casts += len(failed)
+                    self.logger.warning(f"⚠️  Buffs not visible after casting: {' '.join(failed)} - retry in {Config.BUFF_RETRY_DELAY}s")
 
             self.logger.info(f"{'='*60}")
-            self.logger.info(f"Buffer sequence complete (Total: {self.total_buffs})")
-            self.logger.info(f"Next buffer in {Config.BUFFER_INTERVAL}s ({Config.BUFFER_INTERVAL//60}m)")
+            self.logger.info(f"Buffs refreshed (Total: {self.total_buffs} refreshes, {self.buffs_cast} buffs)")
+            self.logger.info(f"Next buff expires in {self.get_time_until_next():.0f}s")
             self.logger.info(f"{'='*60}\n")
 
             return True
 
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
         except Exception as e:
             self.logger.error(f"Buffer sequence error: {e}")
             return False
 
-    def get_time_until_next(self):
-        """Get seconds until next buffer"""
-        if self.last_buffer_time == 0:
-            return 0
+    def on_low_health(self, fraction, time_to_death):
+        """PlayerHealthTracker subscriber: postpone a due buffer sequence"""
+        self.defer_until = time.time() + Config.HP_BUFFER_DEFER
 
-        elapsed = time.time() - self.last_buffer_time
-        remaining = Config.BUFFER_INTERVAL - elapsed
-        return max(0, remaining)
+    def get_time_until_next(self):
+        """Get seconds until the first buff expires"""
+        now = time.time()
+        remaining = [self.buff_expiry.get(key, 0) - now for key in Config.BUFFS]
+        return max(0, min(remaining)) if remaining else 0
 
     def reset_timer(self):
-        """Reset buffer timer (used when resuming from pause)"""
-        self.last_buffer_time = 0
-        self.logger.info("Buffer timer reset - will run on next cycle")
+        """Forget all buffs (used after death - buffs are gone)"""
+        self.buff_expiry = {}
+        self.unconfirmed = set()
+        self.logger.info("Buff timers reset - all buffs will be cast on next refresh")
 
 
 # ============================================================================
@@ -636,12 +2812,20 @@ class BufferSystem:
 class DeathDetector:
     """Detect player death and handle auto-revive"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, input_controller=None, executor=None, geometry=None):
         self.logger = logger
+        self.input = input_controller or InputController()
+        self.executor = executor or ActionExecutor(logger, self.input)
+        self.geometry = geometry or ScreenGeometry()
         self.death_count = 0
         self.last_death_time = 0
         self.buffer_system = None  # Will be set by MobHunter
         self.stuck_detector = None  # Will be set by MobHunter
+        self.build_masks()
+
+    def build_masks(self):
+        """Player health color mask from Config (again when PLAYER_HEALTH_HSV_RANGES is reloaded)"""
+        self.health_mask = ColorMask(Config.PLAYER_HEALTH_HSV_RANGES)
 
     def is_player_dead(self, screenshot):
         """
@@ -660,115 +2844,357 @@ class DeathDetector:
 
         try:
             # Extract player health bar region from top-left nameplate
-            x, y, w, h = Config.PLAYER_HEALTH_BAR_REGION
+            x, y, w, h = self.geometry.player_health_bar_region
             health_bar = screenshot[y:y+h, x:x+w]
 
-            # Convert to HSV for better red color detection
-            hsv = cv2.cvtColor(health_bar, cv2.COLOR_BGR2HSV)
-
-            # Red color has two ranges in HSV (wraps around at 180)
-            # Range 1: Red hues 0-10
-            red_lower1 = np.array([0, 100, 100])
-            red_upper1 = np.array([10, 255, 255])
-            red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
-
-            # Range 2: Red hues 170-180
-            red_lower2 = np.array([170, 100, 100])
-            red_upper2 = np.array([180, 255, 255])
-            red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
-
-            # Combine both red ranges
-            red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-            red_pixels = cv2.countNonZero(red_mask)
+            red_pixels = self.count_health_red_pixels(health_bar)
 
             # Debug logging
             if Config.DEBUG_MODE:
                 self.logger.debug(f"Player health bar: {red_pixels} red pixels")
 
-            # Check cooldown - don't detect death if we just revived
-            time_since_last_death = time.time() - self.last_death_time if self.last_death_time > 0 else 999
-            in_death_cooldown = time_since_last_death < Config.DEATH_COOLDOWN
+            return self.is_dead_from_red_pixels(red_pixels)
+
+        except Exception as e:
+            self.logger.error(f"Death detection error: {e}")
+            return False
 
-            # Check buffer cooldown - don't detect death right after buffer (buff effects can trigger false positive)
-            in_buffer_cooldown = False
-            if self.buffer_system and self.buffer_system.last_buffer_time > 0:
-                time_since_buffer = time.time() - self.buffer_system.last_buffer_time
-                in_buffer_cooldown = time_since_buffer < 5.0  # Skip death detection for 5 seconds after buffer
+    def count_health_red_pixels(self, health_bar):
+        """Count red pixels in the player health bar ROI"""
+        return cv2.countNonZero(self.get_health_red_mask(health_bar))
 
-            # Player is DEAD if red pixels < threshold
-            is_dead = red_pixels < Config.MIN_HEALTH_RED_PIXELS
+    def get_health_red_mask(self, health_bar):
+        """Binary mask of red (remaining health) pixels in the player health bar ROI"""
+        # Convert to HSV for better red color detection
+        hsv = cv2.cvtColor(health_bar, cv2.COLOR_BGR2HSV)
 
-            if is_dead and not in_death_cooldown and not in_buffer_cooldown:
-                self.logger.warning("💀 DEATH DETECTED - Player health bar empty!")
-                self.logger.warning(f"   Health bar red pixels: {red_pixels} (threshold: {Config.MIN_HEALTH_RED_PIXELS})")
-                return True
-            elif is_dead and in_death_cooldown:
-                self.logger.debug(f"Death detected but in death cooldown ({time_since_last_death:.1f}s since last death)")
-            elif is_dead and in_buffer_cooldown:
-                time_since_buffer = time.time() - self.buffer_system.last_buffer_time
-                self.logger.debug(f"Death detected but in buffer cooldown ({time_since_buffer:.1f}s since buffer)")
+        # Red color has two ranges in HSV (wraps around at 180) - PLAYER_HEALTH_HSV_RANGES
+        return self.health_mask.mask(hsv)
 
-            return False
+    def is_dead_from_red_pixels(self, red_pixels, verbose=True):
+        """
+        Death decision for a red pixel count (applies death and buffer cooldowns)
+        verbose=False keeps the fast watchdog loop from logging every sample
+        """
+        # Check cooldown - don't detect death if we just revived
+        time_since_last_death = time.time() - self.last_death_time if self.last_death_time > 0 else 999
+        in_death_cooldown = time_since_last_death < Config.DEATH_COOLDOWN
+
+        # Check buffer cooldown - don't detect death right after buffer (buff effects can trigger false positive)
+        in_buffer_cooldown = False
+        if self.buffer_system and self.buffer_system.last_buffer_time > 0:
+            time_since_buffer = time.time() - self.buffer_system.last_buffer_time
+            in_buffer_cooldown = time_since_buffer < 5.0  # Skip death detection for 5 seconds after buffer
+
+        # Player is DEAD if red pixels < threshold
+        is_dead = red_pixels < self.geometry.min_health_red_pixels
+
+        if is_dead and not in_death_cooldown and not in_buffer_cooldown:
+            self.logger.warning("💀 DEATH DETECTED - Player health bar empty!")
+            self.logger.warning(f"   Health bar red pixels: {red_pixels} (threshold: {self.geometry.min_health_red_pixels})")
+            return True
+        elif is_dead and in_death_cooldown and verbose:
+            self.logger.debug(f"Death detected but in death cooldown ({time_since_last_death:.1f}s since last death)")
+        elif is_dead and in_buffer_cooldown and verbose:
+            time_since_buffer = time.time() - self.buffer_system.last_buffer_time
+            self.logger.debug(f"Death detected but in buffer cooldown ({time_since_buffer:.1f}s since buffer)")
 
+        return False
+
+    def handle_death(self):
+        """
+        Execute revive sequence
+
+        Sequence (Config.DEATH_REVIVE_DELAY, then Config.REVIVE_SEQUENCE):
+        1. Wait DEATH_REVIVE_DELAY seconds for popup to stabilize
+        2. Press F4 (open revive menu)
+        3. Wait 0.5s
+        4. Press 0 (select resurrect option)
+        5. Wait for respawn
+        """
+        try:
+            self.death_count += 1
+            self.last_death_time = time.time()
+
+            self.logger.info("\n" + "="*70)
+            self.logger.info("💀 DEATH HANDLER ACTIVATED")
+            self.logger.info("="*70)
+            self.logger.info(f"Death #{self.death_count}")
+            self.logger.info(f"Waiting {Config.DEATH_REVIVE_DELAY}s before reviving...")
+
+            # Popup delay (read now so a reloaded profile takes effect), F4 (revive menu),
+            # 0 (resurrect), respawn wait
+            self.executor.execute('revive', [(None, 0, Config.DEATH_REVIVE_DELAY)] + list(Config.REVIVE_SEQUENCE))
+
+            self.logger.info("✅ Revive sequence completed!")
+
+            # Reset stuck detector timers to prevent false stuck detection after revive
+            if self.stuck_detector:
+                self.stuck_detector.reset_timer()
+                self.stuck_detector.last_kill_time = time.time()
+                self.stuck_detector.target_selected = False
+                self.stuck_detector.consecutive_recoveries = 0
+                self.stuck_detector.in_recovery_mode = False
+                self.logger.info("🔄 Stuck detector timers reset after revive")
+
+            self.logger.info("="*70 + "\n")
+
+            return True
+
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
         except Exception as e:
-            self.logger.error(f"Death detection error: {e}")
+            self.logger.error(f"Death handler error: {e}")
             return False
 
-    def handle_death(self):
-        """
-        Execute revive sequence
 
-        Sequence:
-        1. Wait 2 seconds for popup to stabilize
-        2. Press F4 (open revive menu)
-        3. Wait 0.5s
-        4. Press 0 (select resurrect option)
-        5. Wait for respawn
-        """
-        try:
-            self.death_count += 1
-            self.last_death_time = time.time()
+# ============================================================================
+# PLAYER HEALTH TRACKER
+# ============================================================================
+
+class PlayerHealthTracker:
+    """
+    Player HP history with loss rate and time-to-death estimate
+
+    Each sample turns the health bar red mask into a 0-1 fraction (share of
+    bar columns that still show red). Samples go into a timestamped ring
+    buffer; the loss rate is a least-squares slope over HP_RATE_WINDOW.
+    Subscribers get (fraction, time_to_death) when HP is low or falling fast,
+    so they can drink a potion / retreat / postpone buffs before dying.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.history = deque(maxlen=Config.HP_HISTORY_SIZE)  # (timestamp, fraction)
+        self.subscribers = []
+        self.last_alert_time = 0
+        self.alerts = 0
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Register callback(fraction, time_to_death) for low-health alerts"""
+        self.subscribers.append(callback)
+
+    def add_sample(self, red_mask, timestamp=None):
+        """Add one health bar sample (red mask of PLAYER_HEALTH_BAR_REGION)"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        # Bar drains right-to-left: fraction of columns still containing red
+        fraction = float(np.count_nonzero(red_mask.any(axis=0))) / red_mask.shape[1]
+
+        with self.lock:
+            self.history.append((timestamp, fraction))
+
+        self._check_alert(timestamp, fraction)
+        return fraction
+
+    def get_fraction(self):
+        """Latest HP fraction (None if no samples yet)"""
+        with self.lock:
+            return self.history[-1][1] if self.history else None
+
+    def get_loss_rate(self):
+        """HP fraction lost per second over HP_RATE_WINDOW (positive = losing HP)"""
+        with self.lock:
+            if len(self.history) < 2:
+                return 0.0
+            newest = self.history[-1][0]
+            window = [(t, f) for t, f in self.history if newest - t <= Config.HP_RATE_WINDOW]
+
+        if len(window) < 2:
+            return 0.0
+
+        times = np.array([t for t, _ in window]) - window[0][0]
+        fractions = np.array([f for _, f in window])
+        # Need at least half a window of history, or one noisy sample looks like a cliff
+        if times[-1] < Config.HP_RATE_WINDOW * 0.5:
+            return 0.0
+
+        slope = np.polyfit(times, fractions, 1)[0]
+        return max(0.0, -float(slope))
+
+    def time_to_death(self):
+        """Estimated seconds until HP reaches zero at the current loss rate (inf if not losing HP)"""
+        fraction = self.get_fraction()
+        loss_rate = self.get_loss_rate()
+        if fraction is None or loss_rate <= 1e-3:
+            return float('inf')
+        return fraction / loss_rate
+
+    def _check_alert(self, timestamp, fraction):
+        """Notify subscribers when HP is low or dropping fast"""
+        if fraction <= 0 or timestamp - self.last_alert_time < Config.HP_ALERT_COOLDOWN:
+            return
+
+        ttd = self.time_to_death()
+        if fraction >= Config.HP_LOW_FRACTION and ttd >= Config.HP_TTD_THRESHOLD:
+            return
+
+        self.last_alert_time = timestamp
+        self.alerts += 1
+        self.logger.warning(f"🩸 Low health: {fraction*100:.0f}% HP, time-to-death {ttd:.1f}s")
+
+        for callback in self.subscribers:
+            try:
+                callback(fraction, ttd)
+            except Exception as e:
+                self.logger.error(f"Low-health subscriber error: {e}")
+
+
+# ============================================================================
+# DEATH WATCHDOG
+# ============================================================================
+
+class DeathWatchdog:
+    """
+    Sample the player health bar on a dedicated fast loop
+
+    Only PLAYER_HEALTH_BAR_REGION is grabbed (88x8), so the loop can run at
+    DEATH_WATCHDOG_HZ while the main thread is busy in engage, stuck recovery
+    or the buffer sequence. Every sample also feeds the PlayerHealthTracker.
+    On death it sets death_event and cancels the current action through the
+    InputController, so the revive starts within about one sample instead
+    of at the next cycle.
+    """
+
+    def __init__(self, logger, screen_capture, death_detector, input_controller, health_tracker=None):
+        self.logger = logger
+        self.screen_capture = screen_capture
+        self.death_detector = death_detector
+        self.input = input_controller
+        self.health_tracker = health_tracker  # PlayerHealthTracker fed with every sample
+        self.death_event = threading.Event()
+        self.active = True  # Cleared while paused
+        self.running = False
+        self.thread = None
+        self.empty_streak = 0
+        self.sample_count = 0
+
+    def start(self):
+        """Start watchdog thread"""
+        if not (Config.DEATH_CHECK_ENABLED and Config.DEATH_WATCHDOG_ENABLED):
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='death-watchdog', daemon=True)
+        self.thread.start()
+        self.logger.info(f"🛡️  Death watchdog running at {Config.DEATH_WATCHDOG_HZ} Hz")
+
+    def stop(self):
+        """Stop watchdog thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+
+    def acknowledge(self):
+        """Death has been handled - re-arm the watchdog"""
+        self.empty_streak = 0
+        self.death_event.clear()
+
+    def _run(self):
+        """Watchdog loop"""
+        interval = 1.0 / Config.DEATH_WATCHDOG_HZ
+        geometry = self.death_detector.geometry  # Read every sample - a settings reload may move the ROI
+
+        while self.running:
+            start = time.time()
+            try:
+                if self.active and not self.death_event.is_set():
+                    health_bar = self.screen_capture.capture_region(*geometry.player_health_bar_region)
+                    red_mask = self.death_detector.get_health_red_mask(health_bar)
+                    red_pixels = cv2.countNonZero(red_mask)
+                    self.sample_count += 1
+                    if self.health_tracker:
+                        self.health_tracker.add_sample(red_mask, start)
+
+                    if red_pixels < geometry.min_health_red_pixels:
+                        self.empty_streak += 1
+                    else:
+                        self.empty_streak = 0
 
-            self.logger.info("\n" + "="*70)
-            self.logger.info("💀 DEATH HANDLER ACTIVATED")
-            self.logger.info("="*70)
-            self.logger.info(f"Death #{self.death_count}")
-            self.logger.info(f"Waiting {Config.DEATH_REVIVE_DELAY}s before reviving...")
+                    if (self.empty_streak >= Config.DEATH_WATCHDOG_CONFIRM_SAMPLES and
+                            self.death_detector.is_dead_from_red_pixels(red_pixels, verbose=False)):
+                        self.death_event.set()
+                        self.input.cancel('player died')
+                        self.logger.warning("🛡️  Watchdog: interrupting current action (player died)")
 
-            # Wait for popup to stabilize
-            time.sleep(Config.DEATH_REVIVE_DELAY)
+            except Exception as e:
+                self.logger.error(f"Death watchdog error: {e}")
 
-            # Press F4 to open revive menu
-            self.logger.info("Pressing F4 (open revive menu)...")
-            pyautogui.press('f4')
-            time.sleep(0.5)
+            elapsed = time.time() - start
+            time.sleep(max(0.0, interval - elapsed))
 
-            # Press 0 to resurrect at specified point
-            self.logger.info("Pressing 0 (resurrect at specified point)...")
-            pyautogui.press('0')
 
-            # Wait for respawn animation (increased from 3s to 5s for reliability)
-            self.logger.info("Waiting for respawn (5s)...")
-            time.sleep(5.0)
+# ============================================================================
+# MOTION ESTIMATION
+# ============================================================================
 
-            self.logger.info("✅ Revive sequence completed!")
+class MotionEstimator:
+    """
+    Global motion between consecutive downscaled frames
 
-            # Reset stuck detector timers to prevent false stuck detection after revive
-            if self.stuck_detector:
-                self.stuck_detector.reset_timer()
-                self.stuck_detector.last_kill_time = time.time()
-                self.stuck_detector.target_selected = False
-                self.stuck_detector.consecutive_recoveries = 0
-                self.stuck_detector.in_recovery_mode = False
-                self.logger.info("🔄 Stuck detector timers reset after revive")
+    Phase correlation of the central world view gives the camera/character
+    shift; the mean absolute difference catches forward motion (which looks
+    like zoom rather than shift). Neither moving = the character is not
+    going anywhere even though a movement key is held.
+    """
 
-            self.logger.info("="*70 + "\n")
+    def __init__(self, logger, screen_capture=None, geometry=None):
+        self.logger = logger
+        self.screen_capture = screen_capture
+        self.geometry = geometry or ScreenGeometry()
+        self.prev = None
+        self.window = None
+        self.last_motion_time = time.time()
+        self.last_shift = (0.0, 0.0)
+        self.last_diff = 0.0
+
+    def reset(self):
+        """Forget the previous frame (start of a new movement)"""
+        self.prev = None
+        self.last_motion_time = time.time()
+
+    def prepare(self, roi):
+        """Downscale + grayscale + float32 for phase correlation"""
+        small = cv2.resize(roi, None, fx=1.0 / Config.MOTION_DOWNSCALE, fy=1.0 / Config.MOTION_DOWNSCALE,
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        if self.window is None or self.window.shape != gray.shape:
+            self.window = cv2.createHanningWindow((gray.shape[1], gray.shape[0]), cv2.CV_32F)
+        return gray
+
+    def update(self, roi, timestamp=None):
+        """
+        Add a frame of MOTION_REGION
+        Returns True if it moved relative to the previous frame
+        """
+        if timestamp is None:
+            timestamp = time.time()
 
+        current = self.prepare(roi)
+        if self.prev is None:
+            self.prev = current
             return True
 
-        except Exception as e:
-            self.logger.error(f"Death handler error: {e}")
-            return False
+        diff = float(cv2.mean(cv2.absdiff(self.prev, current))[0])
+        # Window applied here (phaseCorrelate's window argument may modify its inputs)
+        (dx, dy), _ = cv2.phaseCorrelate(self.prev * self.window, current * self.window)
+        self.prev = current
+
+        self.last_shift = (dx, dy)
+        self.last_diff = diff
+        moved = np.hypot(dx, dy) > Config.MOTION_MIN_SHIFT or diff > Config.MOTION_MIN_DIFF
+        if moved:
+            self.last_motion_time = timestamp
+        return moved
+
+    def sample(self):
+        """Capture MOTION_REGION and update (returns moved)"""
+        return self.update(self.screen_capture.capture_region(*self.geometry.motion_region))
+
+    def time_since_motion(self):
+        """Seconds since the last frame that showed movement"""
+        return time.time() - self.last_motion_time
 
 
 # ============================================================================
@@ -778,8 +3204,11 @@ class DeathDetector:
 class StuckDetector:
     """Detect and recover from stuck situations"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, input_controller=None, executor=None, geometry=None):
         self.logger = logger
+        self.input = input_controller or InputController()
+        self.executor = executor or ActionExecutor(logger, self.input)
+        self.geometry = geometry or ScreenGeometry()
         self.last_action_time = time.time()
         self.last_kill_time = time.time()  # Track last kill separately
         self.target_selected = False
@@ -789,6 +3218,15 @@ class StuckDetector:
         self.no_target_duration = 7.0  # Seconds since last kill before stuck (increased from 5.0)
         self.with_target_duration = 20.0  # Seconds with target but no progress (increased from 5s to give bot time to try multiple mobs)
         self.recovery_retry_delay = 2.0  # Seconds between recovery attempts
+        self.vision_recoveries = 0  # Recoveries steered by the detector
+        self.blocked_moves = 0  # Forward moves aborted because nothing moved
+        self.blocked_approaches = 0  # Engages aborted because the walk to the target stopped moving
+        self.approach_blocked = False  # Set by check_approach() - is_stuck() recovers on its next call
+        self.motion_estimator = None  # Set by MobHunter
+        # Vision-guided recovery (set by MobHunter)
+        self.screen_capture = None
+        self.detect_names = None  # Callable(screenshot) -> detections
+        self.cache = None
 
     def reset_timer(self):
         """Reset the action timer (called when progress is made)"""
@@ -806,6 +3244,7 @@ class StuckDetector:
         # Clear recovery state
         self.consecutive_recoveries = 0
         self.in_recovery_mode = False
+        self.approach_blocked = False
 
         self.logger.debug(f"Stuck detector: Kill recorded, timers reset")
 
@@ -818,6 +3257,139 @@ class StuckDetector:
         if old_status != has_target:
             self.reset_timer()
 
+    def move_forward(self, duration):
+        """
+        Hold 'up' for duration seconds while watching for motion
+        Returns False (and releases early) if the view stops moving for
+        MOTION_STUCK_TIME - character is blocked by terrain
+        """
+        if not (Config.MOTION_CHECK_ENABLED and self.motion_estimator):
+            self.input.hold('up', duration)
+            return True
+
+        self.motion_estimator.reset()
+
+        def still_moving():
+            self.motion_estimator.sample()
+            return self.motion_estimator.time_since_motion() < Config.MOTION_STUCK_TIME
+
+        if self.input.hold_while('up', duration, still_moving, Config.MOTION_SAMPLE_INTERVAL):
+            return True
+
+        self.blocked_moves += 1
+        self.logger.info(f"    ⛰️  No motion for {Config.MOTION_STUCK_TIME:.1f}s - blocked, stopping early")
+        return False
+
+    def start_approach(self):
+        """Start watching for motion while walking to a clicked target"""
+        if Config.MOTION_CHECK_ENABLED and self.motion_estimator:
+            self.motion_estimator.reset()
+
+    def check_approach(self):
+        """
+        Sample motion while walking to a target that hasn't taken damage yet
+        Returns True (blocked) after APPROACH_STUCK_TIME without motion -
+        is_stuck() then reports it right away instead of waiting out
+        with_target_duration
+        """
+        if not (Config.MOTION_CHECK_ENABLED and self.motion_estimator):
+            return False
+
+        self.motion_estimator.sample()
+        if self.motion_estimator.time_since_motion() < Config.APPROACH_STUCK_TIME:
+            return False
+
+        self.blocked_approaches += 1
+        self.approach_blocked = True
+        return True
+
+    def score_heading(self, detections):
+        """
+        Score a heading by its untried candidates
+        Each candidate not in the position cache adds 1 / (1 + distance / RECOVERY_DISTANCE_SCALE)
+        Returns (score, mean distance of untried candidates)
+        """
+        score = 0.0
+        distances = []
+        for det in detections:
+            if self.cache and self.cache.contains(det['center']):
+                continue
+            distance = det['distance_from_center']
+            score += 1.0 / (1.0 + distance / self.geometry.recovery_distance_scale)
+            distances.append(distance)
+
+        mean_distance = sum(distances) / len(distances) if distances else 0
+        return score, mean_distance
+
+    def vision_guided_recovery(self, move_time):
+        """
+        Rotate in RECOVERY_SCAN_HEADINGS steps, detect floating names at each
+        heading, then turn to the best-scoring heading and walk toward it
+        (walk time scales with how far away its candidates are).
+
+        Returns False (caller falls back to random movement) when disabled or
+        no heading shows any untried candidate.
+        """
+        if not (Config.VISION_RECOVERY_ENABLED and self.screen_capture and self.detect_names):
+            return False
+
+        headings = Config.RECOVERY_SCAN_HEADINGS
+        step_time = Config.RECOVERY_FULL_TURN_TIME / headings
+        direction = random.choice(['left', 'right'])
+        self.logger.info(f"Action: Vision scan ({headings} headings, turning {direction})")
+
+        scores = []
+        for heading in range(headings):
+            if heading > 0:
+                self.input.hold(direction, step_time)
+                self.input.sleep(Config.RECOVERY_SETTLE_TIME)
+
+            detections = self.detect_names(self.screen_capture.capture())
+            score, mean_distance = self.score_heading(detections)
+            if heading == 0:
+                # Candidates in the current view are what we got stuck on
+                score *= Config.RECOVERY_CURRENT_HEADING_WEIGHT
+            scores.append((score, mean_distance))
+            self.logger.info(f"  Heading {heading}: {len(detections)} names, score {score:.2f}")
+
+            # Good enough - no need to finish the full turn
+            if heading > 0 and score >= Config.RECOVERY_GOOD_SCORE:
+                break
+
+        best = max(range(len(scores)), key=lambda i: scores[i][0])
+        best_score, best_distance = scores[best]
+        if best_score <= 0:
+            self.logger.info("  No untried candidates in any direction - falling back to random movement")
+            return False
+
+        # Turn back to the best heading the short way round
+        current = len(scores) - 1
+        steps_back = current - best
+        if steps_back > 0:
+            if headings - steps_back < steps_back:
+                # Shorter to keep turning the same way round
+                self.input.hold(direction, (headings - steps_back) * step_time)
+            else:
+                opposite = 'right' if direction == 'left' else 'left'
+                self.input.hold(opposite, steps_back * step_time)
+            self.input.sleep(0.2)
+
+        if best_distance <= self.geometry.recovery_near_distance:
+            self.logger.info(f"✓ Best heading {best} (score {best_score:.2f}) - candidates close, no walk needed")
+        else:
+            # Farther candidates -> walk longer (capped at the escalated move time)
+            walk_time = min(move_time, move_time * best_distance / (self.geometry.width / 2))
+            walk_time = max(walk_time, 0.5)
+            self.logger.info(f"✓ Best heading {best} (score {best_score:.2f}) - walking {walk_time:.1f}s toward candidates")
+            blocked = not self.move_forward(walk_time)
+            self.input.sleep(0.2)
+            if blocked:
+                self.logger.info("  Path toward best heading is blocked - falling back to random movement")
+                return False
+
+        self.vision_recoveries += 1
+        return True
+
     def is_stuck(self):
         """
         Check if character is stuck
@@ -825,9 +3397,12 @@ class StuckDetector:
         Returns:
             (is_stuck, scenario_type) where scenario_type is:
             - 1: No target selected for 7+ seconds since last kill
-            - 2: Target selected but stuck for 5+ seconds (no kill)
+            - 2: Target selected but stuck for 5+ seconds (no kill), or the
+                 walk to the target stopped moving (check_approach)
             - None: Not stuck
         """
+        approach_blocked, self.approach_blocked = self.approach_blocked, False
+
         # If in recovery mode, continue recovery until kill
         if self.in_recovery_mode:
             elapsed = time.time() - self.last_action_time
@@ -837,6 +3412,12 @@ class StuckDetector:
                 return True, scenario
             return False, None
 
+        # Scenario 2 from motion: the character ran into terrain on the way to its target
+        if approach_blocked:
+            self.logger.warning("⚠️  STUCK DETECTED (Scenario 2): No motion while walking to the target")
+            self.in_recovery_mode = True
+            return True, 2
+
         # Scenario 1: Use time since last kill
         time_since_kill = time.time() - self.last_kill_time
 
@@ -909,102 +3490,89 @@ class StuckDetector:
             base_move_time = 2.0
             escalated_move_time = base_move_time + (attempt_multiplier * 0.5)  # Adds 0.5s per attempt
 
-            if scenario == 1:
-                # Scenario 1: No target - highly varied random movement
-                self.logger.info("Action: Random varied movement to explore new area")
+            with self.executor.running('recovery'):
+                # Look before walking: scan headings and head for untried candidates
+                if self.vision_guided_recovery(escalated_move_time):
+                    self.logger.info("="*70 + "\n")
+                    self.reset_timer()
+                    return True
+
+                if scenario == 1:
+                    # Scenario 1: No target - highly varied random movement
+                    self.logger.info("Action: Random varied movement to explore new area")
+
+                    # Randomize number of movement steps (2-4 steps)
+                    num_steps = random.randint(2, 4)
+                    self.logger.info(f"  Executing {num_steps} random movement steps...")
+
+                    for step in range(num_steps):
+                        # Random rotation direction and amount
+                        direction = random.choice(['left', 'right'])
+                        rotation_time = random.uniform(0.5, 2.5)  # Wide range
+
+                        self.logger.info(f"  Step {step+1}: Rotate {direction} ({rotation_time:.1f}s) + Forward ({escalated_move_time:.1f}s)")
+
+                        # Rotate
+                        self.input.hold(direction, rotation_time)
+                        self.input.sleep(0.2)
+
+                        # Move forward in that direction
+                        self.move_forward(escalated_move_time)
+                        self.input.sleep(0.2)
+
+                        # Random camera angle change (50% chance each step)
+                        if random.random() < 0.5:
+                            drag_distance = self.geometry.x(random.randint(-400, 400))
+                            self.logger.info(f"    Camera angle change ({drag_distance}px)")
+                            start_x, start_y = self.geometry.center
+                            self.input.drag((start_x, start_y), (start_x + drag_distance, start_y))
+                            self.input.sleep(0.2)
+
+                    self.logger.info(f"✓ Completed {num_steps} varied movements - exploring new area")
 
-                # Randomize number of movement steps (2-4 steps)
-                num_steps = random.randint(2, 4)
-                self.logger.info(f"  Executing {num_steps} random movement steps...")
+                elif scenario == 2:
+                    # Scenario 2: Has target but stuck - aggressive escape pattern
+                    self.logger.info("Action: Aggressive escape + random exploration")
 
-                for step in range(num_steps):
-                    # Random rotation direction and amount
+                    # Step 1: Turn around (escalated rotation for more variety)
                     direction = random.choice(['left', 'right'])
-                    rotation_time = random.uniform(0.5, 2.5)  # Wide range
-
-                    self.logger.info(f"  Step {step+1}: Rotate {direction} ({rotation_time:.1f}s) + Forward ({escalated_move_time:.1f}s)")
-
-                    # Rotate
-                    pyautogui.keyDown(direction)
-                    time.sleep(rotation_time)
-                    pyautogui.keyUp(direction)
-                    time.sleep(0.2)
-
-                    # Move forward in that direction
-                    pyautogui.keyDown('up')
-                    time.sleep(escalated_move_time)
-                    pyautogui.keyUp('up')
-                    time.sleep(0.2)
-
-                    # Random camera angle change (50% chance each step)
-                    if random.random() < 0.5:
-                        drag_distance = random.randint(-400, 400)
-                        self.logger.info(f"    Camera angle change ({drag_distance}px)")
-                        start_x = Config.SCREEN_WIDTH // 2
-                        start_y = Config.SCREEN_HEIGHT // 2
-                        pyautogui.moveTo(start_x, start_y)
-                        pyautogui.mouseDown(button='right')
-                        pyautogui.moveTo(start_x + drag_distance, start_y, duration=0.5)
-                        pyautogui.mouseUp(button='right')
-                        time.sleep(0.2)
-
-                self.logger.info(f"✓ Completed {num_steps} varied movements - exploring new area")
-
-            elif scenario == 2:
-                # Scenario 2: Has target but stuck - aggressive escape pattern
-                self.logger.info("Action: Aggressive escape + random exploration")
-
-                # Step 1: Turn around (escalated rotation for more variety)
-                direction = random.choice(['left', 'right'])
-                rotation_time = random.uniform(1.3, 2.5)  # More variation
-
-                self.logger.info(f"  Step 1: Turning {direction} ({rotation_time:.1f}s)...")
-                pyautogui.keyDown(direction)
-                time.sleep(rotation_time)
-                pyautogui.keyUp(direction)
-                time.sleep(0.2)
-
-                # Step 2: Move forward (escalated distance)
-                self.logger.info(f"  Step 2: Moving forward ({escalated_move_time:.1f}s)...")
-                pyautogui.keyDown('up')
-                time.sleep(escalated_move_time)
-                pyautogui.keyUp('up')
-                time.sleep(0.2)
-
-                # Step 3: Camera angle change
-                drag_distance = random.randint(-400, 400)
-                self.logger.info(f"  Step 3: Changing camera angle ({drag_distance}px)...")
-                start_x = Config.SCREEN_WIDTH // 2
-                start_y = Config.SCREEN_HEIGHT // 2
-                pyautogui.moveTo(start_x, start_y)
-                pyautogui.mouseDown(button='right')
-                pyautogui.moveTo(start_x + drag_distance, start_y, duration=0.5)
-                pyautogui.mouseUp(button='right')
-                time.sleep(0.3)
-
-                # Steps 4-5: Additional random movements (1-3 more steps)
-                extra_steps = random.randint(1, 3)
-                self.logger.info(f"  Steps 4+: {extra_steps} additional random movements...")
-
-                for i in range(extra_steps):
-                    # Random direction and rotation
-                    rand_direction = random.choice(['left', 'right'])
-                    rand_rotation = random.uniform(0.3, 1.5)
-                    rand_move_time = random.uniform(1.5, 3.0)
-
-                    self.logger.info(f"    Extra {i+1}: Rotate {rand_direction} ({rand_rotation:.1f}s) + Forward ({rand_move_time:.1f}s)")
-
-                    pyautogui.keyDown(rand_direction)
-                    time.sleep(rand_rotation)
-                    pyautogui.keyUp(rand_direction)
-                    time.sleep(0.1)
-
-                    pyautogui.keyDown('up')
-                    time.sleep(rand_move_time)
-                    pyautogui.keyUp('up')
-                    time.sleep(0.2)
-
-                self.logger.info(f"✓ Aggressive escape complete - should be in completely new area")
+                    rotation_time = random.uniform(1.3, 2.5)  # More variation
+
+                    self.logger.info(f"  Step 1: Turning {direction} ({rotation_time:.1f}s)...")
+                    self.input.hold(direction, rotation_time)
+                    self.input.sleep(0.2)
+
+                    # Step 2: Move forward (escalated distance)
+                    self.logger.info(f"  Step 2: Moving forward ({escalated_move_time:.1f}s)...")
+                    self.move_forward(escalated_move_time)
+                    self.input.sleep(0.2)
+
+                    # Step 3: Camera angle change
+                    drag_distance = self.geometry.x(random.randint(-400, 400))
+                    self.logger.info(f"  Step 3: Changing camera angle ({drag_distance}px)...")
+                    start_x, start_y = self.geometry.center
+                    self.input.drag((start_x, start_y), (start_x + drag_distance, start_y))
+                    self.input.sleep(0.3)
+
+                    # Steps 4-5: Additional random movements (1-3 more steps)
+                    extra_steps = random.randint(1, 3)
+                    self.logger.info(f"  Steps 4+: {extra_steps} additional random movements...")
+
+                    for i in range(extra_steps):
+                        # Random direction and rotation
+                        rand_direction = random.choice(['left', 'right'])
+                        rand_rotation = random.uniform(0.3, 1.5)
+                        rand_move_time = random.uniform(1.5, 3.0)
+
+                        self.logger.info(f"    Extra {i+1}: Rotate {rand_direction} ({rand_rotation:.1f}s) + Forward ({rand_move_time:.1f}s)")
+
+                        self.input.hold(rand_direction, rand_rotation)
+                        self.input.sleep(0.1)
+
+                        self.move_forward(rand_move_time)
+                        self.input.sleep(0.2)
+
+                    self.logger.info(f"✓ Aggressive escape complete - should be in completely new area")
 
             self.logger.info("="*70 + "\n")
 
@@ -1014,6 +3582,10 @@ class StuckDetector:
 
             return True
 
+        except ActionPreempted:
+            return False  # Retreat took over - next recovery attempt after the retry delay
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
         except Exception as e:
             self.logger.error(f"Stuck recovery error: {e}")
             return False
@@ -1023,15 +3595,127 @@ class StuckDetector:
 # COMBAT SYSTEM WITH HEALTH MONITORING
 # ============================================================================
 
+class SkillScheduler:
+    """
+    Pick the next skill from per-skill cooldowns and values
+
+    Cast times are tracked locally (Config.SKILLS). With
+    SKILL_BAR_CHECK_ENABLED the skill bar is read as well: a slot icon
+    darkened by the cooldown overlay is not ready even if the local timer
+    says so (cooldown reductions, casts that did not go off).
+    """
+
+    def __init__(self, logger, screen_capture=None, geometry=None):
+        self.logger = logger
+        self.screen_capture = screen_capture
+        self.geometry = geometry or ScreenGeometry()
+        self.last_cast = {}  # key -> time of last cast
+
+    def get_skill(self, key):
+        """(cooldown, cast_time, value) for a skill key"""
+        return Config.SKILLS.get(key, (0.0, Config.SKILL_ANIMATION_TIME, 1))
+
+    def cast_time(self, key):
+        """Seconds the skill animation locks the character"""
+        return self.get_skill(key)[1]
+
+    def remaining(self, key, now=None):
+        """Seconds until the skill is off cooldown (local timer)"""
+        if now is None:
+            now = time.time()
+        cooldown = self.get_skill(key)[0]
+        return max(0.0, self.last_cast.get(key, 0) + cooldown - now)
+
+    def mark_cast(self, key, timestamp=None):
+        """Start a skill's cooldown"""
+        self.last_cast[key] = timestamp if timestamp is not None else time.time()
+
+    def reset(self):
+        """Forget all cooldowns (e.g. after revive)"""
+        self.last_cast = {}
+
+    def read_skill_bar(self):
+        """
+        Readiness per skill key from the skill bar ROI
+        Returns {key: ready} or None when the check is disabled / fails
+        """
+        if not (Config.SKILL_BAR_CHECK_ENABLED and self.screen_capture):
+            return None
+
+        try:
+            bar = self.screen_capture.capture_region(*self.geometry.skill_bar_region)
+            value = cv2.cvtColor(bar, cv2.COLOR_BGR2HSV)[:, :, 2]
+            ready = {}
+            slot_width = self.geometry.skill_slot_width
+            for slot, key in enumerate(Config.SKILL_KEYS):
+                icon = value[:, slot * slot_width:(slot + 1) * slot_width]
+                if icon.size:
+                    ready[key] = float(icon.mean()) >= Config.SKILL_READY_BRIGHTNESS
+            return ready
+
+        except Exception as e:
+            self.logger.debug(f"Skill bar read failed: {e}")
+            return None
+
+    def next_skill(self):
+        """
+        Choose what to do next
+        Returns (key, 0.0) for the highest-value ready skill, or
+        (None, wait) with the seconds until the first skill comes off cooldown
+        """
+        now = time.time()
+        ready = [key for key in Config.SKILL_KEYS if self.remaining(key, now) == 0]
+
+        bar = self.read_skill_bar()
+        if bar is not None:
+            ready = [key for key in ready if bar.get(key, True)]
+
+        if ready:
+            return max(ready, key=lambda key: self.get_skill(key)[2]), 0.0
+
+        wait = min(self.remaining(key, now) for key in Config.SKILL_KEYS)
+        # Timers say ready but the bar disagrees - poll again shortly
+        return None, wait if wait > 0 else Config.SKILL_MAX_WAIT
+
+
 class CombatSystem:
     """Handle combat with live health monitoring"""
     
-    def __init__(self, logger, nameplate_reader):
+    def __init__(self, logger, nameplate_reader, input_controller=None, executor=None):
         self.logger = logger
         self.nameplate_reader = nameplate_reader
+        self.input = input_controller or InputController()
+        self.executor = executor or ActionExecutor(logger, self.input)
+        self.skills = SkillScheduler(logger, nameplate_reader.screen_capture, nameplate_reader.geometry)
         self.total_kills = 0
         self.skills_used = 0
         self.early_stops = 0  # Times we stopped rotation early due to death
+        self.potions_used = 0
+        self.retreats = 0
+        self.last_potion_time = 0
+        self.stuck_detector = None  # Set by MobHunter - watches motion on the way to the target
+
+    def on_low_health(self, fraction, time_to_death):
+        """
+        PlayerHealthTracker subscriber (runs on the watchdog thread)
+        Both are handed to the executor - the watchdog never presses keys
+        itself, a key press can wait on the focus lock of another window.
+        The potion runs on the control thread before the next cast (or
+        interrupts buffering); retreat preempts the running action
+        (combat, buffer, recovery)
+        """
+        now = time.time()
+        if Config.HP_POTION_KEY and now - self.last_potion_time >= Config.HP_POTION_COOLDOWN:
+            if self.executor.preempt('potion', [(Config.HP_POTION_KEY, 0, 0)]):
+                self.last_potion_time = now
+                self.potions_used += 1
+                self.logger.info(f"🧪 Potion ({Config.HP_POTION_KEY}) queued at {fraction*100:.0f}% HP")
+
+        if Config.HP_RETREAT_SEQUENCE and time_to_death < Config.HP_RETREAT_TTD:
+            steps = [(key, hold_time, 0) for key, hold_time in Config.HP_RETREAT_SEQUENCE]
+            if self.executor.preempt('retreat', steps):
+                self.retreats += 1
+                self.logger.warning("🏃 Retreating (health dropping too fast)")
     
     def engage(self, target_info):
         """
@@ -1050,43 +3734,69 @@ class CombatSystem:
             # Initial health check
             initial_health = self.nameplate_reader.get_health_pixels()
 
-            if initial_health <= Config.RED_PIXEL_THRESHOLD:
+            if initial_health <= self.nameplate_reader.geometry.red_pixel_threshold:
                 self.logger.info("✗ Mob already dead, skipping")
                 return False
 
-            self.logger.debug(f"    Initial health: {initial_health} red pixels")
+            if Config.DEBUG_MODE:
+                self.logger.debug(f"    Initial health: {initial_health} red pixels")
 
             # Track health changes to detect if we're actually hitting the mob
             health_history = [initial_health]
 
-            # Combat rotation with health checks
-            for i, skill_key in enumerate(Config.SKILL_KEYS, 1):
-                # Use skill
-                self.logger.info(f"  → Skill {i}: {skill_key}")
-                pyautogui.press(skill_key)
-                self.skills_used += 1
-
-                # Wait for skill animation
-                time.sleep(Config.SKILL_ANIMATION_TIME)
-
-                # Wait additional time to reach 1 second check interval
-                time.sleep(Config.HEALTH_CHECK_INTERVAL - Config.SKILL_ANIMATION_TIME)
+            # Until the first hit lands the character is still walking to the mob
+            approaching = self.stuck_detector is not None
+            if approaching:
+                self.stuck_detector.start_approach()
+
+            # Cooldown-aware rotation with a health check after every cast
+            rotation_end = time.time() + Config.COMBAT_ROTATION_TIME
+            casts = 0
+            while time.time() < rotation_end:
+                # A potion queued by the low-health alert goes between casts
+                self.executor.run_due()
+                skill_key, wait = self.skills.next_skill()
+                if skill_key is None:
+                    # Everything on cooldown - wait (bounded) and re-check the mob
+                    if Config.DEBUG_MODE:
+                        self.logger.debug(f"    All skills on cooldown ({wait:.1f}s)")
+                    steps = [(None, 0, min(wait, Config.SKILL_MAX_WAIT))]
+                else:
+                    casts += 1
+                    self.logger.info(f"  → Skill {casts}: {skill_key}")
+                    self.skills_used += 1
+                    self.skills.mark_cast(skill_key)
+                    steps = [(skill_key, 0, self.skills.cast_time(skill_key))]
+
+                # A low-health retreat preempts the rotation here
+                if not self.executor.execute('combat', steps):
+                    self.logger.info(f"{'<'*60}\n")
+                    return False
 
                 # Check current health
                 current_health = self.nameplate_reader.get_health_pixels()
                 health_history.append(current_health)
 
                 # Check if mob still alive
-                if current_health <= Config.RED_PIXEL_THRESHOLD:
-                    self.logger.info(f"  ✓ Mob DEAD after skill {i}!")
+                if current_health <= self.nameplate_reader.geometry.red_pixel_threshold:
+                    self.logger.info(f"  ✓ Mob DEAD after skill {casts}!")
                     self.total_kills += 1
                     self.early_stops += 1
                     self.logger.info(f"{'<'*60}")
-                    self.logger.info(f"💀 Total kills: {self.total_kills} | Skills saved: {4-i}")
+                    self.logger.info(f"💀 Total kills: {self.total_kills} | Skills used: {casts}")
                     self.logger.info(f"{'<'*60}\n")
                     return True
                 else:
-                    self.logger.debug(f"    Health check: {current_health} red pixels -> ALIVE")
+                    if Config.DEBUG_MODE:
+                        self.logger.debug(f"    Health check: {current_health} red pixels -> ALIVE")
+
+                if approaching:
+                    if initial_health - current_health >= self.nameplate_reader.geometry.health_change_threshold:
+                        approaching = False
+                    elif self.stuck_detector.check_approach():
+                        self.logger.warning(f"  ⛰️  No motion and no damage for {Config.APPROACH_STUCK_TIME:.1f}s - can't reach mob")
+                        self.logger.info(f"{'<'*60}\n")
+                        return False
 
             # Rotation complete - check if health actually decreased
             final_health = health_history[-1]
@@ -1094,7 +3804,8 @@ class CombatSystem:
             min_health = min(health_history)
             health_decreased = max_health - min_health
 
-            self.logger.debug(f"    Health change: {initial_health} → {final_health} (Δ={initial_health - final_health})")
+            if Config.DEBUG_MODE:
+                self.logger.debug(f"    Health change: {initial_health} → {final_health} (Δ={initial_health - final_health})")
 
             # Calculate percentage of health decreased
             if initial_health > 0:
@@ -1109,7 +3820,7 @@ class CombatSystem:
             MIN_ABSOLUTE_DECREASE = 5       # At least 5 pixels
 
             is_stuck = (health_decrease_percentage < MIN_PERCENTAGE_DECREASE and
-                       health_decreased < Config.HEALTH_CHANGE_THRESHOLD)
+                       health_decreased < self.nameplate_reader.geometry.health_change_threshold)
 
             if is_stuck:
                 self.logger.warning(f"  ⚠️  Health barely changed ({initial_health} → {final_health}, {health_decrease_percentage:.1f}%) - NOT hitting mob!")
@@ -1126,6 +3837,8 @@ class CombatSystem:
 
             return True
 
+        except ActionCancelled:
+            raise  # Interrupts propagate to the main loop
         except Exception as e:
             self.logger.error(f"Combat error: {e}")
             return False
@@ -1138,8 +3851,9 @@ class CombatSystem:
 class OverlayWindow:
     """Display detection overlay with transparent background and click-through"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, geometry=None):
         self.logger = logger
+        self.geometry = geometry or ScreenGeometry()
         self.running = False
         self.visible = True  # Overlay visibility (can be toggled with Tab key)
         self.current_frame = None
@@ -1232,6 +3946,124 @@ class OverlayWindow:
             self.logger.error(f"Failed to make window click-through: {e}")
             return False
     
+    def render(self):
+        """Draw the overlay image (detections, regions, stats) - black is transparent"""
+        # Create BLACK background (will be transparent)
+        # Same dimensions as screen for perfect alignment
+        display = np.zeros((self.geometry.height, self.geometry.width, 3), dtype=np.uint8)
+
+        # Only draw elements if overlay is visible
+        if self.visible:
+            # Draw screen center crosshair
+            center_x, center_y = self.geometry.center
+            cv2.line(display, (center_x - 30, center_y), (center_x + 30, center_y), (0, 255, 255), 2)
+            cv2.line(display, (center_x, center_y - 30), (center_x, center_y + 30), (0, 255, 255), 2)
+            cv2.circle(display, (center_x, center_y), 100, (0, 255, 255), 1)
+
+            # Draw player health bar region (top-left nameplate)
+            player_hb_x, player_hb_y, player_hb_w, player_hb_h = self.geometry.player_health_bar_region
+            cv2.rectangle(display,
+                        (player_hb_x, player_hb_y),
+                        (player_hb_x + player_hb_w, player_hb_y + player_hb_h),
+                        (0, 255, 0), 2)  # Green outline for player
+            cv2.putText(display, "PLAYER HP", (player_hb_x, player_hb_y - 5),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+
+            # Draw mob health bar region (within nameplate at top-center)
+            # Nameplate region
+            nameplate_x, nameplate_y, nameplate_w, nameplate_h = self.geometry.nameplate_region
+            cv2.rectangle(display,
+                        (nameplate_x, nameplate_y),
+                        (nameplate_x + nameplate_w, nameplate_y + nameplate_h),
+                        (100, 100, 100), 1)  # Gray outline for full nameplate
+
+            # Health bar sub-region within nameplate (same region get_health_pixels() reads)
+            bar_x, bar_y, mob_hb_w, mob_hb_h = self.geometry.mob_health_bar_region
+            mob_hb_x = nameplate_x + bar_x
+            mob_hb_y = nameplate_y + bar_y
+
+            cv2.rectangle(display,
+                        (mob_hb_x, mob_hb_y),
+                        (mob_hb_x + mob_hb_w, mob_hb_y + mob_hb_h),
+                        (0, 255, 255), 2)  # Cyan outline for mob health bar
+            cv2.putText(display, "MOB HP (Yellow/Orange)", (mob_hb_x, mob_hb_y - 5),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+
+            # Draw detections with distance indicators
+            for i, det in enumerate(self.detections, 1):
+                x, y, w, h = det['region']
+                center = det['center']
+                distance = det.get('distance_from_center', 0)
+
+                # Color based on distance (green = close, red = far)
+                color_intensity = min(255, int(distance / 3))
+                color = (0, 255 - color_intensity, color_intensity)
+
+                # Draw box around detected name
+                cv2.rectangle(display, (x, y), (x+w, y+h), color, 2)
+
+                # Draw center dot
+                cv2.circle(display, center, 5, (0, 0, 255), -1)
+
+                # Draw line from detection to screen center
+                cv2.line(display, center, (center_x, center_y), (100, 100, 100), 1)
+
+                # Draw distance label with background for readability
+                dist_text = f"#{i} D:{int(distance)}"
+                (text_width, text_height), baseline = cv2.getTextSize(dist_text, cv2.FONT_HERSHEY_SIMPLEX, 0.4, 1)
+
+                # Draw dark background rectangle behind text
+                padding = 2
+                cv2.rectangle(display,
+                            (x - padding, y - text_height - 8 - padding),
+                            (x + text_width + padding, y - 5 + padding),
+                            (50, 50, 50), -1)  # Dark gray background
+
+                # Colored text
+                cv2.putText(display, dist_text, (x, y-5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+
+            # Draw stats in top-left corner (smaller, green only, not bold)
+            y_pos = 25
+            for key, value in self.stats.items():
+                text = f"{key}: {value}"
+                # Green color only (no orange for paused)
+                text_color = (0, 255, 0)
+
+                # Get text size for background rectangle (smaller font: 0.45 instead of 0.6)
+                (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)
+
+                # Draw dark background rectangle behind text for readability
+                padding = 4
+                cv2.rectangle(display,
+                            (5, y_pos - text_height - padding),
+                            (10 + text_width, y_pos + padding),
+                            (50, 50, 50), -1)  # Dark gray background
+
+                # Green text only (no white outline, not bold - thickness 1)
+                cv2.putText(display, text, (8, y_pos),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.45, text_color, 1)
+                y_pos += 22
+
+        # Draw large PAUSED overlay if paused
+        if 'Status' in self.stats and 'PAUSED' in str(self.stats.get('Status', '')):
+            # Large PAUSED text
+            text = "PAUSED"
+            font_scale = 3
+            thickness = 5
+            (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+            text_x = (self.geometry.width - text_width) // 2
+            text_y = (self.geometry.height + text_height) // 2
+
+            # White outline
+            cv2.putText(display, text, (text_x + 2, text_y + 2),
+                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness + 2)
+            # Orange text
+            cv2.putText(display, text, (text_x, text_y),
+                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 165, 255), thickness)
+
+        return display
+
     def _run(self):
         """Overlay rendering loop with transparent background"""
         try:
@@ -1244,127 +4076,7 @@ class OverlayWindow:
 
             while self.running:
                 try:
-                    # Create BLACK background (will be transparent)
-                    # Same dimensions as screen for perfect alignment
-                    display = np.zeros((Config.SCREEN_HEIGHT, Config.SCREEN_WIDTH, 3), dtype=np.uint8)
-
-                    # Only draw elements if overlay is visible
-                    if self.visible:
-                        # Draw screen center crosshair
-                        center_x = Config.SCREEN_WIDTH // 2
-                        center_y = Config.SCREEN_HEIGHT // 2
-                        cv2.line(display, (center_x - 30, center_y), (center_x + 30, center_y), (0, 255, 255), 2)
-                        cv2.line(display, (center_x, center_y - 30), (center_x, center_y + 30), (0, 255, 255), 2)
-                        cv2.circle(display, (center_x, center_y), 100, (0, 255, 255), 1)
-
-                        # Draw player health bar region (top-left nameplate)
-                        player_hb_x, player_hb_y, player_hb_w, player_hb_h = Config.PLAYER_HEALTH_BAR_REGION
-                        cv2.rectangle(display,
-                                    (player_hb_x, player_hb_y),
-                                    (player_hb_x + player_hb_w, player_hb_y + player_hb_h),
-                                    (0, 255, 0), 2)  # Green outline for player
-                        cv2.putText(display, "PLAYER HP", (player_hb_x, player_hb_y - 5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-
-                        # Draw mob health bar region (within nameplate at top-center)
-                        # Nameplate region
-                        nameplate_x, nameplate_y, nameplate_w, nameplate_h = Config.NAMEPLATE_REGION
-                        cv2.rectangle(display,
-                                    (nameplate_x, nameplate_y),
-                                    (nameplate_x + nameplate_w, nameplate_y + nameplate_h),
-                                    (100, 100, 100), 1)  # Gray outline for full nameplate
-
-                        # Health bar sub-region within nameplate
-                        # MUST match coordinates from get_health_pixels()
-                        health_bar_y_start = 30  # Updated to match actual health bar position
-                        health_bar_y_end = 45
-                        health_bar_x_start = 80
-                        health_bar_x_end = 520
-
-                        mob_hb_x = nameplate_x + health_bar_x_start
-                        mob_hb_y = nameplate_y + health_bar_y_start
-                        mob_hb_w = health_bar_x_end - health_bar_x_start
-                        mob_hb_h = health_bar_y_end - health_bar_y_start
-
-                        cv2.rectangle(display,
-                                    (mob_hb_x, mob_hb_y),
-                                    (mob_hb_x + mob_hb_w, mob_hb_y + mob_hb_h),
-                                    (0, 255, 255), 2)  # Cyan outline for mob health bar
-                        cv2.putText(display, "MOB HP (Yellow/Orange)", (mob_hb_x, mob_hb_y - 5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
-
-                        # Draw detections with distance indicators
-                        for i, det in enumerate(self.detections, 1):
-                            x, y, w, h = det['region']
-                            center = det['center']
-                            distance = det.get('distance_from_center', 0)
-
-                            # Color based on distance (green = close, red = far)
-                            color_intensity = min(255, int(distance / 3))
-                            color = (0, 255 - color_intensity, color_intensity)
-
-                            # Draw box around detected name
-                            cv2.rectangle(display, (x, y), (x+w, y+h), color, 2)
-
-                            # Draw center dot
-                            cv2.circle(display, center, 5, (0, 0, 255), -1)
-
-                            # Draw line from detection to screen center
-                            cv2.line(display, center, (center_x, center_y), (100, 100, 100), 1)
-
-                            # Draw distance label with background for readability
-                            dist_text = f"#{i} D:{int(distance)}"
-                            (text_width, text_height), baseline = cv2.getTextSize(dist_text, cv2.FONT_HERSHEY_SIMPLEX, 0.4, 1)
-
-                            # Draw dark background rectangle behind text
-                            padding = 2
-                            cv2.rectangle(display,
-                                        (x - padding, y - text_height - 8 - padding),
-                                        (x + text_width + padding, y - 5 + padding),
-                                        (50, 50, 50), -1)  # Dark gray background
-
-                            # Colored text
-                            cv2.putText(display, dist_text, (x, y-5),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
-
-                        # Draw stats in top-left corner (smaller, green only, not bold)
-                        y_pos = 25
-                        for key, value in self.stats.items():
-                            text = f"{key}: {value}"
-                            # Green color only (no orange for paused)
-                            text_color = (0, 255, 0)
-
-                            # Get text size for background rectangle (smaller font: 0.45 instead of 0.6)
-                            (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)
-
-                            # Draw dark background rectangle behind text for readability
-                            padding = 4
-                            cv2.rectangle(display,
-                                        (5, y_pos - text_height - padding),
-                                        (10 + text_width, y_pos + padding),
-                                        (50, 50, 50), -1)  # Dark gray background
-
-                            # Green text only (no white outline, not bold - thickness 1)
-                            cv2.putText(display, text, (8, y_pos),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.45, text_color, 1)
-                            y_pos += 22
-
-                    # Draw large PAUSED overlay if paused
-                    if 'Status' in self.stats and 'PAUSED' in str(self.stats.get('Status', '')):
-                        # Large PAUSED text
-                        text = "PAUSED"
-                        font_scale = 3
-                        thickness = 5
-                        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
-                        text_x = (Config.SCREEN_WIDTH - text_width) // 2
-                        text_y = (Config.SCREEN_HEIGHT + text_height) // 2
-
-                        # White outline
-                        cv2.putText(display, text, (text_x + 2, text_y + 2),
-                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness + 2)
-                        # Orange text
-                        cv2.putText(display, text, (text_x, text_y),
-                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 165, 255), thickness)
+                    display = self.render()
 
                     # Show overlay
                     cv2.imshow(self.window_name, display)
@@ -1396,47 +4108,110 @@ class OverlayWindow:
 class MobHunter:
     """Main bot controller with center-out targeting"""
     
-    def __init__(self):
-        self.logger, self.log_dir = setup_logger()
+    def __init__(self, instance_name=None, region=None, hwnd=None, focus_scheduler=None,
+                 detection_pool=None, profile=None):
+        """
+        Single-window mode: MobHunter() captures Config.SCREEN_REGION.
+        Multi-client mode: MultiInstanceHunter passes the window's name, capture
+        region, hwnd, the shared FocusScheduler and the shared DetectionProcessPool -
+        every instance still has its own capture, cache, detectors and stats.
+        Settings are loaded before (load_settings); with its SettingsProfile
+        the profile is hot-reloaded between cycles (multi-client: the
+        orchestrator polls it and queues the changes).
+        """
+        self.instance_name = instance_name
+        self.region = region or Config.SCREEN_REGION
+        self.logger, self.log_dir = setup_logger(instance_name)
         self.logger.info("="*70)
         self.logger.info("MOB HUNTER v3.0 - CENTER-OUT + BINARY HEALTH")
         self.logger.info("="*70)
         self.logger.info(f"Log directory: {self.log_dir}")
-        self.logger.info(f"Screen: {Config.SCREEN_WIDTH}x{Config.SCREEN_HEIGHT}")
-        self.logger.info(f"Strategy: Attack closest to center first")
+        self.logger.info(f"Screen: {self.region['width']}x{self.region['height']} at ({self.region['left']}, {self.region['top']})")
+        self.profile = profile
+        if self.profile is not None:
+            self.profile.logger = self.logger  # Reloads are logged to this session
+        # Every ROI, size filter and threshold scaled once to this window's size
+        self.geometry = ScreenGeometry(self.region['width'], self.region['height'])
+        if not self.geometry.is_base():
+            self.logger.info(f"Geometry: {Config.BASE_WIDTH}x{Config.BASE_HEIGHT} layout scaled "
+                             f"x{self.geometry.scale_x:.3f} / y{self.geometry.scale_y:.3f}")
+        self.logger.info(f"Strategy: Attack best expected kills/s first (distance, pet odds, area success)")
         self.logger.info(f"Health: Binary (ALIVE/DEAD) detection")
         self.logger.info(f"Pet Filter: Via nameplate class detection")
         self.logger.info("="*70)
         
         # Components
-        self.screen_capture = ScreenCapture()
-        self.detector = FloatingNameDetector(self.logger)
-        self.cache = PositionCache(self.logger)
-        self.nameplate_reader = NameplateReader(self.logger, self.screen_capture)
-        self.combat = CombatSystem(self.logger, self.nameplate_reader)
-        self.buffer = BufferSystem(self.logger)
-        self.death_detector = DeathDetector(self.logger)
+        self.screen_capture = ScreenCapture(self.region)
+        self.input = InputController(self.region, hwnd, focus_scheduler)
+        self.executor = ActionExecutor(self.logger, self.input)
+        self.cv_pool = CVWorkerPool(self.logger)
+        self.detector = FloatingNameDetector(self.logger, self.cv_pool, self.geometry)
+        self.pet_classifier = FloatingNameClassifier(self.logger, self.geometry)
+        self.prefiltered_pets = 0  # Names dropped by the pre-classifier (clicks saved)
+        self.explored_pets = 0  # Names the pre-classifier would drop, clicked anyway (PET_EXPLORE_RATE)
+        self.false_drops = 0  # Explored names that were mobs
+        self.target_scorer = TargetScorer(self.logger, self.geometry)
+        self.dataset = DatasetRecorder(self.logger, os.path.basename(self.log_dir)) if Config.DATASET_ENABLED else None
+        # Optional process-pool detection (shared pool in multi-client mode)
+        self.detection_pool = detection_pool
+        self.owns_detection_pool = False
+        if self.detection_pool is None and Config.DETECTION_PROCESSES > 0:
+            self.detection_pool = DetectionProcessPool(self.logger)
+            self.owns_detection_pool = True
+        self.cache = PositionCache(self.logger, self.geometry)
+        self.nameplate_reader = NameplateReader(self.logger, self.screen_capture, self.cv_pool, self.input,
+                                                self.geometry)
+        self.combat = CombatSystem(self.logger, self.nameplate_reader, self.input, self.executor)
+        self.buffer = BufferSystem(self.logger, self.input, self.executor)
+        self.death_detector = DeathDetector(self.logger, self.input, self.executor, self.geometry)
         self.death_detector.buffer_system = self.buffer  # Link buffer system for cooldown checking
-        self.stuck_detector = StuckDetector(self.logger)
+        self.stuck_detector = StuckDetector(self.logger, self.input, self.executor, self.geometry)
         self.death_detector.stuck_detector = self.stuck_detector  # Link stuck detector for timer reset
-        self.overlay = OverlayWindow(self.logger)
+        self.combat.stuck_detector = self.stuck_detector  # Motion check on the way to a target
+        self.health_tracker = PlayerHealthTracker(self.logger)
+        if Config.HP_RESPONSE_ENABLED:
+            self.health_tracker.subscribe(self.combat.on_low_health)
+            self.health_tracker.subscribe(self.buffer.on_low_health)
+        # Stuck recovery steers with the detector
+        self.stuck_detector.screen_capture = self.screen_capture
+        self.stuck_detector.detect_names = self.find_floating_names
+        self.stuck_detector.cache = self.cache
+        self.stuck_detector.motion_estimator = MotionEstimator(self.logger, self.screen_capture, self.geometry)
+        # Buff state read from the buff bar (only with icon templates)
+        if Config.BUFF_ICON_CHECK_ENABLED:
+            buff_reader = BuffBarReader(self.logger, self.screen_capture, self.geometry)
+            if buff_reader.is_available():
+                self.buffer.buff_reader = buff_reader
+        self.death_watchdog = DeathWatchdog(self.logger, self.screen_capture, self.death_detector, self.input,
+                                            self.health_tracker)
+        self.overlay = OverlayWindow(self.logger, self.geometry)
 
         self.cycle = 0
         self.running = True
         self.paused = False
         self.start_time = time.time()
         self.just_resumed = False  # Track if just resumed (skip death detection)
+        self.resume_pending = False  # Resume work (buffer + overlay) runs on the bot's own thread
+        self.settings_lock = threading.Lock()
+        self.pending_settings = {}  # Reloaded Config key -> value before, applied at the start of the next pass
 
-        # Start global keyboard listener
-        self.keyboard_listener = start_keyboard_listener()
+        # Start global keyboard listener (multi-client hotkeys belong to the orchestrator)
+        self.keyboard_listener = start_keyboard_listener() if instance_name is None else None
+
+        # Structured per-cycle record (filled by run_cycle, written to cycles.jsonl)
+        self.records_logger = logging.getLogger(f"{self.logger.name}.records")
+        self.cycle_record = None
 
         # Screenshot counters
+        self.screenshot_writer = ScreenshotWriter(self.logger, f"{self.log_dir}/screenshots")
+        self.blackbox = (BlackBoxRecorder(self.logger, f"{self.log_dir}/blackbox", self.screen_capture)
+                         if Config.BLACKBOX_ENABLED else None)
         self.screenshot_counter = 0
         self.periodic_screenshot_count = 0  # Track random periodic screenshots
 
     def save_screenshot(self, screenshot, event_type, extra_info=""):
         """
-        Save screenshot with meaningful filename
+        Save screenshot with meaningful filename (written by the background ScreenshotWriter)
 
         Args:
             screenshot: The image to save
@@ -1447,21 +4222,54 @@ class MobHunter:
             self.screenshot_counter += 1
             timestamp = datetime.now().strftime("%H%M%S")
 
-            # Create filename with context
+            # Create filename with context (extension comes from SCREENSHOT_FORMAT)
             if extra_info:
-                filename = f"{self.screenshot_counter:04d}_{timestamp}_{event_type}_{extra_info}.png"
+                filename = f"{self.screenshot_counter:04d}_{timestamp}_{event_type}_{extra_info}"
             else:
-                filename = f"{self.screenshot_counter:04d}_{timestamp}_{event_type}.png"
+                filename = f"{self.screenshot_counter:04d}_{timestamp}_{event_type}"
 
-            filepath = f"{self.log_dir}/screenshots/{filename}"
-            cv2.imwrite(filepath, screenshot)
-            self.logger.info(f"📸 Screenshot saved: {filename}")
+            self.screenshot_writer.save(screenshot, filename, self.geometry.screenshot_regions.get(event_type))
 
         except Exception as e:
             self.logger.error(f"Failed to save screenshot: {e}")
 
     def run(self):
         """Main loop with buffer system and pause/resume"""
+        self.startup()
+
+        try:
+            while self.running:
+                # Check for CapsLock toggle (global keyboard listener)
+                if check_capslock_toggle():
+                    self.toggle_pause()
+
+                # Check for 'O' key toggle (global keyboard listener)
+                if check_overlay_toggle():
+                    self.overlay.toggle_visibility()
+                    time.sleep(0.1)  # Small debounce delay
+
+                self.step()
+                
+        except KeyboardInterrupt:
+            self.logger.info("\n\n⛔ Bot stopped by user")
+        except Exception as e:
+            self.handle_fatal_error(e)
+        finally:
+            self.shutdown()
+
+    def run_instance(self):
+        """Instance loop for multi-client mode (hotkeys are handled by MultiInstanceHunter)"""
+        try:
+            self.startup()
+            while self.running:
+                self.step()
+        except Exception as e:
+            self.handle_fatal_error(e)
+        finally:
+            self.shutdown()
+
+    def startup(self):
+        """Log configuration, start overlay, revive if needed and run the initial buffer"""
         self.logger.info("\n🚀 Bot started! Press Ctrl+C to stop.\n")
         self.logger.info("💡 Controls: CapsLock = Pause/Resume | O = Toggle Overlay\n")
         self.logger.info("⌨️  Global keyboard listener active (works in any window)\n")
@@ -1474,12 +4282,15 @@ class MobHunter:
         self.logger.info(f"   Periodic Screenshots: {'✅ Enabled' if Config.SAVE_PERIODIC_SCREENSHOTS else '❌ Disabled'}")
         if Config.SAVE_PERIODIC_SCREENSHOTS:
             self.logger.info(f"   Screenshot Strategy: Random sampling (max {Config.MAX_PERIODIC_SCREENSHOTS} per session)")
-        self.logger.info(f"   Buffer Interval: {Config.BUFFER_INTERVAL}s")
+        self.logger.info(f"   Buffs: {', '.join(f'{key} ({duration}s)' for key, (duration, _) in Config.BUFFS.items())}")
+        self.logger.info(f"   CV Workers: {Config.CV_WORKERS if Config.CV_WORKERS > 1 else 'inline'}")
+        self.logger.info(f"   Detection Processes: {Config.DETECTION_PROCESSES if self.detection_pool else 'in-process'}")
         self.logger.info(f"   Overlay: {'✅ Enabled' if Config.SHOW_OVERLAY else '❌ Disabled'}")
         self.logger.info("")
 
-        # Start overlay
-        self.overlay.start()
+        # Start overlay (fullscreen overlay only makes sense for a single window)
+        if self.instance_name is None:
+            self.overlay.start()
 
         # Check if player is dead BEFORE initial buffer
         self.logger.info("\n🔍 Checking initial player status...")
@@ -1503,117 +4314,302 @@ class MobHunter:
         self.logger.info("\nRunning INITIAL buffer sequence...")
         self.buffer.run_buffer_sequence()
 
+        # Watch player HP from here on (also during combat/buffer/recovery)
+        self.death_watchdog.start()
+        if self.blackbox is not None:
+            self.blackbox.start()
+
+    def toggle_pause(self):
+        """Pause/resume (resume work is deferred to the bot's own thread)"""
+        self.paused = not self.paused
+        self.death_watchdog.active = not self.paused
+        if self.paused:
+            self.logger.info("\n⏸️  PAUSED - Press CapsLock to resume\n")
+        else:
+            self.logger.info("\n▶️  RESUMED - Refreshing expiring buffs...\n")
+            self.resume_pending = True
+
+    def queue_settings(self, changed):
+        """Reloaded settings ({key: value before}) to apply before the next cycle (any thread)"""
+        if changed:
+            with self.settings_lock:
+                for key, previous in changed.items():
+                    self.pending_settings.setdefault(key, previous)  # Keep the oldest value to roll back to
+
+    def reload_buff_templates(self):
+        """Reload buff icon templates (only with a buff bar reader)"""
+        if self.buffer.buff_reader:
+            self.buffer.buff_reader.templates = self.buffer.buff_reader.load_templates()
+
+    def apply_settings(self, changed):
+        """
+        Rebuild what the components precomputed from the reloaded keys only
+
+        changed maps each key to its value before the reload. If a rebuild
+        raises, all of them go back into Config and the components are
+        rebuilt from those, so one bad reload can't stop the bot.
+        """
+        rebuilds = [
+            (GEOMETRY_KEYS, 'geometry', self.geometry.update),
+            (NAMEPLATE_MASK_KEYS, 'nameplate masks', self.nameplate_reader.build_masks),
+            (PLAYER_MASK_KEYS, 'player health mask', self.death_detector.build_masks),
+            (BUFF_TEMPLATE_KEYS, 'buff templates', self.reload_buff_templates),
+        ]
+        rebuilt = []
+        for keys, name, rebuild in rebuilds:
+            if not keys.intersection(changed):
+                continue
+            try:
+                rebuild()
+            except Exception as e:
+                rejected = ', '.join(sorted(keys.intersection(changed)))
+                self.logger.error(f"❌ Settings reload rejected - rebuilding {name} from {rejected} failed: {e}")
+                for key, previous in changed.items():
+                    setattr(Config, key, previous)
+                for restore_keys, _, restore in rebuilds:
+                    if restore_keys.intersection(changed):
+                        restore()
+                if self.detection_pool is not None and not self.owns_detection_pool:
+                    self.detection_pool.update_settings(changed)  # The shared pool already got the new values
+                self.logger.warning(f"⚠️  Settings restored: {', '.join(sorted(changed))}")
+                return
+            rebuilt.append(name)
+
+        if self.owns_detection_pool:
+            self.detection_pool.update_settings(changed)
+
+        self.logger.info(f"🔄 Settings reloaded: {', '.join(sorted(changed))}"
+                         + (f" (rebuilt {', '.join(rebuilt)})" if rebuilt else ""))
+
+    def step(self):
+        """One pass of the main loop: settings reload, pause handling, buffer, detection cycle"""
         try:
-            while self.running:
-                # Check for CapsLock toggle (global keyboard listener)
-                if check_capslock_toggle():
-                    self.paused = not self.paused
-                    if self.paused:
-                        self.logger.info("\n⏸️  PAUSED - Press CapsLock to resume\n")
-                    else:
-                        self.logger.info("\n▶️  RESUMED - Running buffer sequence...\n")
-                        # Reset buffer timer and run sequence on resume
-                        self.buffer.reset_timer()
-                        self.buffer.run_buffer_sequence()
-                        # Set flag to skip death detection on next cycle
-                        self.just_resumed = True
-                        # Update overlay immediately to clear PAUSED text
-                        screenshot = self.screen_capture.capture()
-                        self.update_overlay(screenshot, [], 0, 0)
+            # Profile saved since the last pass - applied here, never in the middle of a cycle
+            if self.profile is not None:
+                self.queue_settings(self.profile.poll())
+            with self.settings_lock:
+                changed, self.pending_settings = self.pending_settings, {}
+            if changed:
+                self.apply_settings(changed)
+
+            if self.resume_pending:
+                self.resume_pending = False
+                # Buff timers kept running while paused - refresh whatever is expiring
+                if self.buffer.should_run_buffer(idle=True):
+                    self.buffer.run_buffer_sequence(idle=True)
+                # Set flag to skip death detection on next cycle
+                self.just_resumed = True
+                # Update overlay immediately to clear PAUSED text
+                screenshot = self.screen_capture.capture()
+                self.update_overlay(screenshot, [], 0, 0)
 
-                # Check for 'O' key toggle (global keyboard listener)
-                if check_overlay_toggle():
-                    self.overlay.toggle_visibility()
-                    time.sleep(0.1)  # Small debounce delay
+            # Skip cycle if paused, but update overlay
+            if self.paused:
+                # Update overlay with paused state
+                screenshot = self.screen_capture.capture()
+                self.update_overlay(screenshot, [], 0, 0)
+                time.sleep(0.1)  # Short sleep when paused
+                return
 
-                # Skip cycle if paused, but update overlay
-                if self.paused:
-                    # Update overlay with paused state
-                    screenshot = self.screen_capture.capture()
-                    self.update_overlay(screenshot, [], 0, 0)
-                    time.sleep(0.1)  # Short sleep when paused
-                    continue
+            # Actions queued by alerts while nothing was running (e.g. retreat)
+            self.executor.run_due()
 
-                # Check if buffer needs to run
-                if self.buffer.should_run_buffer():
-                    self.buffer.run_buffer_sequence()
+            # Buffs about to drop (idle-window refreshes happen after kills)
+            if self.buffer.should_run_buffer():
+                self.buffer.run_buffer_sequence(idle=False)
 
-                # Run detection cycle
-                self.cycle += 1
+            # Run detection cycle
+            self.cycle += 1
+            try:
                 self.run_cycle()
+            finally:
+                self.write_cycle_record()
 
-                time.sleep(Config.CYCLE_DELAY)
-                
-        except KeyboardInterrupt:
-            self.logger.info("\n\n⛔ Bot stopped by user")
-        except Exception as e:
-            self.logger.error(f"\n💥 FATAL ERROR: {e}")
-            self.logger.error(traceback.format_exc())
+            self.input.sleep(Config.CYCLE_DELAY)
 
-            # Save error screenshot if possible
-            if Config.SAVE_ERROR_SCREENSHOTS:
-                try:
-                    error_screenshot = self.screen_capture.capture()
-                    self.save_screenshot(error_screenshot, "ERROR", "fatal_error")
-                except:
-                    pass  # Don't crash while trying to save error screenshot
-        finally:
+        except ActionCancelled as e:
+            # Watchdog interrupted whatever was running - handle death right away
+            self.logger.warning(f"⛔ Action interrupted: {e}")
+            if self.death_watchdog.death_event.is_set():
+                screenshot = self.screen_capture.capture()
+                if self.blackbox is not None:
+                    self.blackbox.add_frame(screenshot)
+                self.handle_player_death(screenshot)
+            else:
+                self.input.clear_cancel()
+
+    def handle_player_death(self, screenshot):
+        """Revive, rebuff and re-arm the watchdog"""
+        self.logger.warning("⚠️  Player is dead - pausing hunting")
+
+        # Revive inputs must not be cancelled by the interrupt that got us here
+        # (death_event stays set, so the watchdog stays quiet until we re-arm it)
+        self.input.clear_cancel()
+        self.executor.clear()  # Queued actions (retreat) are pointless after death
+
+        # Save death screenshot + the history that led to it
+        if Config.SAVE_DEATH_SCREENSHOTS:
+            self.save_screenshot(screenshot, "DEATH", f"death_{self.death_detector.death_count + 1}")
+        self.dump_blackbox(f"death_{self.death_detector.death_count + 1}")
+
+        # Handle death and revive
+        if self.death_detector.handle_death():
+            self.logger.info("🔄 Running buffer sequence after revive...")
+            # Buffs are lost on death - recast all of them
+            self.buffer.reset_timer()
+            self.buffer.run_buffer_sequence()
+            # Cooldowns reset on revive - start the rotation from the top skill
+            self.combat.skills.reset()
+            self.logger.info("✅ Ready to resume hunting!")
+        else:
+            self.logger.error("❌ Revive failed - skipping cycle")
+
+        self.death_watchdog.acknowledge()
+
+    def handle_fatal_error(self, e):
+        """Log a fatal loop error and save an error screenshot if possible"""
+        self.logger.error(f"\n💥 FATAL ERROR: {e}")
+        self.logger.error(traceback.format_exc())
+        self.dump_blackbox("fatal_error")
+
+        # Save error screenshot if possible
+        if Config.SAVE_ERROR_SCREENSHOTS:
+            try:
+                error_screenshot = self.screen_capture.capture()
+                self.save_screenshot(error_screenshot, "ERROR", "fatal_error")
+            except:
+                pass  # Don't crash while trying to save error screenshot
+
+    def stage_done(self, stage, start):
+        """Add the time since start (perf_counter) to this cycle's stage timing, returns now"""
+        now = time.perf_counter()
+        timings = self.cycle_record['timings']
+        timings[stage] = timings.get(stage, 0.0) + now - start
+        return now
+
+    def format_cycle_record(self, record, pending_outcome):
+        """JSON line of a cycle record (outcome still None = pending_outcome)"""
+        record = dict(record, timings={stage: round(seconds * 1000, 1) for stage, seconds in record['timings'].items()})
+        if record['outcome'] is None:
+            record['outcome'] = pending_outcome
+        record['duration_ms'] = round((time.time() - record['time']) * 1000, 1)
+        return json.dumps(record, default=float)
+
+    def write_cycle_record(self):
+        """Queue this cycle's structured record for cycles.jsonl"""
+        record, self.cycle_record = self.cycle_record, None
+        if record is None:
+            return
+        line = self.format_cycle_record(record, 'interrupted')
+        self.records_logger.info(line)
+        if self.blackbox is not None:
+            self.blackbox.add_record(line)
+
+    def dump_blackbox(self, event, low_priority=False):
+        """Black box dump including the record of the cycle that triggered it (as it stands)"""
+        if self.blackbox is None:
+            return
+        current = self.format_cycle_record(self.cycle_record, 'in_progress') if self.cycle_record else None
+        self.blackbox.dump(event, current, low_priority)
+
+    def record_sample(self, target, info):
+        """Save the verified name crop with its click outcome (self-labelled dataset)"""
+        if self.dataset is None:
+            return
+        outcome = self.nameplate_reader.last_outcome
+        if outcome not in DatasetRecorder.OUTCOMES:
+            return  # Click error - no label
+        if outcome == 'mob' and not info.get('is_alive'):
+            outcome = 'dead'
+        self.dataset.record(target['crop'], target['features'], outcome, info.get('class') if info else None,
+                            target['pet_probability'], target['explore'])
+
+    def shutdown(self):
+        """Stop background threads and print statistics"""
+        if self.dataset is not None:
+            self.dataset.stop()
+        if self.instance_name is None:
             self.overlay.stop()
-            self.print_statistics()
+        self.death_watchdog.stop()
+        self.nameplate_reader.shutdown()
+        self.cv_pool.shutdown()
+        if self.owns_detection_pool:
+            self.detection_pool.shutdown()
+        self.screenshot_writer.stop()
+        if self.blackbox is not None:
+            self.blackbox.stop()
+        self.print_statistics()
+        stop_logger(self.logger)
     
     def run_cycle(self):
         """Single detection cycle with center-out targeting"""
+        self.cycle_record = {'cycle': self.cycle, 'time': round(time.time(), 3), 'timings': {},
+                             'detections': 0, 'targets': [], 'kills': 0, 'outcome': None}
         try:
             self.logger.info(f"\n{'='*70}")
             self.logger.info(f"CYCLE #{self.cycle}")
             self.logger.info(f"{'='*70}")
 
             # Capture
+            stage_start = time.perf_counter()
             screenshot = self.screen_capture.capture()
+            if self.blackbox is not None:
+                self.blackbox.add_frame(screenshot)
+            stage_start = self.stage_done('capture', stage_start)
 
             # Skip death detection if just resumed (avoid false positive from buff effects)
+            death_future = None
             if self.just_resumed:
                 self.logger.debug("Skipping death detection (just resumed)")
                 self.just_resumed = False  # Reset flag
             else:
-                # Check for death FIRST (highest priority)
-                if self.death_detector.is_player_dead(screenshot):
-                    self.logger.warning("⚠️  Player is dead - pausing hunting")
-
-                    # Save death screenshot
-                    if Config.SAVE_DEATH_SCREENSHOTS:
-                        self.save_screenshot(screenshot, "DEATH", f"death_{self.death_detector.death_count + 1}")
-
-                    # Handle death and revive
-                    if self.death_detector.handle_death():
-                        self.logger.info("🔄 Running buffer sequence after revive...")
-                        # Run buffer sequence after revival
-                        self.buffer.run_buffer_sequence()
-                        self.logger.info("✅ Ready to resume hunting!")
-                    else:
-                        self.logger.error("❌ Revive failed - skipping cycle")
+                # Death check runs on the CV pool while this thread detects names on the same frame
+                death_future = self.cv_pool.submit(self.death_detector.is_player_dead, screenshot)
 
-                    # Skip this cycle after death handling
-                    return
+            # Detect all floating names
+            detections = self.find_floating_names(screenshot)
+            stage_start = self.stage_done('detect', stage_start)
+
+            # Without the watchdog, track player HP once per cycle
+            if not self.death_watchdog.running and Config.DEATH_CHECK_ENABLED:
+                x, y, w, h = self.geometry.player_health_bar_region
+                self.health_tracker.add_sample(self.death_detector.get_health_red_mask(screenshot[y:y+h, x:x+w]))
+
+            # Check for death FIRST (highest priority) - watchdog may already have seen it
+            if self.death_watchdog.death_event.is_set() or (death_future is not None and death_future.result()):
+                self.cycle_record['outcome'] = 'death'
+                self.handle_player_death(screenshot)
+                # Skip this cycle after death handling
+                return
+            stage_start = self.stage_done('death_check', stage_start)
 
             # Check for stuck condition
+            was_recovering = self.stuck_detector.in_recovery_mode
             is_stuck, scenario = self.stuck_detector.is_stuck()
             if is_stuck:
+                self.cycle_record['stuck_scenario'] = scenario
+                if not was_recovering:
+                    # One dump per stuck episode - the retries would save the same history again
+                    self.dump_blackbox(f"stuck_scenario{scenario}", low_priority=True)
                 # Execute recovery action
                 if self.stuck_detector.recover_from_stuck(scenario):
                     self.logger.info("✅ Stuck recovery completed - continuing with detection")
                     # Don't return - continue with detection to check new location
                     # Capture new screenshot after movement
                     screenshot = self.screen_capture.capture()
+                    # Previous detections are stale after moving - detect again
+                    detections = self.find_floating_names(screenshot)
                 else:
                     self.logger.error("❌ Stuck recovery failed")
+                    self.cycle_record['outcome'] = 'stuck_failed'
                     return  # Skip cycle if recovery failed
+                stage_start = self.stage_done('stuck_recovery', stage_start)
 
-            # Detect all floating names
-            detections = self.detector.find_floating_names(screenshot)
             self.logger.info(f"Detected: {len(detections)} floating names")
+            self.cycle_record['detections'] = len(detections)
             
             if not detections:
+                self.cycle_record['outcome'] = 'no_names'
                 self.logger.info("→ No floating names found")
                 # Update stuck detector: no targets available
                 self.stuck_detector.set_target_status(False)
@@ -1622,44 +4618,104 @@ class MobHunter:
                 return
             
             # Filter cached positions
+            prefiltered_before = self.prefiltered_pets
+            self.target_scorer.update_tracks(detections)
             valid_targets = []
             for i, det in enumerate(detections, 1):
                 center = det['center']
                 
                 # Cache check only
                 if self.cache.is_recently_checked(center):
-                    self.logger.debug(f"  Name #{i}: Cached, skipping")
+                    if Config.DEBUG_MODE:
+                        self.logger.debug(f"  Name #{i}: Cached, skipping")
                     continue
                 
+                # Likely pet by name color/shape - don't spend a click
+                crop = self.pet_classifier.get_crop(screenshot, det)
+                features = self.pet_classifier.extract_features(crop)
+                pet_probability = 0.0
+                explore = False
+                if Config.PET_FILTER_ENABLED:
+                    pet_probability = self.pet_classifier.predict(features)
+                    if pet_probability >= Config.PET_DROP_PROBABILITY:
+                        # A few are clicked anyway so the dataset sees the filter's mistakes too
+                        explore = random.random() < Config.PET_EXPLORE_RATE
+                        if not explore:
+                            self.prefiltered_pets += 1
+                            if Config.DEBUG_MODE:
+                                self.logger.debug(f"  Name #{i}: Likely pet ({pet_probability:.2f}), skipping")
+                            continue
+                        self.explored_pets += 1
+                        if Config.DEBUG_MODE:
+                            self.logger.debug(f"  Name #{i}: Likely pet ({pet_probability:.2f}), exploring")
+
                 # Calculate click position (below text)
                 x, y, w, h = det['region']
-                click_pos = (x + w//2, y + h + 25)
+                click_pos = (x + w//2, y + h + self.geometry.click_offset_y)
                 
                 valid_targets.append({
                     'click_pos': click_pos,
                     'center': center,
                     'distance': det['distance_from_center'],
+                    'pet_probability': pet_probability,
+                    'explore': explore,
+                    'crop': crop,
+                    'features': features,
                     'detection': det
                 })
             
-            # SORT BY DISTANCE FROM CENTER (closest first)
-            valid_targets.sort(key=lambda t: t['distance'])
+            # RANK BY EXPECTED KILLS PER SECOND (distance, pet odds, area success rate, track age)
+            candidates = self.target_scorer.rank(valid_targets)
+            self.cycle_record['valid_targets'] = len(valid_targets)
+            self.cycle_record['prefiltered_pets'] = self.prefiltered_pets - prefiltered_before
+            stage_start = self.stage_done('filter', stage_start)
             
             self.logger.info(f"→ Valid targets (after cache): {len(valid_targets)}")
             
             if valid_targets:
-                self.logger.info(f"→ Target priority (closest to farthest):")
-                for i, target in enumerate(valid_targets[:5], 1):
+                self.logger.info(f"→ Target priority (best expected payoff first):")
+                for i, (_, _, target) in enumerate(sorted(candidates)[:5], 1):
                     dist = int(target['distance'])
-                    self.logger.info(f"   #{i}: Distance={dist}px from center")
+                    self.logger.info(f"   #{i}: Score={target['score']:.3f} kills/s, Distance={dist}px from center")
             
-            # Verify and attack (max per cycle)
+            # Verify and attack while the payoff is worth a click (max per cycle)
             confirmed_mobs = []
-            for i, target in enumerate(valid_targets[:Config.MAX_TARGETS_PER_CYCLE], 1):
-                self.logger.info(f"\n  Verifying target #{i} (D={int(target['distance'])}px)...")
+            i = 0
+            while candidates and i < Config.MAX_TARGETS_PER_CYCLE:
+                _, _, target = heapq.heappop(candidates)
+                if target['score'] < Config.TARGET_MIN_SCORE:
+                    self.target_scorer.skipped += len(candidates) + 1
+                    self.logger.info(f"→ Best remaining score {target['score']:.3f} < {Config.TARGET_MIN_SCORE} - not worth a click")
+                    break
+                i += 1
+                self.logger.info(f"\n  Verifying target #{i} (D={int(target['distance'])}px, score={target['score']:.3f})...")
                 
-                # Click and read nameplate
-                info = self.nameplate_reader.click_and_read(target['click_pos'])
+                # Click, then line up the next candidate while the nameplate is read in the background
+                stage_start = time.perf_counter()
+                click_start = time.time()
+                pending = self.nameplate_reader.begin_verify(target['click_pos'])
+                if candidates and i < Config.MAX_TARGETS_PER_CYCLE:
+                    self.input.move(*candidates[0][2]['click_pos'])
+                info = self.nameplate_reader.finish_verify(pending)
+                self.record_sample(target, info)
+                verified = bool(info and info.get('class') and info.get('is_alive'))
+                if target['explore'] and info and info.get('class'):
+                    self.false_drops += 1
+                dead_mob = bool(info and info.get('class') and not info.get('is_alive'))  # A mob was there - not the area's fault
+                self.target_scorer.record_click(target['click_pos'], None if dead_mob else verified,
+                                                info.get('class') if info else None, time.time() - click_start)
+                target_record = {
+                    'pos': target['click_pos'],
+                    'distance': round(target['distance']),
+                    'score': round(target['score'], 3),
+                    'pet_probability': round(target['pet_probability'], 3),
+                    'explore': target['explore'],
+                    'outcome': 'dead' if info and info.get('class') and not info.get('is_alive') else self.nameplate_reader.last_outcome,
+                    'class': info.get('class') if info else None,
+                    'killed': False
+                }
+                self.cycle_record['targets'].append(target_record)
+                stage_start = self.stage_done('verify', stage_start)
                 
                 if info is None:
                     self.logger.info(f"    ✗ No valid nameplate or is a pet")
@@ -1681,26 +4737,41 @@ class MobHunter:
                     self.stuck_detector.set_target_status(True)
                     continue
 
+                # Name allow/deny lists
+                if not self.nameplate_reader.name_recognizer.is_allowed(info.get('name')):
+                    self.logger.info(f"    ✗ Skipped by name list: {info['name']}")
+                    continue
+
                 # Valid mob!
-                self.logger.info(f"    ✓ {info['class']} | Status: ALIVE")
+                self.logger.info(f"    ✓ {info.get('name') or 'Mob'} | {info['class']} | Status: ALIVE")
                 confirmed_mobs.append(info)
 
                 # Update stuck detector: target selected
                 self.stuck_detector.set_target_status(True)
 
-                # Attack immediately (closest first strategy)
+                # Attack immediately (best payoff first strategy)
+                engage_start = time.time()
                 if self.combat.engage(info):
+                    self.target_scorer.record_kill(time.time() - engage_start)
+                    target_record['killed'] = True
+                    self.cycle_record['kills'] += 1
                     # Combat successful - reset stuck timer (progress made)
                     self.stuck_detector.reset_timer()
                     self.stuck_detector.set_target_status(False)
                     # Record kill for Scenario 1 timer
                     self.stuck_detector.on_kill()
+                    # Idle window before the next verification - refresh buffs expiring soon
+                    if self.buffer.should_run_buffer(idle=True):
+                        self.buffer.run_buffer_sequence(idle=True)
                 else:
                     # Combat failed - mob might be unreachable
                     # Reset action timer to give next mob a fresh chance
                     # Only trigger stuck if we fail on ALL mobs for 20+ seconds
                     self.stuck_detector.reset_timer()
                     self.logger.debug(f"    Combat failed - trying next mob (timer reset)")
+                stage_start = self.stage_done('combat', stage_start)
+
+            self.cycle_record['outcome'] = 'kills' if self.cycle_record['kills'] else 'no_kill'
             
             # Update overlay
             self.update_overlay(screenshot, detections, len(valid_targets), len(confirmed_mobs))
@@ -1713,8 +4784,13 @@ class MobHunter:
                     self.periodic_screenshot_count += 1
                     self.logger.debug(f"📸 Random screenshot captured for cycle #{self.cycle} ({self.periodic_screenshot_count}/{Config.MAX_PERIODIC_SCREENSHOTS})")
 
+        except ActionCancelled:
+            raise  # Handled by step()
         except Exception as e:
+            self.cycle_record['outcome'] = 'error'
+            self.cycle_record['error'] = str(e)
             self.logger.error(f"❌ CYCLE ERROR: {e}")
+            self.dump_blackbox(f"cycle_{self.cycle}_error")
             self.logger.error(f"Cycle #{self.cycle} failed")
             self.logger.error(traceback.format_exc())
 
@@ -1725,6 +4801,15 @@ class MobHunter:
                 except:
                     pass
     
+    def find_floating_names(self, screenshot):
+        """Detect floating names in-process or on the detection process pool"""
+        if self.detection_pool is not None and screenshot.nbytes <= self.detection_pool.slot_bytes:
+            detections = self.detection_pool.detect(screenshot)
+            self.detector.last_detections = detections
+            return detections
+
+        return self.detector.find_floating_names(screenshot)
+
     def update_overlay(self, screenshot, detections, valid_count, confirmed_count):
         """Update overlay with current stats"""
         status = "⏸️ PAUSED" if self.paused else "▶️ RUNNING"
@@ -1741,6 +4826,7 @@ class MobHunter:
             'Deaths': self.death_detector.death_count,
             'Stuck_Recoveries': self.stuck_detector.stuck_recoveries,
             'Early_Stops': self.combat.early_stops,
+            'HP': f"{self.health_tracker.get_fraction()*100:.0f}%" if self.health_tracker.get_fraction() is not None else "-",
             'Cache': f"{len(self.cache.cache)}",
             'Next_Buffer': f"{int(self.buffer.get_time_until_next())}s",
             'Uptime': f"{int(time.time() - self.start_time)}s"
@@ -1760,7 +4846,11 @@ class MobHunter:
         self.logger.info(f"📁 Log Directory: {self.log_dir}")
         self.logger.info(f"⏱️  Uptime: {uptime}s ({uptime//60}m {uptime%60}s)")
         self.logger.info(f"🔄 Total Cycles: {self.cycle}")
-        self.logger.info(f"📸 Screenshots Saved: {self.screenshot_counter}")
+        writer = self.screenshot_writer
+        self.logger.info(f"📸 Screenshots Saved: {writer.saved} ({writer.bytes_written / 1024 / 1024:.1f} MB)"
+                         f" | Dropped: {writer.dropped} | Over Budget: {writer.over_budget}")
+        if self.blackbox is not None:
+            self.logger.info(f"🗃️  Black Box Dumps: {self.blackbox.dumps} ({self.log_dir}/blackbox)")
         self.logger.info("")
 
         # Detection Stats
@@ -1768,8 +4858,18 @@ class MobHunter:
         self.logger.info(f"   Total Clicks: {self.nameplate_reader.click_count}")
         self.logger.info(f"   Verified Mobs: {self.nameplate_reader.verified_mobs}")
         self.logger.info(f"   Filtered Pets: {self.nameplate_reader.filtered_pets}")
+        self.logger.info(f"   Pre-filtered Pets: {self.prefiltered_pets} (clicks saved, {self.pet_classifier.model_source} model)")
+        self.logger.info(f"   Explored Likely Pets: {self.explored_pets} ({self.false_drops} were mobs)")
+        self.logger.info(f"   Low-Score Skips: {self.target_scorer.skipped} (below {Config.TARGET_MIN_SCORE} kills/s)")
+        self.logger.info(f"   Avg Verify Time: {self.target_scorer.verify_time:.2f}s (click to nameplate read)")
         pet_rate = (self.nameplate_reader.filtered_pets / self.nameplate_reader.click_count * 100) if self.nameplate_reader.click_count > 0 else 0
         self.logger.info(f"   Pet Filter Rate: {pet_rate:.1f}%")
+        names = self.nameplate_reader.name_recognizer
+        if names.enabled:
+            self.logger.info(f"   Name OCR: {names.ocr_calls} calls, {names.cache_hits} cache hits ({len(names.cache)} names cached)")
+        if self.dataset is not None:
+            self.logger.info(f"   Dataset Samples: {self.dataset.samples_saved} saved to {self.dataset.session_dir}"
+                             f" ({self.dataset.chunks_deleted} old chunks deleted)")
         self.logger.info("")
 
         # Combat Stats
@@ -1777,6 +4877,9 @@ class MobHunter:
         self.logger.info(f"   Total Kills: {self.combat.total_kills}")
         self.logger.info(f"   Deaths: {self.death_detector.death_count}")
         self.logger.info(f"   Early Stops: {self.combat.early_stops}")
+        self.logger.info(f"   Low-Health Alerts: {self.health_tracker.alerts}")
+        self.logger.info(f"   Potions Used: {self.combat.potions_used}")
+        self.logger.info(f"   Retreats: {self.combat.retreats}")
         self.logger.info(f"   Skills Used: {self.combat.skills_used}")
         avg_skills = self.combat.skills_used / self.combat.total_kills if self.combat.total_kills > 0 else 0
         self.logger.info(f"   Avg Skills/Kill: {avg_skills:.1f}")
@@ -1786,12 +4889,22 @@ class MobHunter:
 
         # System Stats
         self.logger.info("⚙️  System:")
-        self.logger.info(f"   Buffer Sequences: {self.buffer.total_buffs}")
-        self.logger.info(f"   Stuck Recoveries: {self.stuck_detector.stuck_recoveries}")
+        self.logger.info(f"   Buff Refreshes: {self.buffer.total_buffs} ({self.buffer.buffs_cast} buffs cast, {self.buffer.failed_casts} not confirmed)")
+        self.logger.info(f"   Stuck Recoveries: {self.stuck_detector.stuck_recoveries} ({self.stuck_detector.vision_recoveries} vision-guided)")
+        self.logger.info(f"   Blocked Moves: {self.stuck_detector.blocked_moves}")
+        self.logger.info(f"   Blocked Approaches: {self.stuck_detector.blocked_approaches}")
         self.logger.info(f"   Cache Hit Rate: {cache_stats['hit_rate']:.1f}%")
         self.logger.info(f"   Cache Size: {len(self.cache.cache)} entries")
         self.logger.info("")
 
+        # Time spent in key sequences
+        if self.executor.timings:
+            self.logger.info("⏱️  Action Time:")
+            for name, stats in sorted(self.executor.timings.items(), key=lambda item: -item[1]['total']):
+                self.logger.info(f"   {name}: {stats['total']:.1f}s over {stats['runs']} runs "
+                                 f"(max {stats['max']:.1f}s, {stats['interrupted']} interrupted)")
+            self.logger.info("")
+
         # Efficiency Metrics
         if self.cycle > 0:
             avg_cycle_time = uptime / self.cycle
@@ -1805,12 +4918,151 @@ class MobHunter:
         self.logger.info("="*70)
 
 
+# ============================================================================
+# MULTI-CLIENT ORCHESTRATION
+# ============================================================================
+
+def find_window_region(title):
+    """
+    Locate a game window by title
+    Returns (region, hwnd) where region is the client area in screen coordinates,
+    or (None, None) if the window doesn't exist
+    """
+    hwnd = win32gui.FindWindow(None, title)
+    if not hwnd:
+        return None, None
+
+    left, top, right, bottom = win32gui.GetClientRect(hwnd)
+    screen_left, screen_top = win32gui.ClientToScreen(hwnd, (left, top))
+    region = {
+        'top': screen_top,
+        'left': screen_left,
+        'width': right - left,
+        'height': bottom - top
+    }
+    return region, hwnd
+
+
+class MultiInstanceHunter:
+    """
+    Drive several game windows from one process
+
+    Each window gets its own MobHunter (capture region, cache, stuck/death
+    detectors, stats, log directory) running on its own thread, so capture,
+    detection and tracking proceed for all windows in parallel (OpenCV, mss
+    and sleeps release the GIL). Mouse/keyboard output is time-sliced through
+    one shared FocusScheduler. Hotkeys (CapsLock pause/resume) apply to all.
+    """
+
+    def __init__(self, window_titles=None, profile=None):
+        self.logger, self.log_dir = setup_logger()
+        self.profile = profile  # Watched here for all windows (settings loaded by main)
+        if self.profile is not None:
+            self.profile.logger = self.logger
+        self.focus_scheduler = FocusScheduler(self.logger)
+        # One detection process pool serves all windows
+        self.detection_pool = DetectionProcessPool(self.logger) if Config.DETECTION_PROCESSES > 0 else None
+        self.instances = []
+        self.threads = []
+        self.start_time = time.time()
+
+        window_titles = window_titles if window_titles is not None else Config.INSTANCE_WINDOWS
+
+        self.logger.info("="*70)
+        self.logger.info("MOB HUNTER v3.0 - MULTI-CLIENT MODE")
+        self.logger.info("="*70)
+
+        for i, title in enumerate(window_titles, 1):
+            region, hwnd = find_window_region(title)
+            if region is None:
+                self.logger.warning(f"⚠️  Window not found: '{title}' - skipping")
+                continue
+
+            # ROIs/filters scale with the window size (ScreenGeometry) - another aspect ratio stretches them
+            if abs(region['width'] * Config.BASE_HEIGHT - region['height'] * Config.BASE_WIDTH) > region['height'] * 20:
+                self.logger.warning(f"⚠️  '{title}' client area is {region['width']}x{region['height']}, "
+                                    f"not {Config.BASE_WIDTH}:{Config.BASE_HEIGHT} - UI regions may be off")
+
+            name = f"win{i}"
+            self.logger.info(f"  {name}: '{title}' at ({region['left']}, {region['top']}) "
+                             f"{region['width']}x{region['height']}")
+            self.instances.append(MobHunter(name, region, hwnd, self.focus_scheduler, self.detection_pool))
+
+        self.logger.info(f"Instances: {len(self.instances)}")
+        self.logger.info("="*70)
+
+    def run(self):
+        """Start one thread per instance and handle global hotkeys"""
+        if not self.instances:
+            self.logger.error("❌ No game windows found - nothing to do")
+            return
+
+        for hunter in self.instances:
+            thread = threading.Thread(target=hunter.run_instance, name=hunter.instance_name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        self.logger.info("\n🚀 All instances started! CapsLock = Pause/Resume all | Ctrl+C = Stop\n")
+
+        try:
+            while any(thread.is_alive() for thread in self.threads):
+                if check_capslock_toggle():
+                    for hunter in self.instances:
+                        hunter.toggle_pause()
+                # Profile saved - every window applies it before its next cycle
+                changed = self.profile.poll() if self.profile is not None else {}
+                if changed:
+                    for hunter in self.instances:
+                        hunter.queue_settings(changed)
+                    if self.detection_pool:
+                        self.detection_pool.update_settings(changed)
+                time.sleep(0.1)
+
+        except KeyboardInterrupt:
+            self.logger.info("\n\n⛔ Bot stopped by user")
+        finally:
+            for hunter in self.instances:
+                hunter.running = False
+            for thread in self.threads:
+                thread.join(timeout=20)
+            if self.detection_pool:
+                self.detection_pool.shutdown()
+            self.print_statistics()
+            stop_logger(self.logger)
+
+    def print_statistics(self):
+        """Aggregate statistics across instances (per-instance details are in each log)"""
+        uptime = int(time.time() - self.start_time)
+        total_kills = sum(hunter.combat.total_kills for hunter in self.instances)
+        total_deaths = sum(hunter.death_detector.death_count for hunter in self.instances)
+
+        self.logger.info("\n" + "="*70)
+        self.logger.info("📊 MULTI-CLIENT STATISTICS")
+        self.logger.info("="*70)
+        for hunter in self.instances:
+            kills_per_hour = (hunter.combat.total_kills / uptime * 3600) if uptime > 0 else 0
+            self.logger.info(f"   {hunter.instance_name}: {hunter.combat.total_kills} kills "
+                             f"({kills_per_hour:.1f}/h), {hunter.death_detector.death_count} deaths, "
+                             f"{hunter.cycle} cycles")
+        kills_per_hour = (total_kills / uptime * 3600) if uptime > 0 else 0
+        self.logger.info(f"   Total: {total_kills} kills ({kills_per_hour:.1f}/h), {total_deaths} deaths")
+        self.logger.info(f"   Focus switches: {self.focus_scheduler.focus_switches}")
+        self.logger.info("="*70)
+
+
 # ============================================================================
 # ENTRY POINT
 # ============================================================================
 
 def main():
     """Entry point"""
+    # Settings first - they choose the mode, logging and capture region
+    settings_logger = logging.getLogger('MobHunter.settings')
+    settings_logger.addHandler(logging.StreamHandler())
+    settings_logger.setLevel(logging.INFO)
+    settings_logger.propagate = False
+    profile = load_settings(settings_logger)
+
     print("""
 ╔═══════════════════════════════════════════════════════╗
 ║                                                       ║
@@ -1846,7 +5098,10 @@ Waiting for CapsLock to start...
     print("Bot starting...\n")
     time.sleep(0.5)
 
-    bot = MobHunter()
+    if Config.MULTI_INSTANCE_ENABLED:
+        bot = MultiInstanceHunter(profile=profile)
+    else:
+        bot = MobHunter(profile=profile)
     bot.run()
 
 